@@ -1,8 +1,15 @@
 import argparse
 import time
+from core.warmup import STARTUP
 import cv2
 from config import CONFIG
 from core.camera import VideoSource
+from core.feed import FeedPublisher, frame_meta
+from core.frame import FrameContext
+from core.pipeline import PipelineEngine
+from core.recording import LandmarkRecorder
+from core.scheduler import LoadShedder
+from core.telemetry import TELEMETRY
 from core.landmarks import LandmarkDetector
 from core.fatigue import FatigueAnalyzer
 from core.emotion import EmotionAnalyzer
@@ -12,45 +19,101 @@ from core.privacy import apply_privacy
 from core.wellness import WellnessOrchestrator
 from core.trend import TrendBuffer
 
+STARTUP.record("app", "import", time.perf_counter() - STARTUP.t0)
+
 def main():
     parser = argparse.ArgumentParser(description="DriveMind runtime")
     parser.add_argument("--source", default=CONFIG.camera_source, help="Camera index or video path")
     parser.add_argument("--no-voice", action="store_true", help="Disable voice suggestions")
+    parser.add_argument("--voice-backend", default=CONFIG.voice_backend, choices=["pyttsx3", "file", "null"],
+                        help="Speech output backend")
     parser.add_argument("--blur", action="store_true", help="Enable privacy blur for faces")
+    parser.add_argument("--threaded", action="store_true", help="Capture frames on a background thread")
+    parser.add_argument("--telemetry", action="store_true", help="Record stage latencies and export them")
+    parser.add_argument("--record", help="Write per-frame landmarks to this file for replay.py")
+    parser.add_argument("--budget-ms", type=float, default=CONFIG.scheduler_budget_ms,
+                        help="Per-frame latency budget for load shedding")
+    parser.add_argument("--no-shed", action="store_true", help="Never degrade optional stages")
+    parser.add_argument("--publish", action="store_true", help="Publish frames and metrics for the dashboard")
+    parser.add_argument("--headless", action="store_true", help="No preview window (use with --publish)")
     args = parser.parse_args()
 
     CONFIG.enable_voice = not args.no_voice
+    CONFIG.voice_backend = args.voice_backend
     CONFIG.enable_privacy_blur = args.blur
+    CONFIG.camera_threaded = CONFIG.camera_threaded or args.threaded
+    CONFIG.telemetry_enabled = CONFIG.telemetry_enabled or args.telemetry
+    CONFIG.scheduler_enabled = CONFIG.scheduler_enabled and not args.no_shed
+    CONFIG.scheduler_budget_ms = args.budget_ms
+    feed = None
+    if args.publish:
+        # Before anything starts: a feed name held by a live runtime is refused
+        try:
+            feed = FeedPublisher(CONFIG.feed_name, display_fps=CONFIG.feed_display_fps,
+                                 jpeg_quality=CONFIG.feed_jpeg_quality, slots=CONFIG.feed_slots,
+                                 slot_bytes=CONFIG.feed_slot_bytes, stale_sec=CONFIG.feed_stale_sec)
+        except RuntimeError as e:
+            parser.error(str(e))
+    TELEMETRY.configure(CONFIG.telemetry_enabled, CONFIG.telemetry_export_path,
+                        CONFIG.telemetry_export_interval_sec)
 
-    cam = VideoSource(args.source)
-    lmk = LandmarkDetector(CONFIG.dlib_landmarks_path)
+    # Models load on background threads while the camera opens; fatigue starts once landmarks are up,
+    # identity and emotion join the pipeline whenever they are ready
+    lmk = LandmarkDetector(CONFIG.dlib_landmarks_path, track=CONFIG.landmark_track,
+                           redetect_every=CONFIG.landmark_redetect_every,
+                           detect_scale=CONFIG.landmark_detect_scale, lazy=True).warm_up()
+    emotion = EmotionAnalyzer(async_mode=CONFIG.emotion_async, max_rate_hz=CONFIG.emotion_max_rate_hz,
+                              stale_sec=CONFIG.emotion_stale_sec, lazy=True).warm_up()
+    driver_id = DriverIdentifier(CONFIG.drivers_dir, reverify_sec=CONFIG.identity_reverify_sec,
+                                 index_dir=CONFIG.gallery_index_dir, lazy=True).warm_up()
+    source = int(args.source) if str(args.source).isdigit() else args.source
+    with STARTUP.timer("camera", "load"):
+        cam = VideoSource(source, threaded=CONFIG.camera_threaded,
+                          buffer_size=CONFIG.camera_buffer_size, drop_policy=CONFIG.camera_drop_policy)
     fatigue = FatigueAnalyzer(
         ear_thresh=CONFIG.ear_drowsy_thresh,
         perclos_thresh=CONFIG.perclos_drowsy_thresh,
         yawn_thresh=CONFIG.yawn_thresh,
         window_sec=CONFIG.fatigue_window_sec
     )
-    emotion = EmotionAnalyzer()
-    driver_id = DriverIdentifier(CONFIG.drivers_dir)
-    thresholds = ThresholdManager(CONFIG.thresholds_path)
+    thresholds = ThresholdManager(CONFIG.thresholds_path, write_behind=CONFIG.thresholds_write_behind,
+                                  flush_interval_sec=CONFIG.thresholds_flush_interval_sec)
     trends = TrendBuffer(window_minutes=CONFIG.trend_window_minutes)
-    orchestrator = WellnessOrchestrator(CONFIG, thresholds)
+    shedder = LoadShedder(CONFIG.scheduler_budget_ms, restore_ratio=CONFIG.scheduler_restore_ratio,
+                          hold_sec=CONFIG.scheduler_hold_sec, emotion_hz=CONFIG.pipeline_emotion_hz,
+                          identity_hz=CONFIG.pipeline_identity_hz, display_every=CONFIG.scheduler_display_every,
+                          detect_scale=CONFIG.scheduler_detect_scale, enabled=CONFIG.scheduler_enabled,
+                          count_side_stages=CONFIG.scheduler_count_side_stages)
+    orchestrator = WellnessOrchestrator(CONFIG, thresholds, load_shedder=shedder)
 
-    last_intervention_ts = 0
-    print("DriveMind started. Press 'q' to quit.")
+    recorder = LandmarkRecorder(args.record) if args.record else None
+    engine = PipelineEngine(cam, lmk, fatigue, emotion, driver_id, thresholds, trends, orchestrator, CONFIG,
+                            identity_hz=CONFIG.pipeline_identity_hz, emotion_hz=CONFIG.pipeline_emotion_hz,
+                            queue_size=CONFIG.pipeline_queue_size, recorder=recorder, shedder=shedder)
+    last_history_ts = 0.0
+    startup_reported = False
+    ctx = FrameContext()
+    print("DriveMind started. Press 'q' to quit." if not args.headless else "DriveMind started. Ctrl+C to quit.")
     try:
-        for frame in cam.frames():
-            face_rects, landmarks = lmk.detect(frame)
-            identity = driver_id.identify(frame, face_rects)
-            per_driver = thresholds.get_for_driver(identity)
-
-            metrics = fatigue.update(frame, face_rects, landmarks)
-            stress = emotion.estimate(frame, face_rects)
-            trends.update(identity, metrics, stress)
+        for res in engine.results():
+            capture_ts, face_rects = res["ts"], res["face_rects"]
+            identity, metrics, stress, status = res["identity"], res["metrics"], res["stress"], res["status"]
+            if not startup_reported:
+                STARTUP.mark("first decision")
+                if emotion.ready and driver_id.ready:
+                    STARTUP.mark("all models ready")
+                    print(STARTUP.report())
+                    startup_reported = True
+            if not res["render"] or (args.headless and not (feed and feed.due())):
+                # Nothing to draw (display shed, or headless between feed frames); keep the window responsive
+                if not args.headless and cv2.waitKey(1) & 0xFF == ord('q'):
+                    break
+                continue
 
-            status = orchestrator.evaluate(identity, metrics, stress, per_driver)
-
-            display_frame = apply_privacy(frame.copy(), face_rects, enable_blur=CONFIG.enable_privacy_blur)
+            render_t0 = time.perf_counter()
+            # Draw on the frame itself unless a side stage may still be reading it
+            ctx.reset(res["frame"], capture_ts, shared=res["shared"])
+            display_frame = apply_privacy(ctx.display(), face_rects, enable_blur=CONFIG.enable_privacy_blur)
 
             # Color-coded HUD
             color = (0, 255, 0)
@@ -59,7 +122,7 @@ def main():
             elif status["alert_level"] == "high":
                 color = (0, 0, 255)
 
-            hud = f"{identity or 'Unknown'} | EAR:{metrics.get('ear_avg',0):.2f} PERCLOS:{metrics.get('perclos',0):.2f} Yawn:{metrics.get('yawn',0):.1f} Stress:{stress.get('stress_score',0):.2f} Alert:{status.get('alert_level','none')}"
+            hud = f"{identity or 'Unknown'} | EAR:{metrics.get('ear_avg',0):.2f} PERCLOS:{metrics.get('perclos',0):.2f} Yawn:{metrics.get('yawn',0):.2f} Stress:{stress.get('stress_score',0):.2f} Alert:{status.get('alert_level','none')} Lat:{(time.time() - capture_ts) * 1000:.0f}ms Shed:{status.get('degradation',0)}"
             cv2.putText(display_frame, hud, (10, 30), cv2.FONT_HERSHEY_SIMPLEX, 0.6, color, 2)
 
             # Alert banner
@@ -67,19 +130,39 @@ def main():
                 cv2.putText(display_frame, "⚠️ ALERT: " + status["alert_level"].upper(), (10, 60),
                             cv2.FONT_HERSHEY_SIMPLEX, 0.8, (0, 0, 255), 3)
 
-                now = time.time()
-                if now - last_intervention_ts > CONFIG.intervention_min_interval_sec:
-                    orchestrator.nudge(identity, status, metrics, stress)
-                    last_intervention_ts = now
-
-            cv2.imshow("DriveMind", display_frame)
-            key = cv2.waitKey(1) & 0xFF
+            if feed and feed.due():
+                # Trend history and stage latencies ride along once per second
+                slow = time.time() - last_history_ts >= 1.0
+                if slow:
+                    last_history_ts = time.time()
+                tel = TELEMETRY.snapshot() if slow and TELEMETRY.enabled else None
+                feed.publish(display_frame, frame_meta(res, trends if slow else None, telemetry=tel), ts=capture_ts)
+            key = 0
+            if not args.headless:
+                cv2.imshow("DriveMind", display_frame)
+                key = cv2.waitKey(1) & 0xFF
+            render_sec = time.perf_counter() - render_t0
+            TELEMETRY.observe("render", render_sec)
+            engine.report_render(render_sec)
             if key == ord('q'):
                 break
     except KeyboardInterrupt:
         print("Exiting DriveMind...")
     finally:
+        engine.stop()
+        if not startup_reported:
+            print(STARTUP.report())
+        if feed:
+            feed.close()
+        if recorder:
+            recorder.close()
+        s = cam.stats
+        print(f"Frames captured:{s['captured']} delivered:{s['delivered']} dropped:{s['dropped']}")
         cam.release()
+        emotion.close()
+        thresholds.close()
+        orchestrator.close()
+        TELEMETRY.close(CONFIG.telemetry_export_path)
         cv2.destroyAllWindows()
 
 if __name__ == "__main__":
@@ -0,0 +1,198 @@
+import argparse
+import dataclasses
+import glob
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+import cv2
+from config import CONFIG
+
+# Per-process models, built once by the pool initializer
+_WORKER = {}
+
+def expand_sources(patterns):
+    paths = []
+    for p in patterns:
+        matches = sorted(glob.glob(p)) if glob.has_magic(p) else [p]
+        paths.extend(m for m in matches if os.path.isfile(m))
+    return paths
+
+def video_info(path):
+    cap = cv2.VideoCapture(path)
+    if not cap.isOpened():
+        raise RuntimeError(f"Failed to open video source: {path}")
+    fps = cap.get(cv2.CAP_PROP_FPS) or 30.0
+    n_frames = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
+    cap.release()
+    return fps, n_frames
+
+def plan_segments(path, fps, n_frames, segment_sec, warmup_sec):
+    # Each segment re-reads a warm-up prefix so windowed state matches a sequential run
+    if n_frames <= 0:
+        # Frame count unknown (streamed or odd containers): one sequential pass until EOF
+        return [{"path": path, "index": 0, "fps": fps, "warmup_start": 0, "start": 0, "end": None}]
+    seg_len = max(1, int(segment_sec * fps))
+    warmup = int(warmup_sec * fps)
+    tasks = []
+    for i, start in enumerate(range(0, max(n_frames, 1), seg_len)):
+        tasks.append({
+            "path": path, "index": i, "fps": fps,
+            "warmup_start": max(0, start - warmup),
+            "start": start, "end": min(start + seg_len, n_frames),
+        })
+    return tasks
+
+def _init_worker(cfg):
+    from core.landmarks import LandmarkDetector
+    from core.emotion import EmotionAnalyzer
+    from core.profiling import ThresholdManager
+    # Tracking and async emotion depend on timing/phase; batch runs must be deterministic
+    _WORKER["cfg"] = cfg
+    _WORKER["lmk"] = LandmarkDetector(cfg.dlib_landmarks_path, detect_scale=cfg.landmark_detect_scale)
+    _WORKER["emotion"] = EmotionAnalyzer()
+    _WORKER["thresholds"] = ThresholdManager(cfg.thresholds_path)
+
+def read_frames(path, start=0, fps=None):
+    """Yield the frames of ``path`` from index ``start`` on.
+
+    A seek is only trusted when the first decoded frame's timestamp lands on
+    ``start``: OpenCV echoes the requested POS_FRAMES even after an inexact
+    keyframe seek. Otherwise frames are decoded forward from the beginning.
+    """
+    cap = cv2.VideoCapture(path)
+    try:
+        first = None
+        if start:
+            fps = fps or cap.get(cv2.CAP_PROP_FPS) or 30.0
+            cap.set(cv2.CAP_PROP_POS_FRAMES, start)
+            ok, first = cap.read()
+            if not ok or round(cap.get(cv2.CAP_PROP_POS_MSEC) * fps / 1000.0) != start:
+                cap.release()
+                cap = cv2.VideoCapture(path)
+                first = None
+                for _ in range(start):
+                    if not cap.grab():
+                        return
+        if first is not None:
+            yield first
+        while True:
+            ok, frame = cap.read()
+            if not ok:
+                return
+            yield frame
+    finally:
+        cap.release()
+
+def process_segment(task):
+    from core.fatigue import FatigueAnalyzer
+    from core.frame import FrameContext
+    from core.wellness import WellnessOrchestrator
+    cfg = _WORKER["cfg"]
+    lmk, emotion = _WORKER["lmk"], _WORKER["emotion"]
+    fatigue = FatigueAnalyzer(
+        ear_thresh=cfg.ear_drowsy_thresh,
+        perclos_thresh=cfg.perclos_drowsy_thresh,
+        yawn_thresh=cfg.yawn_thresh,
+        window_sec=cfg.fatigue_window_sec
+    )
+    orchestrator = WellnessOrchestrator(cfg, _WORKER["thresholds"], log_events=False)
+
+    rows = {k: [] for k in ("frame", "ts", "faces", "ear_avg", "perclos", "yawn", "pitch", "blink_rate",
+                             "eyes_closed_sec", "microsleep", "dominant_emotion", "stress_score", "alert_level", "reasons")}
+    ctx = FrameContext()
+    t0 = time.perf_counter()
+    idx = task["warmup_start"]
+    end = task["end"]
+    for frame in read_frames(task["path"], idx, task["fps"]):
+        if end is not None and idx >= end:
+            break
+        ts = idx / task["fps"]
+        ctx.reset(frame, ts)
+        face_rects, landmarks = lmk.detect(frame, ctx)
+        metrics = fatigue.update(frame, face_rects, landmarks, ts=ts)
+        if idx >= task["start"]:
+            # Emotion and alerts are per-frame; only computed for frames this segment owns
+            stress = emotion.estimate(frame, face_rects, ctx)
+            status = orchestrator.evaluate(None, metrics, stress, {})
+            rows["frame"].append(idx)
+            rows["ts"].append(ts)
+            rows["faces"].append(len(face_rects))
+            for k in ("ear_avg", "perclos", "yawn", "pitch", "blink_rate", "eyes_closed_sec"):
+                rows[k].append(float(metrics.get(k, 0.0)))
+            rows["microsleep"].append(bool(metrics.get("microsleep", False)))
+            rows["dominant_emotion"].append(stress["dominant_emotion"])
+            rows["stress_score"].append(stress["stress_score"])
+            rows["alert_level"].append(status["alert_level"])
+            rows["reasons"].append(",".join(status["reasons"]))
+        idx += 1
+    orchestrator.close()
+    elapsed = time.perf_counter() - t0
+    return {"path": task["path"], "index": task["index"], "rows": rows, "pid": os.getpid(),
+            "frames_decoded": idx - task["warmup_start"], "elapsed": elapsed}
+
+def write_result(rows, out_path, fmt):
+    import pandas as pd
+    df = pd.DataFrame(rows)
+    if fmt == "parquet":
+        df.to_parquet(out_path, index=False)
+    elif fmt == "feather":
+        df.to_feather(out_path)
+    else:
+        df.to_csv(out_path, index=False)
+
+def run_batch(sources, out_dir, workers=None, segment_sec=300, fmt="parquet", cfg=CONFIG):
+    os.makedirs(out_dir, exist_ok=True)
+    warmup_sec = cfg.fatigue_window_sec + 5
+    tasks = []
+    for path in sources:
+        fps, n_frames = video_info(path)
+        tasks.extend(plan_segments(path, fps, n_frames, segment_sec, warmup_sec))
+
+    results = {}
+    per_worker = {}
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(cfg,)) as pool:
+        for res in pool.map(process_segment, tasks):
+            results.setdefault(res["path"], []).append(res)
+            w = per_worker.setdefault(res["pid"], {"frames": 0, "elapsed": 0.0})
+            w["frames"] += res["frames_decoded"]
+            w["elapsed"] += res["elapsed"]
+
+    outputs = []
+    for path in sources:
+        segs = sorted(results.get(path, []), key=lambda r: r["index"])
+        merged = {k: [] for k in segs[0]["rows"]} if segs else {}
+        for seg in segs:
+            for k, v in seg["rows"].items():
+                merged[k].extend(v)
+        if not merged.get("frame"):
+            print(f"Warning: no frames decoded from {path}")
+        stem = os.path.splitext(os.path.basename(path))[0]
+        out_path = os.path.join(out_dir, f"{stem}.{fmt}")
+        write_result(merged, out_path, fmt)
+        outputs.append(out_path)
+
+    for pid, w in sorted(per_worker.items()):
+        fps = w["frames"] / w["elapsed"] if w["elapsed"] else 0.0
+        print(f"worker {pid}: {w['frames']} frames in {w['elapsed']:.1f}s ({fps:.1f} FPS)")
+    return outputs
+
+def main():
+    parser = argparse.ArgumentParser(description="DriveMind headless batch analysis")
+    parser.add_argument("videos", nargs="+", help="Video files or glob patterns")
+    parser.add_argument("--out", default=os.path.join("data", "batch"), help="Output directory")
+    parser.add_argument("--workers", type=int, default=None, help="Worker processes (default: all cores)")
+    parser.add_argument("--segment-sec", type=float, default=300, help="Segment length in seconds")
+    parser.add_argument("--format", choices=["parquet", "feather", "csv"], default="parquet")
+    args = parser.parse_args()
+
+    sources = expand_sources(args.videos)
+    if not sources:
+        parser.error("no video files matched")
+    cfg = dataclasses.replace(CONFIG, enable_voice=False)
+    t0 = time.perf_counter()
+    outputs = run_batch(sources, args.out, workers=args.workers, segment_sec=args.segment_sec,
+                        fmt=args.format, cfg=cfg)
+    print(f"Wrote {len(outputs)} file(s) to {args.out} in {time.perf_counter() - t0:.1f}s")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,223 @@
+import argparse
+import dataclasses
+import json
+import os
+import platform
+import sys
+import tempfile
+import time
+import numpy as np
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from config import CONFIG
+from core.fatigue import FatigueAnalyzer, eye_aspect_ratio
+from core.geometry import face_geometry
+from core.privacy import apply_privacy
+from core.profiling import ThresholdManager
+from core.trend import TrendBuffer
+from core.wellness import WellnessOrchestrator
+from bench.synthetic import FRAME_SIZE, face_rect, landmark_sequence, synthetic_frame
+
+DEFAULT_BASELINE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "baseline.json")
+
+def timeit(fn, n, warmup=20):
+    for i in range(min(warmup, n)):
+        fn(i)
+    samples = np.empty(n)
+    for i in range(n):
+        t0 = time.perf_counter()
+        fn(i)
+        samples[i] = time.perf_counter() - t0
+    return {
+        "calls": n,
+        "mean_us": float(samples.mean() * 1e6),
+        "p50_us": float(np.percentile(samples, 50) * 1e6),
+        "p95_us": float(np.percentile(samples, 95) * 1e6),
+        "per_sec": float(n / samples.sum()),
+    }
+
+class _Rect:
+    # dlib.rectangle's accessors, so the detect/track path runs without dlib
+    __slots__ = ("l", "t", "r", "b")
+
+    def __init__(self, left, top, right, bottom):
+        self.l, self.t, self.r, self.b = left, top, right, bottom
+
+    def left(self): return self.l
+    def top(self): return self.t
+    def right(self): return self.r
+    def bottom(self): return self.b
+    def width(self): return self.r - self.l + 1
+    def height(self): return self.b - self.t + 1
+    def area(self): return self.width() * self.height()
+
+class _Point:
+    __slots__ = ("x", "y")
+
+    def __init__(self, x, y):
+        self.x, self.y = x, y
+
+class _Shape:
+    # full_object_detection's part(i) interface
+    def __init__(self, shape):
+        self.points = [_Point(int(x), int(y)) for x, y in shape]
+        self.num_parts = len(self.points)
+
+    def part(self, i):
+        return self.points[i]
+
+def _shape_to_np(shape):
+    # Same per-part copy as imutils.face_utils.shape_to_np
+    coords = np.zeros((shape.num_parts, 2), dtype="int")
+    for i in range(shape.num_parts):
+        coords[i] = (shape.part(i).x, shape.part(i).y)
+    return coords
+
+class _StandInDetector:
+    # Replaces the HOG detector / shape predictor when dlib or the model files are absent
+    def __init__(self, shapes):
+        self.shapes = [_Shape(s) for s in shapes]
+        self.rects = [face_rect(s) for s in shapes]
+        self.i = 0
+
+    def detector(self, gray, upsample):
+        x, y, w, h = self.rects[self.i % len(self.rects)]
+        if gray.shape[:2] != FRAME_SIZE:
+            # Tracking search box, centred on the last face
+            gh, gw = gray.shape[:2]
+            x, y = max(0, (gw - w) // 2), max(0, (gh - h) // 2)
+            w, h = min(w, gw - 1), min(h, gh - 1)
+        return [_Rect(x, y, x + w, y + h)]
+
+    def predictor(self, gray, rect):
+        shape = self.shapes[self.i % len(self.shapes)]
+        self.i += 1
+        return shape
+
+def make_landmark_detector(shapes, use_models, track=False):
+    from core.landmarks import LandmarkDetector
+    if use_models:
+        try:
+            lmk = LandmarkDetector(CONFIG.dlib_landmarks_path, track=track)
+            if lmk.has_predictor:
+                return lmk, "dlib models"
+        except ImportError:
+            pass
+    stand_in = _StandInDetector(shapes)
+    lmk = LandmarkDetector("", track=track, lazy=True)
+    lmk.attach_models(stand_in.detector, stand_in.predictor, _Rect, _shape_to_np)
+    return lmk, "stand-in detector/predictor"
+
+def run(seconds=60, fps=30, use_models=False):
+    ts, shapes = landmark_sequence(seconds=seconds, fps=fps)
+    n = len(ts)
+    rects = [face_rect(s) for s in shapes]
+    frame = synthetic_frame(shapes[0])
+    tmp = tempfile.mkdtemp(prefix="drivemind-bench-")
+    cfg = dataclasses.replace(CONFIG, enable_voice=False, events_async=True,
+                              events_log_path=os.path.join(tmp, "events.log"))
+    thresholds = ThresholdManager(os.path.join(tmp, "thresholds.json"), write_behind=True)
+    results = {}
+    notes = {}
+
+    results["eye_aspect_ratio"] = timeit(lambda i: eye_aspect_ratio(shapes[i % n][36:42]), n)
+
+    batch = shapes[:1000]
+    results["face_geometry(1000 faces)"] = timeit(lambda i: face_geometry(batch), 50, warmup=5)
+
+    fatigue = FatigueAnalyzer(window_sec=CONFIG.fatigue_window_sec)
+    metrics_seq = []
+    def fatigue_step(i):
+        m = fatigue.update(None, [rects[i % n]], [shapes[i % n]], ts=ts[i % n] + (i // n) * seconds)
+        if len(metrics_seq) < n:
+            metrics_seq.append(m)
+    results["FatigueAnalyzer.update"] = timeit(fatigue_step, n, warmup=0)
+
+    stress = {"dominant_emotion": "neutral", "stress_score": 0.3}
+    trends = TrendBuffer(window_minutes=CONFIG.trend_window_minutes)
+    results["TrendBuffer.update"] = timeit(
+        lambda i: trends.update("bench", metrics_seq[i % n], stress, ts=float(ts[i % n])), n, warmup=0)
+    results["TrendBuffer.summary"] = timeit(lambda i: trends.summary("bench"), n)
+
+    orchestrator = WellnessOrchestrator(cfg, thresholds)
+    results["WellnessOrchestrator.evaluate"] = timeit(
+        lambda i: orchestrator.evaluate("bench", metrics_seq[i % n], stress, {}), n)
+
+    results["apply_privacy(blur)"] = timeit(
+        lambda i: apply_privacy(frame.copy(), [rects[i % n]], enable_blur=True), min(n, 300))
+
+    lmk, notes["LandmarkDetector.detect"] = make_landmark_detector(shapes, use_models)
+    results["LandmarkDetector.detect"] = timeit(lambda i: lmk.detect(frame), min(n, 300))
+    tracker, notes["LandmarkDetector.detect(track)"] = make_landmark_detector(shapes, use_models, track=True)
+    results["LandmarkDetector.detect(track)"] = timeit(lambda i: tracker.detect(frame), min(n, 300))
+
+    # End to end: detect -> fatigue -> emotion (neutral fallback) -> trend -> evaluate
+    from core.emotion import EmotionAnalyzer
+    emotion = EmotionAnalyzer() if use_models else None
+    chain_fatigue = FatigueAnalyzer(window_sec=CONFIG.fatigue_window_sec)
+    chain_trends = TrendBuffer(window_minutes=CONFIG.trend_window_minutes)
+    def chain(i):
+        face_rects, landmarks = lmk.detect(frame)
+        m = chain_fatigue.update(frame, face_rects, landmarks, ts=float(ts[i % n]))
+        s = emotion.estimate(frame, face_rects) if emotion else stress
+        chain_trends.update("bench", m, s, ts=float(ts[i % n]))
+        orchestrator.evaluate("bench", m, s, {})
+    results["chain(end-to-end)"] = timeit(chain, min(n, 600), warmup=0)
+    notes["chain(end-to-end)"] = "models" if use_models else "no emotion model"
+
+    orchestrator.close()
+    thresholds.close()
+    return {"machine": platform.platform(), "python": platform.python_version(),
+            "results": results, "notes": notes}
+
+def compare(current, baseline, threshold):
+    regressions = []
+    for name, cur in current["results"].items():
+        base = baseline.get("results", {}).get(name)
+        if not base:
+            continue
+        ratio = cur["p50_us"] / base["p50_us"] if base["p50_us"] else 1.0
+        cur["vs_baseline"] = ratio
+        if ratio > 1.0 + threshold:
+            regressions.append((name, base["p50_us"], cur["p50_us"], ratio))
+    return regressions
+
+def main():
+    parser = argparse.ArgumentParser(description="DriveMind offline benchmarks (synthetic data, no camera)")
+    parser.add_argument("--seconds", type=float, default=60, help="Length of the synthetic drive")
+    parser.add_argument("--fps", type=int, default=30)
+    parser.add_argument("--models", action="store_true", help="Use real dlib/DeepFace models when present")
+    parser.add_argument("--baseline", default=DEFAULT_BASELINE, help="Baseline JSON to compare against")
+    parser.add_argument("--save-baseline", action="store_true", help="Write this run as the new baseline")
+    parser.add_argument("--threshold", type=float, default=0.25, help="Allowed p50 slowdown (0.25 = 25%%)")
+    parser.add_argument("--json", help="Also write this run's results to a JSON file")
+    args = parser.parse_args()
+
+    current = run(seconds=args.seconds, fps=args.fps, use_models=args.models)
+    regressions = []
+    if os.path.exists(args.baseline) and not args.save_baseline:
+        with open(args.baseline, "r") as f:
+            regressions = compare(current, json.load(f), args.threshold)
+
+    print(f"{'benchmark':32s} {'calls/s':>12s} {'p50 us':>10s} {'p95 us':>10s} {'vs base':>8s}")
+    for name, r in current["results"].items():
+        vs = f"{r['vs_baseline']:.2f}x" if "vs_baseline" in r else "-"
+        print(f"{name:32s} {r['per_sec']:12.0f} {r['p50_us']:10.1f} {r['p95_us']:10.1f} {vs:>8s}")
+    for name, note in current["notes"].items():
+        print(f"note: {name}: {note}")
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(current, f, indent=2)
+    if args.save_baseline:
+        with open(args.baseline, "w") as f:
+            json.dump(current, f, indent=2)
+        print(f"Baseline written to {args.baseline}")
+    if regressions:
+        for name, base, cur, ratio in regressions:
+            print(f"REGRESSION {name}: p50 {base:.1f}us -> {cur:.1f}us ({ratio:.2f}x)")
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,77 @@
+import cv2
+import numpy as np
+
+FRAME_SIZE = (480, 640)
+
+def face_landmarks(eye_open=1.0, mouth_open=0.0, center=(320, 240), scale=1.0):
+    """One 68-point shape (dlib ordering) with parametric eyelids and mouth."""
+    cx, cy = center
+    pts = np.zeros((68, 2), dtype=np.float64)
+    # Jaw 0-16: lower half-ellipse
+    t = np.linspace(np.pi, 0, 17)
+    pts[0:17] = np.c_[cx + 70 * np.cos(t), cy + 10 + 90 * np.sin(t) * 0.9]
+    # Brows 17-26
+    pts[17:22] = np.c_[np.linspace(cx - 55, cx - 15, 5), np.full(5, cy - 45)]
+    pts[22:27] = np.c_[np.linspace(cx + 15, cx + 55, 5), np.full(5, cy - 45)]
+    # Nose 27-35
+    pts[27:31] = np.c_[np.full(4, cx), np.linspace(cy - 30, cy + 10, 4)]
+    pts[31:36] = np.c_[np.linspace(cx - 12, cx + 12, 5), np.full(5, cy + 18)]
+    # Eyes 36-47: corners, upper lid, corner, lower lid; lid gap gives EAR ~0.3 when open
+    half_gap = 3.6 * eye_open
+    for base, ex in ((36, cx - 30), (42, cx + 30)):
+        pts[base + 0] = (ex - 12, cy - 20)
+        pts[base + 1] = (ex - 4, cy - 20 - half_gap)
+        pts[base + 2] = (ex + 4, cy - 20 - half_gap)
+        pts[base + 3] = (ex + 12, cy - 20)
+        pts[base + 4] = (ex + 4, cy - 20 + half_gap)
+        pts[base + 5] = (ex - 4, cy - 20 + half_gap)
+    # Mouth 48-67: outer then inner lip ellipses, opening up to ~50 px
+    my = cy + 45
+    mh = 5 + 25 * mouth_open
+    t = np.linspace(np.pi, -np.pi, 12, endpoint=False)
+    pts[48:60] = np.c_[cx + 25 * np.cos(t), my - mh * np.sin(t)]
+    t = np.linspace(np.pi, -np.pi, 8, endpoint=False)
+    pts[60:68] = np.c_[cx + 18 * np.cos(t), my - 0.8 * mh * np.sin(t)]
+    pts = (pts - (cx, cy)) * scale + (cx, cy)
+    return np.round(pts).astype(np.int32)
+
+def landmark_sequence(seconds=120, fps=30, seed=0, blink_every_sec=4.0, yawn_at=(30.0,),
+                      closure_at=(60.0,), closure_sec=2.0):
+    """Frame timestamps and (n, 68, 2) landmarks with blinks, yawns and long closures."""
+    rng = np.random.default_rng(seed)
+    n = int(seconds * fps)
+    ts = np.arange(n) / fps
+    eye = np.ones(n)
+    mouth = np.zeros(n)
+    # Blinks: ~150 ms dips with jittered spacing
+    t = rng.uniform(0.5, blink_every_sec)
+    while t < seconds:
+        i = int(t * fps)
+        eye[i:i + max(1, int(0.15 * fps))] = 0.1
+        t += blink_every_sec * rng.uniform(0.6, 1.4)
+    for start in yawn_at:
+        i = int(start * fps)
+        k = int(3.0 * fps)
+        mouth[i:i + k] = np.sin(np.linspace(0, np.pi, len(mouth[i:i + k])))
+    for start in closure_at:
+        i = int(start * fps)
+        eye[i:i + int(closure_sec * fps)] = 0.05
+    jitter = rng.normal(0, 0.6, size=(n, 2))
+    shapes = np.stack([face_landmarks(eye[i], mouth[i], center=(320 + jitter[i, 0], 240 + jitter[i, 1]))
+                       for i in range(n)])
+    return ts, shapes
+
+def face_rect(shape):
+    x0, y0 = shape.min(axis=0)
+    x1, y1 = shape.max(axis=0)
+    return (int(x0), int(y0), int(x1 - x0), int(y1 - y0))
+
+def synthetic_frame(shape=None, seed=0):
+    """640x480 BGR frame with a drawn face; landmarks drawn if given."""
+    rng = np.random.default_rng(seed)
+    frame = rng.integers(60, 90, size=FRAME_SIZE + (3,), dtype=np.uint8)
+    cv2.ellipse(frame, (320, 250), (80, 105), 0, 0, 360, (140, 160, 190), -1)
+    if shape is not None:
+        for (x, y) in shape:
+            cv2.circle(frame, (int(x), int(y)), 1, (40, 40, 40), -1)
+    return frame
@@ -0,0 +1,55 @@
+import argparse
+import numpy as np
+from batch import expand_sources
+from config import CONFIG
+from core.calibration import calibrate, load_labels, write_report
+from core.profiling import ThresholdManager
+
+def grid(spec):
+    # "start:stop:step" (inclusive stop) or a comma-separated list
+    if ":" in spec:
+        start, stop, step = (float(v) for v in spec.split(":"))
+        return np.round(np.arange(start, stop + step / 2, step), 6)
+    return np.array([float(v) for v in spec.split(",")])
+
+def main():
+    parser = argparse.ArgumentParser(description="Calibrate per-driver alert thresholds from labeled recordings")
+    parser.add_argument("metrics", nargs="+", help="batch.py outputs (.parquet/.feather/.csv) or recordings (.bin)")
+    parser.add_argument("--labels", required=True, help="CSV: driver,source,start,end,label (drowsy|alert)")
+    parser.add_argument("--ear-grid", default="0.15:0.30:0.01")
+    parser.add_argument("--perclos-grid", default="0.10:0.80:0.05")
+    parser.add_argument("--yawn-grid", default="0.3:1.2:0.02")
+    parser.add_argument("--max-alert-rate", type=float, default=None, help="Reject grid points alerting more often")
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--report", help="Write precision/recall/alert rate for every grid point to this CSV")
+    parser.add_argument("--write", action="store_true", help="Store the best thresholds in thresholds.json")
+    args = parser.parse_args()
+
+    results = calibrate(expand_sources(args.metrics), load_labels(args.labels),
+                        grid(args.ear_grid), grid(args.perclos_grid), grid(args.yawn_grid),
+                        workers=args.workers, max_alert_rate=args.max_alert_rate, cfg=CONFIG)
+    if not results:
+        parser.error("no labeled source matched a metrics file")
+
+    for driver, (r, best) in sorted(results.items()):
+        if best is None:
+            print(f"{driver}: no grid point alerts on at most {args.max_alert_rate:.3f} of frames "
+                  f"(lowest is {r['alert_rate'].min():.3f}); not calibrated")
+            continue
+        print(f"{driver}: {r['positives']} drowsy / {r['negatives']} alert frames of {r['frames']} -> "
+              f"EAR<{best['ear_thresh']:.3f} PERCLOS>{best['perclos_thresh']:.2f} Yawn>{best['yawn_thresh']:.2f} "
+              f"P={best['precision']:.3f} R={best['recall']:.3f} F1={best['f1']:.3f} "
+              f"alert rate={best['alert_rate']:.3f}")
+    if args.report:
+        write_report(args.report, results)
+    if args.write:
+        thresholds = ThresholdManager(CONFIG.thresholds_path)
+        for driver, (_, best) in results.items():
+            if best is None:
+                continue
+            thresholds.set_for_driver(driver, {k: best[k] for k in ("ear_thresh", "perclos_thresh", "yawn_thresh")})
+        thresholds.close()
+        print(f"Updated {CONFIG.thresholds_path}")
+
+if __name__ == "__main__":
+    main()
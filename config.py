@@ -4,20 +4,74 @@ from dataclasses import dataclass
 @dataclass
 class AppConfig:
     camera_source: int | str = 0
+    camera_threaded: bool = False
+    camera_buffer_size: int = 2
+    camera_drop_policy: str | None = None  # "drop_oldest" | "block"; None picks by source type
     dlib_landmarks_path: str = os.path.join("assets", "shape_predictor_68_face_landmarks.dat")
+    # Detect-once-then-track: full HOG detection only every N frames or when the track is lost
+    landmark_track: bool = False
+    landmark_redetect_every: int = 10
+    landmark_detect_scale: float = 1.0  # <1.0 runs full detection on a downscaled frame
     drivers_dir: str = os.path.join("assets", "drivers")
+    gallery_index_dir: str = os.path.join("data", "gallery")  # precomputed driver encodings
+    identity_reverify_sec: float = 5.0  # re-run face encoding for a stable track at most this often
     thresholds_path: str = os.path.join("data", "thresholds.json")
+    thresholds_write_behind: bool = True  # batch threshold writes off the detection thread
+    thresholds_flush_interval_sec: float = 5.0
     events_log_path: str = os.path.join("data", "events.log")
     enable_voice: bool = True
+    voice_backend: str = "pyttsx3"  # "pyttsx3" | "file" | "null"
+    voice_log_path: str = os.path.join("data", "voice.log")  # used by the file backend
+    voice_ttl_sec: float = 10.0  # queued advice older than this is dropped
     enable_privacy_blur: bool = False
     privacy_anonymize_logs: bool = True
+    # Event log: batched background writes, rotation, collapsing of repeated alerts
+    events_async: bool = True
+    events_max_bytes: int = 10 * 1024 * 1024
+    events_rotate_sec: int = 24 * 3600
+    events_backup_count: int = 5
+    events_collapse: bool = True
+    events_columnar: str | None = None  # "parquet" | "feather" (needs pandas + pyarrow)
     streamlit_port: int = 8501
     # Baseline thresholds (can be adapted per-driver)
     ear_drowsy_thresh: float = 0.21
     perclos_drowsy_thresh: float = 0.4
-    yawn_thresh: float = 28.0  # lip distance
+    yawn_thresh: float = 0.6  # mouth aspect ratio: lip opening / mouth width
     fatigue_window_sec: int = 60
+    # Emotion inference off the main thread, rate-limited; stale results fall back to neutral
+    emotion_async: bool = False
+    emotion_max_rate_hz: float = 5.0
+    emotion_stale_sec: float = 3.0
     trend_window_minutes: int = 30
     intervention_min_interval_sec: int = 90  # avoid frequent nudges
+    # Pipeline engine: side-stage rates (fatigue always runs on every frame) and queue depth
+    pipeline_identity_hz: float = 1.0
+    pipeline_emotion_hz: float = 5.0
+    pipeline_queue_size: int = 4
+    # Load shedding: past the per-frame budget, slow emotion, then identity, then display, then detection size
+    scheduler_enabled: bool = True
+    scheduler_budget_ms: float = 100.0
+    scheduler_restore_ratio: float = 0.7  # restore a stage only if its cost still fits under this share
+    scheduler_hold_sec: float = 3.0  # minimum time between level changes
+    scheduler_display_every: int = 3  # render every Nth frame when display is shed
+    scheduler_detect_scale: float = 0.5
+    scheduler_count_side_stages: bool = True  # charge emotion/identity work to the frame budget (shared cores)
+    # Fleet runtime (fleet.py): shared identity/emotion workers batch crops from all streams
+    fleet_max_batch: int = 16
+    fleet_batch_wait_ms: float = 5.0
+    fleet_queue_size: int = 8
+    # Shared-memory feed for the dashboard viewer (app.py --publish)
+    feed_name: str = "drivemind"
+    feed_display_fps: float = 10.0
+    feed_jpeg_quality: int = 70
+    feed_slots: int = 4
+    feed_slot_bytes: int = 1 << 20
+    feed_stale_sec: float = 5.0  # a feed not published to for this long is treated as abandoned
+    # Incremental index over events_log_path for the dashboard's history panel
+    analytics_index_path: str = os.path.join("data", "analytics", "events_index.json")
+    # Stage latency histograms and counters; exported as Prometheus text (.prom) or JSON (.json)
+    telemetry_enabled: bool = False
+    telemetry_export_path: str = os.path.join("data", "metrics.prom")
+    telemetry_export_interval_sec: float = 5.0
 
 CONFIG = AppConfig()
\ No newline at end of file
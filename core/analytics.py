@@ -0,0 +1,286 @@
+import csv
+import glob
+import io
+import json
+import os
+import tempfile
+import threading
+
+HOUR = 3600
+DAY = 24 * HOUR
+LEVELS = ("medium", "high")
+HEAD_BYTES = 256  # start of the indexed file, kept to recognize it when its inode is reused
+# Fixed histogram bins per metric: (low, high, bins); values outside are clipped to the edge bins
+METRIC_BINS = {
+    "ear": (0.0, 0.5, 100),
+    "perclos": (0.0, 1.0, 100),
+    "yawn": (0.0, 2.0, 200),
+    "stress": (0.0, 1.0, 100),
+    "duration": (0.0, 120.0, 240),
+}
+
+def _bin(metric, value):
+    lo, hi, n = METRIC_BINS[metric]
+    return int(min(n - 1, max(0, (value - lo) / (hi - lo) * n)))
+
+def _quantile(hist, metric, q):
+    # hist: {bin: count}; linear interpolation inside the bin, like core.telemetry
+    lo, hi, n = METRIC_BINS[metric]
+    total = sum(hist.values())
+    if not total:
+        return None
+    width = (hi - lo) / n
+    rank = q * total
+    seen = 0
+    for b in sorted(hist):
+        c = hist[b]
+        if seen + c >= rank:
+            return lo + width * (b + (rank - seen) / c)
+        seen += c
+    return lo + width * (max(hist) + 1)
+
+class EventIndex:
+    """Incremental, persisted index over the alert events log.
+
+    ``update`` reads only the bytes appended since the saved offset (and,
+    after a rotation, the rest of the file it was reading before, or every
+    backup with a warning when that file was already rotated out). Rows are
+    folded into UTC hourly and daily buckets per driver and alert level,
+    hourly reason counts and hourly metric histograms. Queries are answered
+    from those buckets and never re-read the CSV; their resolution is one
+    hour (a bucket is included when it starts inside ``[start, end)``).
+    Logs with and without the ``duration`` column are both understood.
+    ``update`` and the queries are serialized by a lock, so one index can
+    be shared between a refresher and the dashboard's sessions.
+    """
+
+    def __init__(self, log_path, index_path):
+        self.log_path = log_path
+        self.index_path = index_path
+        self.inode = None
+        self.head = None
+        self.offset = 0
+        self.columns = None
+        self.hourly = {}   # (hour, driver, level) -> [count, duration_sec]
+        self.daily = {}    # (day, driver, level) -> [count, duration_sec]
+        self.reasons = {}  # (hour, driver) -> {reason: count}
+        self.hist = {}     # (hour, driver) -> {metric: {bin: count}}
+        self.rows = 0
+        self._lock = threading.RLock()
+        self._load()
+
+    # Persistence
+    def _load(self):
+        if not os.path.exists(self.index_path):
+            return
+        try:
+            with open(self.index_path, "r") as f:
+                state = json.load(f)
+        except Exception:
+            print("Warning: events index unreadable; rebuilding.")
+            return
+        self.inode = state.get("inode")
+        self.head = state.get("head")
+        self.offset = state.get("offset", 0)
+        self.columns = state.get("columns")
+        self.rows = state.get("rows", 0)
+        self.hourly = {(h, d, l): v for h, d, l, *v in state.get("hourly", [])}
+        self.daily = {(t, d, l): v for t, d, l, *v in state.get("daily", [])}
+        self.reasons = {(h, d): r for h, d, r in state.get("reasons", [])}
+        self.hist = {(h, d): {m: {int(b): c for b, c in bins.items()} for m, bins in hs.items()}
+                     for h, d, hs in state.get("hist", [])}
+
+    def save(self):
+        with self._lock:
+            state = {
+                "log_path": self.log_path, "inode": self.inode, "head": self.head, "offset": self.offset,
+                "columns": self.columns, "rows": self.rows,
+                "hourly": [[h, d, l, *v] for (h, d, l), v in sorted(self.hourly.items())],
+                "daily": [[t, d, l, *v] for (t, d, l), v in sorted(self.daily.items())],
+                "reasons": [[h, d, r] for (h, d), r in sorted(self.reasons.items())],
+                "hist": [[h, d, hs] for (h, d), hs in sorted(self.hist.items())],
+            }
+            dir_name = os.path.dirname(self.index_path) or "."
+            os.makedirs(dir_name, exist_ok=True)
+            fd, tmp = tempfile.mkstemp(prefix=".events_index.", dir=dir_name)
+            with os.fdopen(fd, "w") as f:
+                json.dump(state, f)
+            os.replace(tmp, self.index_path)
+
+    # Tailing
+    def _backups(self):
+        # Rotated files, oldest first (events.log.N ... events.log.1)
+        found = []
+        for p in glob.glob(glob.escape(self.log_path) + ".*"):
+            suffix = p[len(self.log_path) + 1:]
+            if suffix.isdigit():
+                found.append((int(suffix), p))
+        return [p for _, p in sorted(found, reverse=True)]
+
+    def update(self):
+        """Fold newly appended rows into the index; returns the number of rows added."""
+        with self._lock:
+            before = self.rows
+            try:
+                st = os.stat(self.log_path)
+            except OSError:
+                return 0
+            if self.inode is None:
+                # First build: take in the rotated history too
+                for path in self._backups():
+                    self._read(path, 0, columns=None)
+            elif st.st_ino != self.inode or \
+                    (st.st_size >= self.offset and not self._is_indexed_file(self.log_path, st)):
+                # Rotated since the last update: finish the file we were reading, then any
+                # newer backups it was rotated past
+                found = False
+                for path in self._backups():
+                    try:
+                        bst = os.stat(path)
+                    except OSError:
+                        continue
+                    if found:
+                        self._read(path, 0, columns=None)
+                    elif self._is_indexed_file(path, bst):
+                        self._read(path, self.offset, self.columns)
+                        found = True
+                if not found:
+                    # Rotated past backup_count between updates: every backup left is newer
+                    print(f"Warning: {self.log_path} rotated out the file being indexed; "
+                          f"its rows after byte {self.offset} are missing from the index.")
+                    for path in self._backups():
+                        self._read(path, 0, columns=None)
+                self.offset, self.columns, self.head = 0, None, None
+            elif st.st_size < self.offset:
+                self.offset, self.columns, self.head = 0, None, None
+            self.inode = st.st_ino
+            self.offset, self.columns = self._read(self.log_path, self.offset, self.columns)
+            if self.head is None or len(self.head) < min(HEAD_BYTES, self.offset):
+                self.head = self._head(self.log_path, min(HEAD_BYTES, self.offset))
+            added = self.rows - before
+            if added or not os.path.exists(self.index_path):
+                self.save()
+            return added
+
+    @staticmethod
+    def _head(path, n):
+        try:
+            with open(path, "rb") as f:
+                return f.read(n).decode("latin-1")
+        except OSError:
+            return None
+
+    def _is_indexed_file(self, path, st):
+        # Same inode alone is not enough: a file rotated out frees its inode for the next one
+        if st.st_ino != self.inode or st.st_size < self.offset:
+            return False
+        return self.head is None or self._head(path, len(self.head)) == self.head
+
+    def _read(self, path, offset, columns):
+        try:
+            with open(path, "rb") as f:
+                f.seek(offset)
+                data = f.read()
+        except OSError:
+            return offset, columns
+        end = data.rfind(b"\n")
+        if end < 0:
+            return offset, columns
+        # Only whole lines; a partially written row is picked up next time
+        chunk = data[:end + 1]
+        reader = csv.reader(io.StringIO(chunk.decode("utf-8", errors="replace")))
+        for row in reader:
+            if not row:
+                continue
+            if columns is None or row[0] == "ts":
+                columns = row
+                continue
+            self._add(dict(zip(columns, row)))
+        return offset + len(chunk), columns
+
+    def _add(self, rec):
+        try:
+            ts = int(float(rec["ts"]))
+            level = rec["alert_level"]
+            metrics = {m: float(rec[m]) for m in ("ear", "perclos", "yawn", "stress")}
+            duration = float(rec.get("duration") or 0.0)
+        except (KeyError, ValueError):
+            return
+        driver = rec.get("driver") or "unknown"
+        hour, day = ts - ts % HOUR, ts - ts % DAY
+        for table, key in ((self.hourly, (hour, driver, level)), (self.daily, (day, driver, level))):
+            entry = table.setdefault(key, [0, 0.0])
+            entry[0] += 1
+            entry[1] += duration
+        reasons = self.reasons.setdefault((hour, driver), {})
+        for reason in filter(None, (r.strip() for r in rec.get("reason", "").split(","))):
+            reasons[reason] = reasons.get(reason, 0) + 1
+        hs = self.hist.setdefault((hour, driver), {})
+        if "duration" in rec:
+            metrics["duration"] = duration
+        for m, v in metrics.items():
+            bins = hs.setdefault(m, {})
+            b = _bin(m, v)
+            bins[b] = bins.get(b, 0) + 1
+        self.rows += 1
+
+    # Queries
+    def drivers(self):
+        with self._lock:
+            return sorted({d for _, d, _ in self.daily})
+
+    def counts(self, start, end, driver=None, resolution="hour"):
+        """{bucket_start: {level: count, "duration_sec": total}} per hour or day, summed over drivers unless given."""
+        with self._lock:
+            table, step = (self.hourly, HOUR) if resolution == "hour" else (self.daily, DAY)
+            lo = int(start) - int(start) % step
+            out = {}
+            for (b, d, level), (n, dur) in table.items():
+                if lo <= b < end and (driver is None or d == driver):
+                    row = out.setdefault(b, {lv: 0 for lv in LEVELS} | {"duration_sec": 0.0})
+                    row[level] = row.get(level, 0) + n
+                    row["duration_sec"] += dur
+            return dict(sorted(out.items()))
+
+    def totals(self, start, end, driver=None):
+        """Alert counts per level over a range: whole days from the daily index, the edges from hourly buckets."""
+        with self._lock:
+            start, end = int(start) - int(start) % HOUR, int(end)
+            first_day = start + (-start) % DAY
+            last_day = end - end % DAY
+            out = {lv: 0 for lv in LEVELS} | {"duration_sec": 0.0}
+            if first_day < last_day:
+                spans = [(self.daily, first_day, last_day), (self.hourly, start, first_day),
+                         (self.hourly, last_day, end)]
+            else:
+                spans = [(self.hourly, start, end)]
+            for table, lo, hi in spans:
+                for (b, d, level), (n, dur) in table.items():
+                    if lo <= b < hi and (driver is None or d == driver):
+                        out[level] = out.get(level, 0) + n
+                        out["duration_sec"] += dur
+            return out
+
+    def reason_frequencies(self, start, end, driver=None, top=None):
+        with self._lock:
+            lo = int(start) - int(start) % HOUR
+            freq = {}
+            for (h, d), reasons in self.reasons.items():
+                if lo <= h < end and (driver is None or d == driver):
+                    for r, n in reasons.items():
+                        freq[r] = freq.get(r, 0) + n
+            ranked = sorted(freq.items(), key=lambda kv: (-kv[1], kv[0]))
+            return ranked[:top] if top else ranked
+
+    def percentiles(self, start, end, driver=None, qs=(0.5, 0.9, 0.99), metrics=None):
+        """{metric: {q: value}} over alert rows in the range, from the hourly histograms (bin-width accuracy)."""
+        with self._lock:
+            metrics = metrics or list(METRIC_BINS)
+            lo = int(start) - int(start) % HOUR
+            merged = {m: {} for m in metrics}
+            for (h, d), hs in self.hist.items():
+                if lo <= h < end and (driver is None or d == driver):
+                    for m in metrics:
+                        for b, c in hs.get(m, {}).items():
+                            merged[m][b] = merged[m].get(b, 0) + c
+            return {m: {q: _quantile(merged[m], m, q) for q in qs} for m in metrics}
@@ -0,0 +1,173 @@
+import csv
+import os
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+
+DROWSY, ALERT, UNLABELED = 1, 0, -1
+STRESS_ALERT = 0.7  # mirrors the fixed "High stress" rule in WellnessOrchestrator.evaluate
+
+def load_metrics(path, cfg=None):
+    """Per-frame metrics from a batch.py output file or a landmark recording (.bin)."""
+    if path.endswith(".bin"):
+        return _metrics_from_recording(path, cfg)
+    import pandas as pd
+    if path.endswith(".parquet"):
+        df = pd.read_parquet(path)
+    elif path.endswith(".feather"):
+        df = pd.read_feather(path)
+    else:
+        df = pd.read_csv(path)
+    always = df["stress_score"].to_numpy() > STRESS_ALERT
+    if "microsleep" in df:
+        always |= df["microsleep"].astype(bool).to_numpy()
+    return {
+        "ts": df["ts"].to_numpy(dtype=np.float64),
+        "ear": df["ear_avg"].to_numpy(dtype=np.float64),
+        "perclos": df["perclos"].to_numpy(dtype=np.float64),
+        "yawn": df["yawn"].to_numpy(dtype=np.float64),
+        "always": always,
+    }
+
+def _metrics_from_recording(path, cfg):
+    from config import CONFIG
+    from core.fatigue import FatigueAnalyzer
+    from core.recording import replay_metrics
+    cfg = cfg or CONFIG
+    fatigue = FatigueAnalyzer(ear_thresh=cfg.ear_drowsy_thresh, perclos_thresh=cfg.perclos_drowsy_thresh,
+                              yawn_thresh=cfg.yawn_thresh, window_sec=cfg.fatigue_window_sec)
+    cols = {k: [] for k in ("ts", "ear", "perclos", "yawn", "always")}
+    for ts, m, stress in replay_metrics(path, fatigue):
+        cols["ts"].append(ts)
+        cols["ear"].append(m["ear_avg"])
+        cols["perclos"].append(m["perclos"])
+        cols["yawn"].append(m["yawn"])
+        cols["always"].append(stress["stress_score"] > STRESS_ALERT or bool(m.get("microsleep")))
+    return {k: np.asarray(v) for k, v in cols.items()}
+
+def load_labels(path):
+    """CSV with columns driver, source, start, end, label (drowsy|alert); times in the metrics' ts units."""
+    intervals = []
+    with open(path, "r", newline="") as f:
+        for row in csv.DictReader(f):
+            intervals.append({
+                "driver": row["driver"],
+                "source": row["source"],
+                "start": float(row["start"]),
+                "end": float(row["end"]),
+                "label": DROWSY if row["label"].strip().lower() == "drowsy" else ALERT,
+            })
+    return intervals
+
+def label_frames(ts, intervals):
+    labels = np.full(len(ts), UNLABELED, dtype=np.int8)
+    for iv in intervals:
+        lo = np.searchsorted(ts, iv["start"], side="left")
+        hi = np.searchsorted(ts, iv["end"], side="right")
+        labels[lo:hi] = iv["label"]
+    return labels
+
+def _quiet_counts(m, mask, ear_grid, perclos_grid, yawn_grid):
+    """For every grid point, how many masked frames raise no alert.
+
+    A frame is quiet at (E, P, Y) when ear >= E, perclos <= P and yawn <= Y.
+    Frames are binned by grid position once, then a 3-D cumulative sum
+    answers all grid points at the same time: O(frames + grid).
+    """
+    ne, npc, ny = len(ear_grid), len(perclos_grid), len(yawn_grid)
+    sel = mask & ~m["always"]
+    a = np.searchsorted(ear_grid, m["ear"][sel], side="right")          # E[i] <= ear  <=>  i < a
+    b = np.searchsorted(perclos_grid, m["perclos"][sel], side="left")   # P[j] >= perclos <=> j >= b
+    c = np.searchsorted(yawn_grid, m["yawn"][sel], side="left")         # Y[k] >= yawn <=> k >= c
+    hist = np.zeros((ne + 1, npc + 1, ny + 1), dtype=np.int64)
+    np.add.at(hist, (a, b, c), 1)
+    quiet = hist[::-1].cumsum(axis=0)[::-1]  # sum over a' >= a
+    quiet = quiet.cumsum(axis=1).cumsum(axis=2)
+    # quiet[i + 1, j, k] counts a' > i, b' <= j, c' <= k
+    return quiet[1:, :npc, :ny]
+
+def evaluate_grid(m, labels, ear_grid, perclos_grid, yawn_grid):
+    """Precision/recall/F1/alert rate of the evaluate() rules for every threshold combination."""
+    ear_grid = np.sort(np.asarray(ear_grid, dtype=np.float64))
+    perclos_grid = np.sort(np.asarray(perclos_grid, dtype=np.float64))
+    yawn_grid = np.sort(np.asarray(yawn_grid, dtype=np.float64))
+    pos = labels == DROWSY
+    neg = labels == ALERT
+    every = np.ones(len(labels), dtype=bool)
+    n_pos, n_neg, n_all = int(pos.sum()), int(neg.sum()), len(labels)
+    tp = n_pos - _quiet_counts(m, pos, ear_grid, perclos_grid, yawn_grid)
+    fp = n_neg - _quiet_counts(m, neg, ear_grid, perclos_grid, yawn_grid)
+    alerts = n_all - _quiet_counts(m, every, ear_grid, perclos_grid, yawn_grid)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        precision = np.where(tp + fp > 0, tp / (tp + fp), 0.0)
+        recall = tp / n_pos if n_pos else np.zeros_like(tp, dtype=np.float64)
+        f1 = np.where(precision + recall > 0, 2 * precision * recall / (precision + recall), 0.0)
+    return {
+        "ear_grid": ear_grid, "perclos_grid": perclos_grid, "yawn_grid": yawn_grid,
+        "precision": precision, "recall": recall, "f1": f1,
+        "alert_rate": alerts / max(1, n_all),
+        "positives": n_pos, "negatives": n_neg, "frames": n_all,
+    }
+
+def best_thresholds(result, max_alert_rate=None):
+    """Highest-F1 grid point within ``max_alert_rate``; None when no grid point satisfies it."""
+    score = result["f1"].copy()
+    if max_alert_rate is not None:
+        feasible = result["alert_rate"] <= max_alert_rate
+        if not feasible.any():
+            return None
+        score[~feasible] = -1.0
+    i, j, k = np.unravel_index(int(np.argmax(score)), score.shape)
+    return {
+        "ear_thresh": float(result["ear_grid"][i]),
+        "perclos_thresh": float(result["perclos_grid"][j]),
+        "yawn_thresh": float(result["yawn_grid"][k]),
+        "precision": float(result["precision"][i, j, k]),
+        "recall": float(result["recall"][i, j, k]),
+        "f1": float(result["f1"][i, j, k]),
+        "alert_rate": float(result["alert_rate"][i, j, k]),
+    }
+
+def calibrate_driver(job):
+    """One driver: concatenate its sources, label frames, evaluate the whole grid."""
+    parts, label_parts = [], []
+    for path, intervals in job["sources"]:
+        m = load_metrics(path, job.get("cfg"))
+        parts.append(m)
+        label_parts.append(label_frames(m["ts"], intervals))
+    m = {k: np.concatenate([p[k] for p in parts]) for k in parts[0]}
+    labels = np.concatenate(label_parts)
+    result = evaluate_grid(m, labels, job["ear_grid"], job["perclos_grid"], job["yawn_grid"])
+    best = best_thresholds(result, job.get("max_alert_rate"))
+    return job["driver"], result, best
+
+def calibrate(metrics_paths, intervals, ear_grid, perclos_grid, yawn_grid, workers=None,
+              max_alert_rate=None, cfg=None):
+    """Group metrics files by labeled driver (file stem == label source) and calibrate drivers in parallel."""
+    by_stem = {os.path.splitext(os.path.basename(p))[0]: p for p in metrics_paths}
+    jobs = {}
+    for iv in intervals:
+        path = by_stem.get(iv["source"])
+        if path is None:
+            continue
+        job = jobs.setdefault(iv["driver"], {
+            "driver": iv["driver"], "sources": {}, "ear_grid": ear_grid, "perclos_grid": perclos_grid,
+            "yawn_grid": yawn_grid, "max_alert_rate": max_alert_rate, "cfg": cfg,
+        })
+        job["sources"].setdefault(path, []).append(iv)
+    for job in jobs.values():
+        job["sources"] = sorted(job["sources"].items())
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        return {driver: (result, best) for driver, result, best in pool.map(calibrate_driver, jobs.values())}
+
+def write_report(path, results):
+    with open(path, "w", newline="") as f:
+        writer = csv.writer(f)
+        writer.writerow(["driver", "ear_thresh", "perclos_thresh", "yawn_thresh",
+                         "precision", "recall", "f1", "alert_rate"])
+        for driver, (r, _) in sorted(results.items()):
+            for i, e in enumerate(r["ear_grid"]):
+                for j, p in enumerate(r["perclos_grid"]):
+                    for k, y in enumerate(r["yawn_grid"]):
+                        writer.writerow([driver, f"{e:.4f}", f"{p:.4f}", f"{y:.2f}",
+                                         f"{r['precision'][i, j, k]:.4f}", f"{r['recall'][i, j, k]:.4f}",
+                                         f"{r['f1'][i, j, k]:.4f}", f"{r['alert_rate'][i, j, k]:.4f}"])
@@ -1,7 +1,11 @@
+import threading
+import time
+from collections import deque
 import cv2
+from core.telemetry import TELEMETRY
 
 class VideoSource:
-    def __init__(self, source=0):
+    def __init__(self, source=0, threaded=False, buffer_size=2, drop_policy=None):
         self.cap = cv2.VideoCapture(source)
         if not self.cap.isOpened():
             raise RuntimeError(f"Failed to open video source: {source}")
@@ -9,13 +13,98 @@ class VideoSource:
         self.cap.set(cv2.CAP_PROP_FRAME_WIDTH, 640)
         self.cap.set(cv2.CAP_PROP_FRAME_HEIGHT, 480)
 
-    def frames(self):
+        # Live cameras should never lag behind; files must not lose frames
+        if drop_policy is None:
+            drop_policy = "drop_oldest" if isinstance(source, int) else "block"
+        if drop_policy not in ("drop_oldest", "block"):
+            raise ValueError(f"Unknown drop policy: {drop_policy}")
+        self.threaded = threaded
+        self.drop_policy = drop_policy
+        self.buffer_size = max(1, int(buffer_size))
+        self.stats = {"captured": 0, "delivered": 0, "dropped": 0}
+        self.last_ts = None
+
+        self._buf = deque()
+        self._cond = threading.Condition()
+        self._eof = False
+        self._stop = False
+        self._thread = None
+
+    def start(self):
+        if not self.threaded or self._thread is not None:
+            return
+        self._thread = threading.Thread(target=self._grab_loop, name="VideoSource", daemon=True)
+        self._thread.start()
+
+    def _grab_loop(self):
+        while not self._stop:
+            with TELEMETRY.timer("camera.read"):
+                ok, frame = self.cap.read()
+            ts = time.time()
+            with self._cond:
+                if not ok:
+                    self._eof = True
+                    self._cond.notify_all()
+                    return
+                self.stats["captured"] += 1
+                if self.drop_policy == "block":
+                    while len(self._buf) >= self.buffer_size and not self._stop:
+                        self._cond.wait(0.1)
+                elif len(self._buf) >= self.buffer_size:
+                    self._buf.popleft()
+                    self.stats["dropped"] += 1
+                self._buf.append((ts, frame))
+                self._cond.notify_all()
+
+    def timed_frames(self):
+        """Yield (capture_ts, frame); in threaded mode, always the newest buffered frame."""
+        if not self.threaded:
+            while True:
+                with TELEMETRY.timer("camera.read"):
+                    ok, frame = self.cap.read()
+                if not ok:
+                    break
+                ts = time.time()
+                self.stats["captured"] += 1
+                self.stats["delivered"] += 1
+                self.last_ts = ts
+                yield ts, frame
+            return
+
+        self.start()
         while True:
-            ok, frame = self.cap.read()
-            if not ok:
-                break
+            with self._cond:
+                while not self._buf and not self._eof and not self._stop:
+                    self._cond.wait(0.1)
+                if not self._buf:
+                    break
+                if self.drop_policy == "drop_oldest":
+                    # Skip straight to the latest frame; anything older is stale
+                    while len(self._buf) > 1:
+                        self._buf.popleft()
+                        self.stats["dropped"] += 1
+                ts, frame = self._buf.popleft()
+                self.stats["delivered"] += 1
+                self._cond.notify_all()
+            self.last_ts = ts
+            yield ts, frame
+
+    def frames(self):
+        for _, frame in self.timed_frames():
             yield frame
 
+    def latency(self):
+        # Seconds between capture of the last delivered frame and now
+        if self.last_ts is None:
+            return 0.0
+        return time.time() - self.last_ts
+
     def release(self):
+        self._stop = True
+        if self._thread is not None:
+            with self._cond:
+                self._cond.notify_all()
+            self._thread.join(timeout=1.0)
+            self._thread = None
         if self.cap:
-            self.cap.release()
\ No newline at end of file
+            self.cap.release()
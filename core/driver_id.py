@@ -1,46 +1,162 @@
 import os
+import time
 import numpy as np
+from core.gallery import DriverGallery
+from core.telemetry import instrumented
+from core.warmup import STARTUP, ModelStage
 
-class DriverIdentifier:
-    def __init__(self, drivers_dir: str):
+def box_jumped(prev_box, box_cv, thresh):
+    # Box center moved by more than a fraction of the face size
+    x, y, w, h = box_cv
+    px, py, pw, ph = prev_box
+    shift = np.hypot((x + w / 2) - (px + pw / 2), (y + h / 2) - (py + ph / 2))
+    return shift > thresh * max(pw, ph, 1)
+
+class DriverIdentifier(ModelStage):
+    component = "identity"
+
+    def __init__(self, drivers_dir: str, reverify_sec=5.0, jump_thresh=0.5, index_dir=None, tolerance=0.5,
+                 lazy=False):
+        # lazy=True: face_recognition and the gallery load in warm_up(); identity is None until ready
+        self._init_loading()
         self.drivers_dir = drivers_dir
+        self.tolerance = tolerance
+        # Sticky identity per face track; re-verified on interval, box jump, or face loss
+        self.reverify_sec = reverify_sec
+        self.jump_thresh = jump_thresh
+        self._cached_name = None
+        self._cached_box = None
+        self._verified_ts = None
+        self.last_distance = None
+        self.index_dir = index_dir or os.path.join(drivers_dir, ".index")
+        self.gallery = DriverGallery(self.index_dir)
+        self.fr = None
+        self.available = False
+        if not lazy:
+            self.load()
+
+    def _load(self):
+        with STARTUP.timer(self.component, "import"):
+            try:
+                import face_recognition
+                self.fr = face_recognition
+            except Exception:
+                print("Info: face_recognition not available; identity will be Unknown.")
+                return
+        self.available = True
+        with STARTUP.timer(self.component, "load"):
+            try:
+                self.gallery.sync(self.drivers_dir, self._encode_file)
+            except Exception as e:
+                print(f"Warning: driver gallery sync failed: {e}")
+            if self.gallery.dirty:
+                # Also persists mtime/size refreshes, so touched images are not re-hashed next start
+                try:
+                    self.gallery.save()
+                except OSError as e:
+                    print(f"Warning: could not save driver gallery index: {e}")
+        with STARTUP.timer(self.component, "first_inference"):
+            try:
+                self.fr.face_encodings(np.zeros((150, 150, 3), dtype=np.uint8), [(20, 130, 130, 20)])
+            except Exception:
+                pass
+
+    def _encode_file(self, img_path):
+        img = self.fr.load_image_file(img_path)
+        encs = self.fr.face_encodings(img)
+        return encs[0] if encs else None
+
+    def enroll(self, name, image_path):
+        enc = self._encode_file(image_path) if self.available else None
+        if enc is None:
+            return False
+        self.gallery.enroll(name, enc, source=None)
+        self.gallery.save()
+        return True
+
+    def remove(self, name):
+        removed = self.gallery.remove(name=name)
+        if removed:
+            self.gallery.save()
+        return removed
+
+    def encode_batch(self, items):
+        """Encodings for [(rgb_image, (x, y, w, h))], one dlib call for the whole batch when supported."""
+        if not self.available or not items:
+            return [None] * len(items)
         try:
-            import face_recognition
-            self.fr = face_recognition
-            self.available = True
-            self.known_encodings, self.known_names = self._load_known(drivers_dir)
-        except Exception:
-            self.fr = None
-            self.available = False
-            self.known_encodings, self.known_names = [], []
-            print("Info: face_recognition not available; identity will be Unknown.")
-
-    def _load_known(self, dir_path):
-        import face_recognition
-        encodings = []
-        names = []
-        for fn in os.listdir(dir_path):
-            if fn.lower().endswith((".jpg", ".png", ".jpeg")):
-                img_path = os.path.join(dir_path, fn)
-                img = face_recognition.load_image_file(img_path)
-                encs = face_recognition.face_encodings(img)
-                if encs:
-                    encodings.append(encs[0])
-                    names.append(os.path.splitext(fn)[0])
-        return encodings, names
-
-    def identify(self, frame, face_rects):
-     if not self.available or not face_rects or not self.known_encodings:
+            import dlib
+            from face_recognition import api
+            faces = []
+            for rgb, (x, y, w, h) in items:
+                dets = dlib.full_object_detections()
+                dets.append(api.pose_predictor_5_point(rgb, dlib.rectangle(x, y, x + w, y + h)))
+                faces.append(dets)
+            # Same landmarks, jitter and padding as face_recognition.face_encodings
+            descs = api.face_encoder.compute_face_descriptor([rgb for rgb, _ in items], faces, 1)
+            return [np.array(d[0]) for d in descs]
+        except (AttributeError, TypeError, RuntimeError):
+            # Older dlib without batched descriptors
+            encs = []
+            for rgb, (x, y, w, h) in items:
+                e = self.fr.face_encodings(rgb, [(y, x + w, y + h, x)])
+                encs.append(e[0] if e else None)
+            return encs
+
+    def identify_batch(self, items):
+        """(name | None, distance) per item; no sticky cache, callers decide when to verify."""
+        if not self.ready or not len(self.gallery):
+            return [(None, None)] * len(items)
+        encs = self.encode_batch(items)
+        found = [i for i, e in enumerate(encs) if e is not None]
+        out = [(None, None)] * len(items)
+        for i, match in zip(found, self.gallery.match_many([encs[i] for i in found], self.tolerance)):
+            out[i] = match
+        return out
+
+    @instrumented("driver_id.identify")
+    def identify(self, frame, face_rects, ctx=None):
+     if not self.ready:
+        return None
+     if not self.available or not face_rects or not len(self.gallery):
+        # Face lost: next sighting must be verified again
+        self.invalidate()
         return None
-     x, y, w, h = face_rects[0]
-     rgb = frame[:, :, ::-1]
+     box_cv = face_rects[0]
+     if self._verified_ts is not None and not self._needs_verify(box_cv):
+        self._cached_box = box_cv
+        return self._cached_name
+     name = self._verify(frame, box_cv, ctx)
+     self._cached_name = name
+     self._cached_box = box_cv
+     self._verified_ts = time.time()
+     return name
+
+    def _verify(self, frame, box_cv, ctx=None):
+     x, y, w, h = box_cv
+     # dlib needs a contiguous RGB image; the shared context converts once per frame
+     rgb = ctx.rgb if ctx is not None else np.ascontiguousarray(frame[:, :, ::-1])
      # Correct conversion from (x,y,w,h) to (top,right,bottom,left)
      box = (y, x + w, y + h, x)
      encs = self.fr.face_encodings(rgb, [box])
      if not encs:
         return None
-     matches = self.fr.compare_faces(self.known_encodings, encs[0], tolerance=0.5)
-     if True in matches:
-        idx = matches.index(True)
-        return self.known_names[idx]
-     return None
+     name, self.last_distance = self.gallery.match(encs[0], tolerance=self.tolerance)
+     return name
+
+    def _needs_verify(self, box_cv):
+     if time.time() - self._verified_ts >= self.reverify_sec:
+        return True
+     if self._cached_box is None:
+        return True
+     return box_jumped(self._cached_box, box_cv, self.jump_thresh)
+
+    def invalidate(self):
+     self._cached_name = None
+     self._cached_box = None
+     self._verified_ts = None
+
+    def seconds_since_verify(self):
+     if self._verified_ts is None:
+        return None
+     return time.time() - self._verified_ts
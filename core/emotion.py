@@ -1,31 +1,157 @@
+import inspect
+import threading
+import time
 import numpy as np
+from core.telemetry import instrumented
+from core.warmup import STARTUP, ModelStage
 
-class EmotionAnalyzer:
-    def __init__(self):
-        try:
-            from deepface import DeepFace
-            self.deepface = DeepFace
-            self.available = True
-        except Exception:
-            self.deepface = None
-            self.available = False
-            print("Info: DeepFace not available; using neutral fallback.")
+# Simple mapping to a stress score
+STRESS_MAP = {
+    "angry": 0.8, "fear": 0.8, "sad": 0.6, "disgust": 0.7,
+    "surprise": 0.5, "happy": 0.2, "neutral": 0.3
+}
+
+class EmotionAnalyzer(ModelStage):
+    component = "emotion"
+
+    def __init__(self, async_mode=False, max_rate_hz=5.0, stale_sec=3.0, lazy=False):
+        # lazy=True: nothing is imported here; call warm_up() and use the neutral fallback until ready
+        self._init_loading()
+        self.deepface = None
+        self.available = False
+        self.async_mode = async_mode
+        self.min_interval = 1.0 / max_rate_hz if max_rate_hz > 0 else 0.0
+        self.stale_sec = stale_sec
+        self._model_built = False
+
+        # Async state: a single pending slot (newer crops overwrite older ones)
+        self._cond = threading.Condition()
+        self._pending = None
+        self._latest = None
+        self._latest_ts = None
+        self._last_submit = 0.0
+        self._stop = False
+        self._worker = None
+        if not lazy:
+            self.load()
 
-    def estimate(self, frame, face_rects):
-        result = {"dominant_emotion": "neutral", "stress_score": 0.2}
+    def _load(self):
+        with STARTUP.timer(self.component, "import"):
+            try:
+                from deepface import DeepFace
+                self.deepface = DeepFace
+            except Exception:
+                print("Info: DeepFace not available; using neutral fallback.")
+                return
+        with STARTUP.timer(self.component, "load"):
+            self._ensure_model()
+        with STARTUP.timer(self.component, "first_inference"):
+            try:
+                self.deepface.analyze(np.zeros((64, 64, 3), dtype=np.uint8), actions=["emotion"],
+                                      enforce_detection=False)
+            except Exception:
+                pass
+        self.available = True
+
+    @staticmethod
+    def _default():
+        return {"dominant_emotion": "neutral", "stress_score": 0.2}
+
+    @instrumented("emotion.estimate")
+    def estimate(self, frame, face_rects, ctx=None):
+        result = self._default()
         if not self.available or not face_rects:
             return result
-        x, y, w, h = face_rects[0]
-        crop = frame[max(0,y):y+h, max(0,x):x+w]
+        if ctx is not None:
+            crop = ctx.face_crop(face_rects[0])
+        else:
+            x, y, w, h = face_rects[0]
+            crop = frame[max(0,y):y+h, max(0,x):x+w]
+        if self.async_mode:
+            return self._estimate_async(crop)
+        return self._analyze(crop)
+
+    def _ensure_model(self):
+        # Build the emotion model once; DeepFace keeps built models in its own cache, which analyze reuses
+        if self._model_built:
+            return
+        self._model_built = True
+        build = self.deepface.build_model
+        try:
+            params = inspect.signature(build).parameters
+        except (TypeError, ValueError):
+            params = {}
+        # Newer DeepFace needs the task and rejects the single-argument call (with ValueError)
+        calls = [lambda: build(model_name="Emotion", task="facial_attribute"), lambda: build("Emotion")]
+        if "task" not in params:
+            calls.reverse()
+        for call in calls:
+            try:
+                call()
+                return
+            except (TypeError, ValueError):
+                continue
+            except Exception:
+                return
+
+    def analyze_batch(self, crops):
+        """Results for several face crops (``None`` or empty crops get the default).
+
+        One ``analyze`` call per crop, the same as ``estimate``, so fleet and
+        single-stream runs label identical crops identically. DeepFace offers
+        no batched analyze, so callers gain only the shared, already-built model.
+        """
+        return [self._analyze(c) if self.available and c is not None and c.size else self._default()
+                for c in crops]
+
+    def _analyze(self, crop):
+        self._ensure_model()
         try:
             analysis = self.deepface.analyze(crop, actions=["emotion"], enforce_detection=False)
             emo = analysis[0]["dominant_emotion"] if isinstance(analysis, list) else analysis["dominant_emotion"]
-            # Simple mapping to a stress score
-            stress_map = {
-                "angry": 0.8, "fear": 0.8, "sad": 0.6, "disgust": 0.7,
-                "surprise": 0.5, "happy": 0.2, "neutral": 0.3
-            }
-            score = stress_map.get(emo, 0.3)
+            score = STRESS_MAP.get(emo, 0.3)
             return {"dominant_emotion": emo, "stress_score": float(np.clip(score, 0.0, 1.0))}
         except Exception:
-            return result
\ No newline at end of file
+            return self._default()
+
+    def _estimate_async(self, crop):
+        now = time.time()
+        with self._cond:
+            if self._worker is None:
+                self._worker = threading.Thread(target=self._run, name="EmotionAnalyzer", daemon=True)
+                self._worker.start()
+            if now - self._last_submit >= self.min_interval:
+                # Coalesce: only the newest crop waits; copy since the frame buffer is reused
+                self._pending = crop.copy()
+                self._last_submit = now
+                self._cond.notify()
+            latest, latest_ts = self._latest, self._latest_ts
+
+        if latest is None or now - latest_ts > self.stale_sec:
+            result = self._default()
+            result["age_sec"] = None if latest_ts is None else now - latest_ts
+            return result
+        result = dict(latest)
+        result["age_sec"] = now - latest_ts
+        return result
+
+    def _run(self):
+        while True:
+            with self._cond:
+                while self._pending is None and not self._stop:
+                    self._cond.wait()
+                if self._stop:
+                    return
+                crop, self._pending = self._pending, None
+            result = self._analyze(crop)
+            with self._cond:
+                self._latest = result
+                self._latest_ts = time.time()
+
+    def close(self):
+        with self._cond:
+            self._stop = True
+            self._cond.notify_all()
+        if self._worker is not None:
+            self._worker.join(timeout=1.0)
+            self._worker = None
@@ -0,0 +1,200 @@
+import csv
+import os
+import queue
+import threading
+import time
+
+CSV_HEADER = ["ts", "driver", "alert_level", "reason", "ear", "perclos", "yawn", "stress", "duration", "stream"]
+
+class EventSink:
+    """Alert event log writer.
+
+    Events are queued by ``emit`` and written in batches by a background
+    thread (or inline when ``async_mode`` is off). Consecutive identical
+    alerts collapse into one row whose ``duration`` covers the burst.
+    Bursts are tracked per ``stream`` (camera/cabin), so interleaved
+    streams never merge or split each other's rows, and each closes once
+    its stream's clock, advanced by ``tick`` on every frame, passes the
+    gap without a repeat. The CSV file rotates by size and age; an optional
+    Parquet/Feather copy is written next to it via pandas.
+    """
+
+    def __init__(self, path, async_mode=True, queue_size=1000, flush_interval_sec=1.0,
+                 max_bytes=10 * 1024 * 1024, rotate_interval_sec=24 * 3600, backup_count=5,
+                 collapse=True, collapse_gap_sec=2.0, columnar=None, columnar_batch_rows=10000):
+        self.path = path
+        self.async_mode = async_mode
+        self.flush_interval_sec = flush_interval_sec
+        self.max_bytes = max_bytes
+        self.rotate_interval_sec = rotate_interval_sec
+        self.backup_count = backup_count
+        self.collapse = collapse
+        self.collapse_gap_sec = collapse_gap_sec
+        self.columnar = columnar
+        self.columnar_batch_rows = columnar_batch_rows
+        self.dropped = 0
+
+        if columnar and columnar not in ("parquet", "feather"):
+            raise ValueError(f"Unknown columnar format: {columnar}")
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        self._columns = self._ensure_header()
+        self._opened_ts = time.time()
+        self._pending = {}  # stream -> collapsed event still accumulating
+        self._clocks = {}   # stream -> latest time passed to tick
+        self._columnar_rows = []
+        self._lock = threading.Lock()
+        self._queue = queue.Queue(maxsize=queue_size)
+        self._stop = threading.Event()
+        self._writer = None
+        if self.async_mode:
+            self._writer = threading.Thread(target=self._run, name="EventSink", daemon=True)
+            self._writer.start()
+
+    def _ensure_header(self):
+        # Indexes of CSV_HEADER to write: logs created by older versions lack duration and/or stream
+        if not os.path.exists(self.path) or os.path.getsize(self.path) == 0:
+            with open(self.path, "w", newline="") as f:
+                csv.writer(f).writerow(CSV_HEADER)
+            return list(range(len(CSV_HEADER)))
+        with open(self.path, "r", newline="") as f:
+            header = next(csv.reader(f), [])
+        return [i for i, col in enumerate(CSV_HEADER) if col in header]
+
+    def emit(self, ts, driver, alert_level, reason, ear, perclos, yawn, stress, stream=None):
+        event = (ts, driver, alert_level, reason, ear, perclos, yawn, stress, stream)
+        if not self.async_mode:
+            with self._lock:
+                self._write(self._collapse([event], self._clocks))
+            return
+        try:
+            self._queue.put_nowait(event)
+        except queue.Full:
+            self.dropped += 1
+
+    def tick(self, now=None, stream=None):
+        """Advance ``stream``'s clock to ``now`` (default: wall time); call once per frame.
+
+        Sources processed faster or slower than real time pass their own
+        frame times, so bursts collapse the same way at any speed. In sync
+        mode a burst whose gap has passed is written right here rather than
+        at the next event; in async mode the writer thread picks it up.
+        """
+        self._clocks[stream] = time.time() if now is None else now
+        if self.async_mode or stream not in self._pending:
+            return
+        with self._lock:
+            self._write(self._collapse([], self._clocks))
+
+    def _run(self):
+        while not self._stop.is_set():
+            # Clocks first: every event emitted up to these times is already queued
+            clocks = dict(self._clocks)
+            batch = []
+            try:
+                batch.append(self._queue.get(timeout=self.flush_interval_sec))
+                while True:
+                    batch.append(self._queue.get_nowait())
+            except queue.Empty:
+                pass
+            with self._lock:
+                self._write(self._collapse(batch, clocks))
+
+    def _collapse(self, events, clocks):
+        rows = []
+        for ev in events:
+            key = (ev[1], ev[2], ev[3])
+            stream = ev[8]
+            p = self._pending.get(stream)
+            if self.collapse and p is not None and p["key"] == key and ev[0] - p["last"] <= self.collapse_gap_sec:
+                p["last"] = ev[0]
+                continue
+            if p is not None:
+                rows.append(self._finish(p))
+            self._pending[stream] = {"key": key, "event": ev, "last": ev[0]}
+        # A burst ends once its stream's clock passes the gap without a repeat
+        for stream, p in list(self._pending.items()):
+            now = clocks.get(stream)
+            if not self.collapse or (now is not None and now - p["last"] > self.collapse_gap_sec):
+                rows.append(self._finish(p))
+                del self._pending[stream]
+        return rows
+
+    @staticmethod
+    def _finish(p):
+        ts, driver, alert_level, reason, ear, perclos, yawn, stress, stream = p["event"]
+        return [int(ts), driver, alert_level, reason, f"{ear:.3f}", f"{perclos:.3f}", f"{yawn:.3f}",
+                f"{stress:.2f}", f"{p['last'] - ts:.1f}", "" if stream is None else stream]
+
+    def _write(self, rows):
+        if not rows:
+            return
+        self._maybe_rotate()
+        try:
+            with open(self.path, "a", newline="") as f:
+                writer = csv.writer(f)
+                for row in rows:
+                    writer.writerow([row[i] for i in self._columns])
+        except Exception:
+            pass
+        if self.columnar:
+            self._columnar_rows.extend(rows)
+            if len(self._columnar_rows) >= self.columnar_batch_rows:
+                self._write_columnar()
+
+    def _maybe_rotate(self):
+        try:
+            too_big = os.path.getsize(self.path) >= self.max_bytes
+        except OSError:
+            too_big = False
+        too_old = time.time() - self._opened_ts >= self.rotate_interval_sec
+        if not (too_big or too_old):
+            return
+        self._write_columnar()
+        for i in range(self.backup_count - 1, 0, -1):
+            src = f"{self.path}.{i}"
+            if os.path.exists(src):
+                os.replace(src, f"{self.path}.{i + 1}")
+        if self.backup_count > 0 and os.path.exists(self.path):
+            os.replace(self.path, f"{self.path}.1")
+        elif os.path.exists(self.path):
+            os.remove(self.path)
+        self._columns = self._ensure_header()
+        self._opened_ts = time.time()
+
+    def _write_columnar(self):
+        if not self._columnar_rows:
+            return
+        try:
+            import pandas as pd
+            df = pd.DataFrame(self._columnar_rows, columns=CSV_HEADER)
+            for col in ("ear", "perclos", "yawn", "stress", "duration"):
+                df[col] = df[col].astype("float32")
+            df["ts"] = df["ts"].astype("int64")
+            df["stream"] = df["stream"].astype(str)
+            stem = os.path.splitext(self.path)[0]
+            out = f"{stem}-{int(df['ts'].iloc[0])}.{self.columnar}"
+            if self.columnar == "parquet":
+                df.to_parquet(out, index=False)
+            else:
+                df.to_feather(out)
+        except Exception as e:
+            print(f"Warning: columnar event output failed: {e}")
+        self._columnar_rows = []
+
+    def close(self):
+        self._stop.set()
+        if self._writer is not None:
+            self._writer.join(timeout=self.flush_interval_sec + 1.0)
+            self._writer = None
+        batch = []
+        while True:
+            try:
+                batch.append(self._queue.get_nowait())
+            except queue.Empty:
+                break
+        with self._lock:
+            rows = self._collapse(batch, self._clocks)
+            rows.extend(self._finish(p) for p in self._pending.values())
+            self._pending = {}
+            self._write(rows)
+            self._write_columnar()
@@ -1,55 +1,148 @@
+import time
+from collections import deque
 import numpy as np
-from scipy.spatial import distance as dist
+from core.geometry import ear_batch, face_geometry, mouth_opening_batch, pitch_degrees
+from core.telemetry import instrumented
+
+EAR_SCALE = 1_000_000
 
 def eye_aspect_ratio(eye_pts):
     # eye_pts: 6 points
-    A = dist.euclidean(eye_pts[1], eye_pts[5])
-    B = dist.euclidean(eye_pts[2], eye_pts[4])
-    C = dist.euclidean(eye_pts[0], eye_pts[3])
-    ear = (A + B) / (2.0 * C)
-    return ear
+    return float(ear_batch(np.asarray(eye_pts)))
 
 def mouth_opening(mouth_pts):
     # 20 points (outer+inner); use top-bottom distance
-    top = np.mean(mouth_pts[2:4], axis=0)  # approximate
-    bottom = np.mean(mouth_pts[8:10], axis=0)
-    return dist.euclidean(top, bottom)
+    return float(mouth_opening_batch(np.asarray(mouth_pts)))
 
 class FatigueAnalyzer:
-    def __init__(self, ear_thresh=0.21, perclos_thresh=0.4, yawn_thresh=28.0, window_sec=60, fps=30):
+    def __init__(self, ear_thresh=0.21, perclos_thresh=0.4, yawn_thresh=0.6, window_sec=60, max_fps=60,
+                 blink_max_sec=0.5, microsleep_sec=1.0):
         self.ear_thresh = ear_thresh
         self.perclos_thresh = perclos_thresh
         self.yawn_thresh = yawn_thresh
-        self.window_len = max(1, int(window_sec * fps))
-        self.ear_hist = []
+        self.window_sec = window_sec
+        self.blink_max_sec = blink_max_sec
+        self.microsleep_sec = microsleep_sec
+
+        # Ring buffer over frame timestamps, sized for max_fps; grows if frames arrive faster
+        self.capacity = max(1, int(window_sec * max_fps))
+        self._ts = np.zeros(self.capacity, dtype=np.float64)
+        # EAR kept in fixed-point micro-units so running sums are exact and history-independent
+        self._ear = np.zeros(self.capacity, dtype=np.int64)
+        self._closed = np.zeros(self.capacity, dtype=np.bool_)
+        # Nose offset, same fixed point: its window mean is this driver's level head position for pitch
+        self._nose = np.zeros(self.capacity, dtype=np.int64)
+        self._head = 0  # index of oldest sample
+        self._size = 0
+        self._ear_sum = 0
+        self._closed_count = 0
+        self._nose_sum = 0
+
         self.blink_count = 0
+        self.microsleep_count = 0
+        self._blink_ts = deque()
+        self._closed_since = None
+        self._start_ts = None
 
-    def update(self, frame, face_rects, landmarks):
-        metrics = {"ear_avg": 0.0, "perclos": 0.0, "yawn": 0.0}
-        if not landmarks:
-            return metrics
+    def _push(self, ts, ear, closed, nose):
+        if self._size == self.capacity:
+            # Everything left is inside the window (evicted first): grow rather than shrink the window
+            self._grow(2 * self.capacity)
+        idx = (self._head + self._size) % self.capacity
+        self._ts[idx] = ts
+        q = int(round(ear * EAR_SCALE))
+        self._ear[idx] = q
+        self._closed[idx] = closed
+        n = int(round(nose * EAR_SCALE))
+        self._nose[idx] = n
+        self._nose_sum += n
+        self._size += 1
+        self._ear_sum += q
+        self._closed_count += int(closed)
+
+    def _grow(self, capacity):
+        order = (self._head + np.arange(self._size)) % self.capacity
+        for name in ("_ts", "_ear", "_closed", "_nose"):
+            old = getattr(self, name)
+            new = np.zeros(capacity, dtype=old.dtype)
+            new[:self._size] = old[order]
+            setattr(self, name, new)
+        self._head = 0
+        self.capacity = capacity
 
-        # Using first face
-        shape = landmarks[0]
-        # indices per 68-point model
-        left_eye = shape[42:48]
-        right_eye = shape[36:42]
-        mouth = shape[48:68]
+    def _pop(self):
+        h = self._head
+        self._ear_sum -= int(self._ear[h])
+        self._closed_count -= int(self._closed[h])
+        self._nose_sum -= int(self._nose[h])
+        self._head = (h + 1) % self.capacity
+        self._size -= 1
+
+    def _evict(self, now):
+        cutoff = now - self.window_sec
+        while self._size and self._ts[self._head] < cutoff:
+            self._pop()
+        while self._blink_ts and self._blink_ts[0] < cutoff:
+            self._blink_ts.popleft()
+
+    def _track_closure(self, ts, closed):
+        # Closure episodes: short ones are blinks, long ones are microsleeps
+        if closed:
+            if self._closed_since is None:
+                self._closed_since = ts
+            return ts - self._closed_since
+        if self._closed_since is not None:
+            duration = ts - self._closed_since
+            self._closed_since = None
+            if duration <= self.blink_max_sec:
+                self.blink_count += 1
+                self._blink_ts.append(ts)
+            elif duration >= self.microsleep_sec:
+                self.microsleep_count += 1
+        return 0.0
+
+    @instrumented("fatigue.update")
+    def update(self, frame, face_rects, landmarks, ts=None):
+        if not landmarks:
+            return {"ear_avg": 0.0, "perclos": 0.0, "yawn": 0.0}
+        # Driver face comes first (LandmarkDetector orders faces with select_driver)
+        g = face_geometry(landmarks[0])
+        return self.update_measures(ts, g["ear"][0], g["mar"][0], g["nose_offset"][0])
 
-        ear_l = eye_aspect_ratio(left_eye)
-        ear_r = eye_aspect_ratio(right_eye)
-        ear = (ear_l + ear_r) / 2.0
+    def update_measures(self, ts, ear, yawn, nose_offset=None):
+        """Advance the window with one frame's precomputed geometry (see core.geometry.face_geometry).
 
-        self.ear_hist.append(ear)
-        if len(self.ear_hist) > self.window_len:
-            self.ear_hist = self.ear_hist[-self.window_len:]
+        ``yawn`` is the scale-normalized mouth aspect ratio (``mar``).
+        ``pitch`` is ``nose_offset`` against its mean over the window, so it
+        needs no per-camera constant: nods show, while a posture held longer
+        than ``window_sec`` becomes the new level (0.0 when not passed). A
+        non-finite value (degenerate landmarks) is not a measurement: the
+        window is left as is and the no-face metrics are returned.
+        """
+        values = (ear, yawn) if nose_offset is None else (ear, yawn, nose_offset)
+        if not np.isfinite(values).all():
+            return {"ear_avg": 0.0, "perclos": 0.0, "yawn": 0.0}
+        ts = time.time() if ts is None else ts
+        if self._start_ts is None:
+            self._start_ts = ts
+        ear = float(ear)
+        closed = ear < self.ear_thresh
 
-        closed = [1 if e < self.ear_thresh else 0 for e in self.ear_hist]
-        perclos = sum(closed) / max(1, len(closed))
+        self._evict(ts)
+        self._push(ts, ear, closed, 0.0 if nose_offset is None else float(nose_offset))
+        closed_for = self._track_closure(ts, closed)
 
-        yawn = mouth_opening(mouth)
+        pitch = 0.0
+        if nose_offset is not None:
+            pitch = float(pitch_degrees(nose_offset, self._nose_sum / self._size / EAR_SCALE))
 
-        metrics["ear_avg"] = float(np.mean(self.ear_hist)) if self.ear_hist else 0.0
-        metrics["perclos"] = float(perclos)
-        metrics["yawn"] = float(yawn)
-        return metrics
\ No newline at end of file
+        span = min(self.window_sec, max(ts - self._start_ts, 1.0))
+        return {
+            "ear_avg": self._ear_sum / self._size / EAR_SCALE,
+            "perclos": self._closed_count / self._size,
+            "yawn": float(yawn),
+            "pitch": pitch,  # degrees, positive = nodding down
+            "blink_rate": len(self._blink_ts) * 60.0 / span,  # blinks per minute
+            "eyes_closed_sec": float(closed_for),
+            "microsleep": closed_for >= self.microsleep_sec,
+        }
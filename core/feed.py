@@ -0,0 +1,198 @@
+import json
+import struct
+import time
+import cv2
+import numpy as np
+from multiprocessing import shared_memory
+
+MAGIC = b"DMFEED01"
+HEADER = struct.Struct("<8sIIIIQd")  # magic, version, slots, slot size, closed, latest seq, last publish (wall clock)
+SLOT = struct.Struct("<QdII")  # seq, ts, jpeg length, meta length; the seq is repeated in the slot's last 8 bytes
+SEQ = struct.Struct("<Q")
+TRAILER = SEQ
+VERSION = 1
+
+def _json_default(o):
+    if isinstance(o, np.generic):
+        return o.item()
+    if isinstance(o, np.ndarray):
+        return o.tolist()
+    return str(o)
+
+class FeedPublisher:
+    """Latest annotated frame plus metrics/status in a shared-memory ring.
+
+    Frames are JPEG-encoded at most ``display_fps`` times per second.
+    Each slot carries its sequence number before and after the payload;
+    the leading one is zeroed while the slot is rewritten and set last,
+    so a reader that sees it unchanged after copying knows the copy is
+    whole, without any locking on the writer side.
+
+    A segment of the same name left by a crashed runtime is replaced, but
+    one that is still open and published to within ``stale_sec`` belongs
+    to a live runtime and raises RuntimeError instead.
+    """
+
+    def __init__(self, name="drivemind", display_fps=10.0, jpeg_quality=70, slots=4, slot_bytes=1 << 20,
+                 stale_sec=5.0):
+        self.name = name
+        self.period = 1.0 / display_fps if display_fps > 0 else 0.0
+        self.jpeg_quality = int(jpeg_quality)
+        self.slots = max(2, int(slots))
+        self.slot_bytes = int(slot_bytes)
+        size = HEADER.size + self.slots * self.slot_bytes
+        try:
+            self.shm = shared_memory.SharedMemory(name=name, create=True, size=size)
+        except FileExistsError:
+            # Left behind by a runtime that did not shut down cleanly, unless it is still publishing
+            stale = shared_memory.SharedMemory(name=name)
+            live = False
+            if stale.size >= HEADER.size:
+                magic, _, _, _, closed, _, last = HEADER.unpack_from(stale.buf, 0)
+                live = magic == MAGIC and not closed and time.time() - last < stale_sec
+            stale.close()
+            if live:
+                raise RuntimeError(f"Feed '{name}' is in use by a running publisher")
+            stale.unlink()
+            self.shm = shared_memory.SharedMemory(name=name, create=True, size=size)
+        self.seq = 0
+        self._last = 0.0
+        self.skipped = 0
+        HEADER.pack_into(self.shm.buf, 0, MAGIC, VERSION, self.slots, self.slot_bytes, 0, 0, time.time())
+
+    def due(self, now=None):
+        now = time.time() if now is None else now
+        return now - self._last >= self.period
+
+    def publish(self, frame, meta, ts=None, force=False):
+        """Encode and publish ``frame`` with a JSON-able ``meta`` dict; returns False when rate-limited."""
+        now = time.time()
+        if not force and not self.due(now):
+            return False
+        self._last = now
+        ts = now if ts is None else ts
+        ok, jpeg = cv2.imencode(".jpg", frame, [cv2.IMWRITE_JPEG_QUALITY, self.jpeg_quality])
+        if not ok:
+            return False
+        body = json.dumps(meta, default=_json_default).encode("utf-8")
+        if SLOT.size + len(jpeg) + len(body) + TRAILER.size > self.slot_bytes:
+            self.skipped += 1
+            return False
+        self.seq += 1
+        base = HEADER.size + (self.seq % self.slots) * self.slot_bytes
+        buf = self.shm.buf
+        # Seqlock: seq 0 marks the slot as being written; the real seq goes in last
+        SLOT.pack_into(buf, base, 0, ts, len(jpeg), len(body))
+        start = base + SLOT.size
+        buf[start:start + len(jpeg)] = jpeg.tobytes()
+        buf[start + len(jpeg):start + len(jpeg) + len(body)] = body
+        TRAILER.pack_into(buf, base + self.slot_bytes - TRAILER.size, self.seq)
+        SEQ.pack_into(buf, base, self.seq)
+        HEADER.pack_into(buf, 0, MAGIC, VERSION, self.slots, self.slot_bytes, 0, self.seq, now)
+        return True
+
+    def close(self):
+        # Tell attached viewers the feed is gone before the segment disappears
+        HEADER.pack_into(self.shm.buf, 0, MAGIC, VERSION, self.slots, self.slot_bytes, 1, self.seq, time.time())
+        self.shm.close()
+        try:
+            self.shm.unlink()
+        except FileNotFoundError:
+            pass
+
+class FeedReader:
+    """Read-only view of a FeedPublisher segment; never blocks or writes.
+
+    Re-attaches by name when the publisher closes the feed or stops
+    publishing for ``stale_sec``, so a restarted runtime's new segment is
+    picked up instead of showing the old one's last frame forever.
+    """
+
+    def __init__(self, name="drivemind", stale_sec=5.0):
+        self.name = name
+        self.stale_sec = stale_sec
+        self.shm = None
+        self._seen_seq = None
+        self._seen_ts = None
+
+    def _attach(self):
+        try:
+            try:
+                shm = shared_memory.SharedMemory(name=self.name, track=False)
+            except TypeError:
+                # Before Python 3.13 attaching registers the segment for cleanup at exit; undo that
+                shm = shared_memory.SharedMemory(name=self.name)
+                from multiprocessing import resource_tracker
+                resource_tracker.unregister(shm._name, "shared_memory")
+        except FileNotFoundError:
+            return False
+        if bytes(shm.buf[:8]) != MAGIC:
+            shm.close()
+            return False
+        self.shm = shm
+        self._seen_seq, self._seen_ts = None, time.monotonic()
+        return True
+
+    @property
+    def connected(self):
+        return self.shm is not None or self._attach()
+
+    def latest(self):
+        """(seq, ts, jpeg_bytes, meta) of the newest whole slot, or None when there is nothing to show."""
+        if not self.connected:
+            return None
+        buf = self.shm.buf
+        magic, version, slots, slot_bytes, closed, seq, _ = HEADER.unpack_from(buf, 0)
+        if closed or version != VERSION:
+            self.detach()
+            return None
+        now = time.monotonic()
+        if seq != self._seen_seq:
+            self._seen_seq, self._seen_ts = seq, now
+        elif now - self._seen_ts > self.stale_sec:
+            # Publisher gone or replaced by a new segment under the same name; attach afresh
+            self.detach()
+            if not self._attach():
+                return None
+            return self.latest()
+        for cand in range(seq, max(0, seq - slots), -1):
+            base = HEADER.size + (cand % slots) * slot_bytes
+            s1, ts, n_jpeg, n_meta = SLOT.unpack_from(buf, base)
+            if s1 != cand:
+                continue
+            start = base + SLOT.size
+            jpeg = bytes(buf[start:start + n_jpeg])
+            meta = bytes(buf[start + n_jpeg:start + n_jpeg + n_meta])
+            (s2,) = TRAILER.unpack_from(buf, base + slot_bytes - TRAILER.size)
+            (s3,) = SEQ.unpack_from(buf, base)
+            if s2 != cand or s3 != cand:
+                continue  # overwritten while copying; try the previous slot
+            try:
+                return cand, ts, jpeg, json.loads(meta)
+            except ValueError:
+                continue
+        return None
+
+    def detach(self):
+        if self.shm is not None:
+            self.shm.close()
+            self.shm = None
+
+def frame_meta(res, trends=None, history_sec=300, telemetry=None):
+    """Viewer payload for one pipeline result; pass ``trends``/``telemetry`` only when the history is due."""
+    meta = {
+        "ts": res["ts"],
+        "identity": res["identity"],
+        "metrics": res["metrics"],
+        "stress": res["stress"],
+        "status": res["status"],
+        "summary": res["summary"],
+        "latency_ms": 1000 * (res.get("decided_ts", res["ts"]) - res["ts"]),
+    }
+    if trends is not None:
+        ser = trends.series(res["identity"], start=res["ts"] - history_sec, resolution="1s")
+        meta["series"] = {k: ser[k] for k in ("ts", "ear_mean", "perclos_mean") if k in ser}
+    if telemetry is not None:
+        meta["telemetry"] = {name: {k: round(s[k], 1) for k in ("p50_ms", "p95_ms", "p99_ms")}
+                             for name, s in sorted(telemetry["latency"].items())}
+    return meta
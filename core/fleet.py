@@ -0,0 +1,394 @@
+import multiprocessing as mp
+import os
+import queue
+import threading
+import time
+from concurrent.futures import Future
+import cv2
+import numpy as np
+from core.driver_id import box_jumped
+from core.telemetry import TELEMETRY
+
+# Models loaded in the parent before stream workers fork; children inherit them copy-on-write
+_SHARED = {}
+
+def _load_landmarks(cfg):
+    from core.landmarks import LandmarkDetector
+    return LandmarkDetector(cfg.dlib_landmarks_path, track=cfg.landmark_track,
+                            redetect_every=cfg.landmark_redetect_every,
+                            detect_scale=cfg.landmark_detect_scale)
+
+class _BatchWorker:
+    """Shared model stage: requests from every stream are answered together by one ``fn`` call.
+
+    The first request opens a batch; whatever else arrives within
+    ``max_wait_sec`` (up to ``max_batch``) rides along. ``fn`` maps a list
+    of items to a list of results.
+    """
+
+    def __init__(self, name, fn, max_batch=16, max_wait_sec=0.005):
+        self.name = name
+        self.fn = fn
+        self.max_batch = max(1, int(max_batch))
+        self.max_wait_sec = max_wait_sec
+        self.batches = 0
+        self.items = 0
+        self._q = queue.Queue()
+        self._thread = threading.Thread(target=self._run, name=f"Fleet-{name}", daemon=True)
+        self._thread.start()
+
+    def submit(self, item):
+        fut = Future()
+        self._q.put((item, fut))
+        return fut
+
+    def _run(self):
+        while True:
+            first = self._q.get()
+            if first is None:
+                return
+            batch = [first]
+            deadline = time.perf_counter() + self.max_wait_sec
+            while len(batch) < self.max_batch:
+                remaining = deadline - time.perf_counter()
+                if remaining <= 0:
+                    break
+                try:
+                    nxt = self._q.get(timeout=remaining)
+                except queue.Empty:
+                    break
+                if nxt is None:
+                    self._q.put(None)
+                    break
+                batch.append(nxt)
+            t0 = time.perf_counter()
+            try:
+                results = self.fn([item for item, _ in batch])
+            except Exception as e:
+                for _, fut in batch:
+                    fut.set_exception(e)
+                continue
+            TELEMETRY.observe(f"fleet.{self.name}", time.perf_counter() - t0)
+            self.batches += 1
+            self.items += len(batch)
+            for (_, fut), res in zip(batch, results):
+                fut.set_result(res)
+
+    def stop(self):
+        self._q.put(None)
+        self._thread.join(timeout=2.0)
+
+def _identity_item(rgb, box, margin=0.5):
+    # Face crop with room for alignment, plus the box in crop coordinates
+    x, y, w, h = box
+    H, W = rgb.shape[:2]
+    x0, y0 = max(0, int(x - margin * w)), max(0, int(y - margin * h))
+    x1, y1 = min(W, int(x + w + margin * w)), min(H, int(y + h + margin * h))
+    return np.ascontiguousarray(rgb[y0:y1, x0:x1]), (x - x0, y - y0, w, h)
+
+def _stream_export_path(path, index):
+    # Each stream process exports its own stage latencies next to the parent's file
+    root, ext = os.path.splitext(path)
+    return f"{root}.stream{index}{ext}"
+
+def _put(q, item, stop):
+    while not stop.is_set():
+        try:
+            q.put(item, timeout=0.1)
+            return True
+        except queue.Full:
+            continue
+    return False
+
+def _stream_worker(index, source, cfg, out_q, stop):
+    """One process per stream: capture -> detect -> fatigue, with side-stage crops cut when due.
+
+    Side stages are scheduled on stream time, and file sources are timed by
+    frame index, so a stream's output does not depend on what else runs.
+    """
+    from core.camera import VideoSource
+    from core.fatigue import FatigueAnalyzer
+    from core.frame import FrameContext
+    # The parent configures telemetry only after forking, so this process starts its own exporter
+    export_path = _stream_export_path(cfg.telemetry_export_path, index) if cfg.telemetry_enabled else None
+    TELEMETRY.configure(cfg.telemetry_enabled, export_path, cfg.telemetry_export_interval_sec)
+    try:
+        lmk = _SHARED.get("lmk") or _load_landmarks(cfg)
+        lmk.reset()
+        fatigue = FatigueAnalyzer(
+            ear_thresh=cfg.ear_drowsy_thresh,
+            perclos_thresh=cfg.perclos_drowsy_thresh,
+            yawn_thresh=cfg.yawn_thresh,
+            window_sec=cfg.fatigue_window_sec
+        )
+        cam = VideoSource(source, threaded=cfg.camera_threaded,
+                          buffer_size=cfg.camera_buffer_size, drop_policy=cfg.camera_drop_policy)
+    except Exception as e:
+        _put(out_q, {"stream": index, "error": repr(e)}, stop)
+        TELEMETRY.close(export_path)
+        return
+    live = isinstance(source, int)
+    fps = cam.cap.get(cv2.CAP_PROP_FPS) or 30.0
+    emotion_period = 1.0 / cfg.pipeline_emotion_hz if cfg.pipeline_emotion_hz > 0 else 0.0
+    last_emotion = None
+    verified_ts, verified_box = None, None
+    ctx = FrameContext()
+    try:
+        for seq, (wall_ts, frame) in enumerate(cam.timed_frames()):
+            if stop.is_set():
+                break
+            ts = wall_ts if live else seq / fps
+            ctx.reset(frame, ts)
+            face_rects, landmarks = lmk.detect(frame, ctx)
+            metrics = fatigue.update(frame, face_rects, landmarks, ts=ts)
+            rec = {"stream": index, "seq": seq, "ts": ts, "wall_ts": wall_ts, "face_rects": face_rects,
+                   "landmarks": [np.asarray(l, dtype=np.int16) for l in landmarks], "metrics": metrics,
+                   "id_item": None, "emotion_crop": None}
+            if face_rects:
+                box = face_rects[0]
+                # Same sticky rule as DriverIdentifier: new face, interval or box jump
+                if verified_ts is None or ts - verified_ts >= cfg.identity_reverify_sec or \
+                        box_jumped(verified_box, box, 0.5):
+                    rec["id_item"] = _identity_item(ctx.rgb, box)
+                    verified_ts, verified_box = ts, box
+                if last_emotion is None or ts - last_emotion >= emotion_period:
+                    rec["emotion_crop"] = ctx.face_crop(box).copy()
+                    last_emotion = ts
+            else:
+                verified_ts, verified_box = None, None
+            if not _put(out_q, rec, stop):
+                break
+    except Exception as e:
+        _put(out_q, {"stream": index, "error": repr(e)}, stop)
+    finally:
+        cam.release()
+        TELEMETRY.close(export_path)
+        _put(out_q, {"stream": index, "end": True}, stop)
+
+class _Stream:
+    """Parent-side state of one cabin: held identity/stress, trends, orchestrator and intervention cooldown."""
+
+    def __init__(self, index, source, cfg, default_stress, orchestrator):
+        from core.trend import TrendBuffer
+        self.index = index
+        self.source = source
+        self.orchestrator = orchestrator
+        self.clock_offset = None  # added to stream time for the event log
+        self.trends = TrendBuffer(window_minutes=cfg.trend_window_minutes)
+        self.default_stress = default_stress
+        self.identity = None
+        self.stress = default_stress
+        self.last_intervention_ts = None
+        self.frames = 0
+        self.alerts = 0
+        self.error = None
+        self.done = False
+        self.pending = None
+        self.process = None
+
+class FleetRuntime:
+    """Several camera streams on one box, sharing every loaded model.
+
+    Each stream gets a process for capture, landmark detection and fatigue
+    (dlib holds the GIL, so streams scale across cores); the dlib models are
+    loaded once before the processes fork. Identity and emotion are shared
+    workers in this process that collect face crops from all streams;
+    identity encodes each collection in one dlib call, emotion analyzes
+    the crops one by one on its single loaded model. Per-stream state (fatigue window, trends, held identity
+    and stress, orchestrator, intervention cooldown) is never shared, and
+    each stream is decided in frame order, so its results match a
+    single-stream run. The event log and voice queue are shared, with rows
+    tagged and advice deduplicated per stream. ``results()`` yields one
+    dict per decided frame, tagged with ``stream``.
+    """
+
+    def __init__(self, sources, cfg, max_batch=16, batch_wait_ms=5.0, queue_size=8):
+        self.sources = list(sources)
+        self.cfg = cfg
+        self.max_batch = max_batch
+        self.batch_wait_sec = batch_wait_ms / 1000.0
+        self.queue_size = queue_size
+        self.streams = []
+        self._stop = threading.Event()
+        self._out_q = queue.Queue(maxsize=queue_size * max(1, len(self.sources)))
+        self._threads = []
+        self._started = False
+
+    def start(self):
+        if self._started:
+            return
+        self._started = True
+        cfg = self.cfg
+        methods = mp.get_all_start_methods()
+        ctx = mp.get_context("fork" if "fork" in methods else "spawn")
+        if ctx.get_start_method() == "fork":
+            _SHARED["lmk"] = _load_landmarks(cfg)
+        self._mp_stop = ctx.Event()
+
+        # Fork before anything starts threads (telemetry exporter included) or loads TensorFlow
+        procs = []
+        for i, source in enumerate(self.sources):
+            q = ctx.Queue(maxsize=self.queue_size)
+            p = ctx.Process(target=_stream_worker, args=(i, source, cfg, q, self._mp_stop),
+                            name=f"Fleet-stream-{i}", daemon=True)
+            p.start()
+            procs.append((p, q))
+
+        from core.driver_id import DriverIdentifier
+        from core.emotion import EmotionAnalyzer
+        from core.profiling import ThresholdManager
+        from core.wellness import WellnessOrchestrator, make_event_sink, make_voice_queue
+        TELEMETRY.configure(cfg.telemetry_enabled, cfg.telemetry_export_path, cfg.telemetry_export_interval_sec)
+        self.emotion = EmotionAnalyzer()
+        self.driver_id = DriverIdentifier(cfg.drivers_dir, reverify_sec=cfg.identity_reverify_sec,
+                                          index_dir=cfg.gallery_index_dir)
+        self.thresholds = ThresholdManager(cfg.thresholds_path, write_behind=cfg.thresholds_write_behind,
+                                           flush_interval_sec=cfg.thresholds_flush_interval_sec)
+        self.events = make_event_sink(cfg)
+        self.voice = make_voice_queue(cfg)
+        self.identity_worker = _BatchWorker("identity", self.driver_id.identify_batch,
+                                            self.max_batch, self.batch_wait_sec)
+        self.emotion_worker = _BatchWorker("emotion", self.emotion.analyze_batch,
+                                           self.max_batch, self.batch_wait_sec)
+
+        for i, (p, q) in enumerate(procs):
+            orchestrator = WellnessOrchestrator(cfg, self.thresholds, stream=i, events=self.events, voice=self.voice)
+            stream = _Stream(i, self.sources[i], cfg, self.emotion._default(), orchestrator)
+            stream.process = p
+            stream.pending = queue.Queue(maxsize=self.queue_size)
+            self.streams.append(stream)
+            self._threads.append(threading.Thread(target=self._intake_loop, args=(stream, q),
+                                                  name=f"Fleet-intake-{i}", daemon=True))
+            self._threads.append(threading.Thread(target=self._decide_loop, args=(stream,),
+                                                  name=f"Fleet-decide-{i}", daemon=True))
+        for t in self._threads:
+            t.start()
+
+    def _intake_loop(self, stream, q):
+        # Submit crops as soon as they arrive so they batch with other streams' crops
+        while not self._stop.is_set():
+            try:
+                rec = q.get(timeout=0.1)
+            except queue.Empty:
+                if not stream.process.is_alive() and q.empty():
+                    rec = {"stream": stream.index, "end": True}
+                else:
+                    continue
+            if "error" in rec:
+                stream.error = rec["error"]
+                continue
+            if rec.get("end"):
+                _put(stream.pending, None, self._stop)
+                return
+            id_item, crop = rec.pop("id_item"), rec.pop("emotion_crop")
+            rec["id_future"] = self.identity_worker.submit(id_item) if id_item is not None else None
+            rec["emotion_future"] = self.emotion_worker.submit(crop) if crop is not None else None
+            if not _put(stream.pending, rec, self._stop):
+                return
+
+    @staticmethod
+    def _result(fut, default):
+        try:
+            return fut.result()
+        except Exception:
+            return default
+
+    def _decide_loop(self, stream):
+        cfg = self.cfg
+        while True:
+            try:
+                rec = stream.pending.get(timeout=0.1)
+            except queue.Empty:
+                if self._stop.is_set():
+                    return
+                continue
+            if rec is None:
+                stream.done = True
+                _put(self._out_q, {"stream": stream.index, "end": True}, self._stop)
+                return
+            ts = rec["ts"]
+            if stream.clock_offset is None:
+                # File sources run on frame time; anchor it at the first frame's wall clock for the log
+                stream.clock_offset = 0.0 if isinstance(stream.source, int) else rec["wall_ts"] - ts
+            if rec["face_rects"]:
+                if rec["id_future"] is not None:
+                    stream.identity = self._result(rec["id_future"], (None, None))[0]
+                if rec["emotion_future"] is not None:
+                    stream.stress = self._result(rec["emotion_future"], stream.default_stress)
+            else:
+                stream.identity, stream.stress = None, stream.default_stress
+            identity, stress, metrics = stream.identity, stream.stress, rec["metrics"]
+            per_driver = self.thresholds.get_for_driver(identity)
+            stream.trends.update(identity, metrics, stress, ts=ts)
+            status = stream.orchestrator.evaluate(identity, metrics, stress, per_driver, ts=stream.clock_offset + ts)
+
+            if status.get("needs_intervention"):
+                stream.alerts += 1
+                # Cooldown on stream time, per cabin
+                if stream.last_intervention_ts is None or \
+                        ts - stream.last_intervention_ts > cfg.intervention_min_interval_sec:
+                    stream.orchestrator.nudge(identity, status, metrics, stress)
+                    stream.last_intervention_ts = ts
+            stream.frames += 1
+            TELEMETRY.observe("fleet.capture_to_decision", time.time() - rec["wall_ts"])
+            res = {
+                "stream": stream.index,
+                "seq": rec["seq"],
+                "ts": ts,
+                "face_rects": rec["face_rects"],
+                "landmarks": rec["landmarks"],
+                "metrics": metrics,
+                "identity": identity,
+                "stress": stress,
+                "status": status,
+                "summary": stream.trends.summary(identity),
+            }
+            if not _put(self._out_q, res, self._stop):
+                return
+
+    def results(self):
+        self.start()
+        remaining = len(self.streams)
+        while remaining:
+            try:
+                item = self._out_q.get(timeout=0.1)
+            except queue.Empty:
+                if self._stop.is_set():
+                    return
+                continue
+            if item.get("end"):
+                remaining -= 1
+                continue
+            yield item
+
+    def stats(self):
+        return {
+            "streams": [{"stream": s.index, "source": s.source, "frames": s.frames, "alerts": s.alerts,
+                         "error": s.error} for s in self.streams],
+            "identity_batches": self.identity_worker.batches if self._started else 0,
+            "identity_items": self.identity_worker.items if self._started else 0,
+            "emotion_batches": self.emotion_worker.batches if self._started else 0,
+            "emotion_items": self.emotion_worker.items if self._started else 0,
+        }
+
+    def stop(self):
+        if not self._started:
+            return
+        self._mp_stop.set()
+        self._stop.set()
+        for t in self._threads:
+            t.join(timeout=2.0)
+        for s in self.streams:
+            s.process.join(timeout=2.0)
+            if s.process.is_alive():
+                s.process.terminate()
+        self.identity_worker.stop()
+        self.emotion_worker.stop()
+        self.emotion.close()
+        self.thresholds.close()
+        for s in self.streams:
+            s.orchestrator.close()
+        if self.voice:
+            self.voice.close()
+        self.events.close()
+        TELEMETRY.close(self.cfg.telemetry_export_path)
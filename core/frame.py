@@ -0,0 +1,80 @@
+import cv2
+import numpy as np
+
+class FrameContext:
+    """Per-frame views shared by every stage, each computed at most once.
+
+    One context is created per stream and ``reset`` with each new frame;
+    the gray/RGB/downscaled buffers are reused across frames of the same
+    size instead of being reallocated.
+    """
+
+    def __init__(self):
+        self.frame = None
+        self.ts = None
+        self.shared = False
+        self._bufs = {}
+        self._valid = set()
+        self._crops = {}
+
+    def reset(self, frame, ts=None, shared=False):
+        # shared=True: the caller still needs the frame untouched, so drawing goes to a copy
+        self.frame = frame
+        self.ts = ts
+        self.shared = shared
+        self._valid.clear()
+        self._crops.clear()
+        return self
+
+    def _buf(self, name, shape, dtype=np.uint8):
+        buf = self._bufs.get(name)
+        if buf is None or buf.shape != shape or buf.dtype != dtype:
+            buf = np.empty(shape, dtype=dtype)
+            self._bufs[name] = buf
+        return buf
+
+    @property
+    def gray(self):
+        if "gray" not in self._valid:
+            dst = self._buf("gray", self.frame.shape[:2])
+            cv2.cvtColor(self.frame, cv2.COLOR_BGR2GRAY, dst=dst)
+            self._valid.add("gray")
+        return self._bufs["gray"]
+
+    @property
+    def rgb(self):
+        # Contiguous, so dlib/face_recognition do not copy it again
+        if "rgb" not in self._valid:
+            dst = self._buf("rgb", self.frame.shape)
+            cv2.cvtColor(self.frame, cv2.COLOR_BGR2RGB, dst=dst)
+            self._valid.add("rgb")
+        return self._bufs["rgb"]
+
+    def small_gray(self, scale):
+        key = f"small_gray@{scale}"
+        if key not in self._valid:
+            h, w = self.frame.shape[:2]
+            size = (max(1, int(w * scale)), max(1, int(h * scale)))
+            dst = self._buf(key, (size[1], size[0]))
+            cv2.resize(self.gray, size, dst=dst, interpolation=cv2.INTER_AREA)
+            self._valid.add(key)
+        return self._bufs[key]
+
+    def face_crop(self, rect):
+        rect = tuple(rect)
+        crop = self._crops.get(rect)
+        if crop is None:
+            x, y, w, h = rect
+            crop = self.frame[max(0, y):y + h, max(0, x):x + w]
+            self._crops[rect] = crop
+        return crop
+
+    def display(self):
+        """Writable frame for drawing; copies only when the frame is shared."""
+        if not self.shared:
+            return self.frame
+        if "display" not in self._valid:
+            dst = self._buf("display", self.frame.shape)
+            np.copyto(dst, self.frame)
+            self._valid.add("display")
+        return self._bufs["display"]
@@ -0,0 +1,141 @@
+import hashlib
+import json
+import os
+import numpy as np
+
+IMAGE_EXTS = (".jpg", ".png", ".jpeg")
+
+class DriverGallery:
+    """Persisted face-encoding index: one float32 matrix plus a JSON manifest.
+
+    Row i of ``encodings.npy`` belongs to ``entries[i]`` in ``manifest.json``;
+    entries remember the source image's mtime/size/sha1 so a sync only
+    re-encodes images that actually changed. ``dirty`` is set by anything
+    that changes the index (including mtime/size refreshes) until ``save``.
+    """
+
+    def __init__(self, index_dir: str, dim=128):
+        self.index_dir = index_dir
+        self.dim = dim
+        self.matrix_path = os.path.join(index_dir, "encodings.npy")
+        self.manifest_path = os.path.join(index_dir, "manifest.json")
+        self.encodings = np.zeros((0, dim), dtype=np.float32)
+        self.entries = []
+        self.dirty = False
+        self._load()
+
+    def __len__(self):
+        return len(self.entries)
+
+    @property
+    def names(self):
+        return [e["name"] for e in self.entries]
+
+    def _load(self):
+        if not (os.path.exists(self.matrix_path) and os.path.exists(self.manifest_path)):
+            return
+        try:
+            with open(self.manifest_path, "r") as f:
+                manifest = json.load(f)
+            # Memory-mapped: large galleries are paged in on demand
+            encodings = np.load(self.matrix_path, mmap_mode="r")
+            entries = manifest.get("entries", [])
+            if encodings.shape != (len(entries), self.dim):
+                raise ValueError("gallery index does not match manifest")
+            self.encodings, self.entries = encodings, entries
+        except Exception:
+            print("Warning: driver gallery index unreadable; rebuilding.")
+            self.encodings = np.zeros((0, self.dim), dtype=np.float32)
+            self.entries = []
+
+    def save(self):
+        os.makedirs(self.index_dir, exist_ok=True)
+        tmp_matrix = self.matrix_path + ".tmp.npy"
+        tmp_manifest = self.manifest_path + ".tmp"
+        np.save(tmp_matrix, np.ascontiguousarray(self.encodings, dtype=np.float32))
+        with open(tmp_manifest, "w") as f:
+            json.dump({"version": 1, "dim": self.dim, "entries": self.entries}, f)
+        os.replace(tmp_matrix, self.matrix_path)
+        os.replace(tmp_manifest, self.manifest_path)
+        self.dirty = False
+
+    def enroll(self, name, encoding, source=None, stat=None):
+        enc = np.asarray(encoding, dtype=np.float32).reshape(1, self.dim)
+        entry = {"name": name, "source": source}
+        if stat:
+            entry.update(stat)
+        self.encodings = np.concatenate([np.asarray(self.encodings), enc], axis=0)
+        self.entries.append(entry)
+        self.dirty = True
+
+    def remove(self, name=None, source=None):
+        keep = [i for i, e in enumerate(self.entries)
+                if not ((name is not None and e["name"] == name) or
+                        (source is not None and e.get("source") == source))]
+        removed = len(self.entries) - len(keep)
+        if removed:
+            self.encodings = np.asarray(self.encodings)[keep]
+            self.entries = [self.entries[i] for i in keep]
+            self.dirty = True
+        return removed
+
+    def sync(self, drivers_dir, encode_fn):
+        """Bring the index in line with ``drivers_dir``; returns (added, removed).
+
+        Touched-but-unchanged images only refresh their mtime/size, which
+        adds nothing but still marks the index ``dirty`` so it gets saved.
+        """
+        if not os.path.isdir(drivers_dir):
+            return 0, 0
+        on_disk = {fn for fn in os.listdir(drivers_dir) if fn.lower().endswith(IMAGE_EXTS)}
+        by_source = {e.get("source"): e for e in self.entries if e.get("source")}
+        removed = 0
+        for src in set(by_source) - on_disk:
+            removed += self.remove(source=src)
+
+        added = 0
+        for fn in sorted(on_disk):
+            path = os.path.join(drivers_dir, fn)
+            st = os.stat(path)
+            entry = by_source.get(fn)
+            if entry and entry.get("mtime") == st.st_mtime and entry.get("size") == st.st_size:
+                continue
+            digest = _sha1(path)
+            if entry and entry.get("sha1") == digest:
+                # Touched but unchanged; no need to re-encode
+                entry.update({"mtime": st.st_mtime, "size": st.st_size})
+                self.dirty = True
+                continue
+            if entry:
+                removed += self.remove(source=fn)
+            enc = encode_fn(path)
+            if enc is None:
+                continue
+            self.enroll(os.path.splitext(fn)[0], enc, source=fn,
+                        stat={"mtime": st.st_mtime, "size": st.st_size, "sha1": digest})
+            added += 1
+        return added, removed
+
+    def match(self, encoding, tolerance=0.5):
+        """Nearest neighbour over the whole gallery; returns (name | None, distance)."""
+        return self.match_many([encoding], tolerance)[0]
+
+    def match_many(self, encodings, tolerance=0.5):
+        """``match`` for several query encodings with one distance computation."""
+        if not self.entries:
+            return [(None, float("inf"))] * len(encodings)
+        q = np.asarray(encodings, dtype=np.float32).reshape(len(encodings), -1)
+        d = np.linalg.norm(self.encodings[None, :, :] - q[:, None, :], axis=2)
+        idx = np.argmin(d, axis=1)
+        out = []
+        for row, i in enumerate(idx):
+            dist = float(d[row, i])
+            out.append((self.entries[int(i)]["name"] if dist <= tolerance else None, dist))
+        return out
+
+def _sha1(path, chunk=1 << 20):
+    h = hashlib.sha1()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(chunk), b""):
+            h.update(block)
+    return h.hexdigest()
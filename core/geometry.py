@@ -0,0 +1,89 @@
+import numpy as np
+
+# 68-point (iBUG/dlib) indices
+RIGHT_EYE = slice(36, 42)
+LEFT_EYE = slice(42, 48)
+MOUTH = slice(48, 68)
+NOSE_TIP = 30
+
+# Coarse pitch model: the nose tip protrudes by about half the eye-mouth distance, so a nod moves
+# it along the face by NOSE_DEPTH * sin(pitch). Where it sits when level differs per face and
+# camera, so callers pass a neutral offset measured on the driver (see FatigueAnalyzer)
+NOSE_DEPTH = 0.5
+
+def _norm(a, b):
+    return np.sqrt(((a - b) ** 2).sum(axis=-1))
+
+def ear_batch(eyes):
+    """EAR for (..., 6, 2) eye points."""
+    eyes = eyes.astype(np.float64, copy=False)
+    A = _norm(eyes[..., 1, :], eyes[..., 5, :])
+    B = _norm(eyes[..., 2, :], eyes[..., 4, :])
+    C = _norm(eyes[..., 0, :], eyes[..., 3, :])
+    return (A + B) / (2.0 * C)
+
+def mouth_opening_batch(mouths):
+    """Top-bottom lip distance in pixels for (..., 20, 2) mouth points."""
+    mouths = mouths.astype(np.float64, copy=False)
+    top = mouths[..., 2:4, :].mean(axis=-2)
+    bottom = mouths[..., 8:10, :].mean(axis=-2)
+    return _norm(top, bottom)
+
+def pitch_degrees(nose_offset, neutral=0.0):
+    """Head pitch in degrees (positive = nodding down) from ``nose_offset`` relative to a level ``neutral``."""
+    return np.degrees(np.arcsin(np.clip((np.asarray(nose_offset) - neutral) / NOSE_DEPTH, -1.0, 1.0)))
+
+def face_geometry(shapes):
+    """Per-face geometry for stacked landmarks of shape (n, 68, 2).
+
+    Returns arrays of length n: ``ear_left``, ``ear_right``, ``ear`` (mean),
+    ``mouth_opening`` (pixels), ``mar`` (mouth opening over mouth width,
+    independent of camera distance; what ``yawn`` thresholds use),
+    ``nose_offset`` (nose tip below the eye-mouth midpoint, in eye-mouth
+    distances), ``pitch`` (``pitch_degrees`` of it against a zero neutral;
+    coarse, use a per-driver neutral for nods) and ``size`` (inter-ocular
+    distance in pixels).
+    """
+    s = np.asarray(shapes, dtype=np.float64)
+    if s.ndim == 2:
+        s = s[None]
+    ear_l = ear_batch(s[:, LEFT_EYE])
+    ear_r = ear_batch(s[:, RIGHT_EYE])
+    mouth = s[:, MOUTH]
+    opening = mouth_opening_batch(mouth)
+    width = _norm(mouth[:, 0], mouth[:, 6])
+    mar = opening / np.maximum(width, 1e-6)
+    eye_l = s[:, LEFT_EYE].mean(axis=1)
+    eye_r = s[:, RIGHT_EYE].mean(axis=1)
+    eye_mid = (eye_l + eye_r) / 2.0
+    mouth_mid = mouth.mean(axis=1)
+    span = np.maximum(_norm(mouth_mid, eye_mid), 1e-6)
+    # Projected onto the eye-to-mouth axis, so head roll does not read as pitch
+    axis = (mouth_mid - eye_mid) / span[:, None]
+    nose_offset = (((s[:, NOSE_TIP] - (eye_mid + mouth_mid) / 2.0) * axis).sum(axis=-1)) / span
+
+    return {
+        "ear_left": ear_l,
+        "ear_right": ear_r,
+        "ear": (ear_l + ear_r) / 2.0,
+        "mouth_opening": opening,
+        "mar": mar,
+        "nose_offset": nose_offset,
+        "pitch": pitch_degrees(nose_offset),
+        "size": _norm(eye_l, eye_r),
+    }
+
+def select_driver(face_rects, frame_shape, target=(0.5, 0.5)):
+    """Index of the face most likely to be the driver: large and close to the expected seat position."""
+    if not face_rects:
+        return None
+    if len(face_rects) == 1:
+        return 0
+    r = np.asarray(face_rects, dtype=np.float64)
+    h, w = frame_shape[:2]
+    area = r[:, 2] * r[:, 3]
+    cx = (r[:, 0] + r[:, 2] / 2.0) / w
+    cy = (r[:, 1] + r[:, 3] / 2.0) / h
+    dist = np.hypot(cx - target[0], cy - target[1])
+    score = area / area.max() - dist
+    return int(np.argmax(score))
@@ -1,30 +1,152 @@
 import cv2
-import dlib
-from imutils import face_utils
-
-class LandmarkDetector:
-    def __init__(self, model_path: str):
-        self.detector = dlib.get_frontal_face_detector()
-        try:
-            self.predictor = dlib.shape_predictor(model_path)
-            self.ready = True
-        except Exception:
-            self.predictor = None
-            self.ready = False
-            print("Warning: dlib landmark model missing; using face rects only.")
-
-    def detect(self, frame):
-        gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
-        rects = self.detector(gray, 0)
+import numpy as np
+from core.geometry import select_driver
+from core.telemetry import instrumented
+from core.warmup import STARTUP, ModelStage
+
+# Imported on first load so that importing this module stays cheap
+dlib = None
+face_utils = None
+
+class LandmarkDetector(ModelStage):
+    component = "landmarks"
+
+    def __init__(self, model_path: str, track=False, redetect_every=10, detect_scale=1.0,
+                 track_margin=0.5, driver_target=(0.5, 0.5), lazy=False):
+        self._init_loading()
+        self.model_path = model_path
+        self.detector = None
+        self.predictor = None
+        self.has_predictor = False
+        self.want_track = track
+        self.track = False
+        self.redetect_every = max(1, int(redetect_every))
+        self.detect_scale = float(detect_scale)
+        self.track_margin = track_margin  # padding of the tracking search box, per side, in face sizes
+        self.driver_target = driver_target
+        self._prev_shape = None
+        self._since_detect = 0
+        # dlib.rectangle and imutils' shape_to_np once loaded; attach_models can supply others
+        self._make_rect = None
+        self._shape_to_np = None
+        if not lazy:
+            self.load()
+            if self.load_error is not None:
+                raise self.load_error
+
+    def _load(self):
+        global dlib, face_utils
+        with STARTUP.timer(self.component, "import"):
+            import dlib as _dlib
+            from imutils import face_utils as _face_utils
+            dlib, face_utils = _dlib, _face_utils
+            self._make_rect, self._shape_to_np = dlib.rectangle, face_utils.shape_to_np
+        with STARTUP.timer(self.component, "load"):
+            self.detector = dlib.get_frontal_face_detector()
+            try:
+                self.predictor = dlib.shape_predictor(self.model_path)
+                self.has_predictor = True
+            except Exception:
+                self.predictor = None
+                self.has_predictor = False
+                print("Warning: dlib landmark model missing; using face rects only.")
+        # Tracking needs landmarks to derive the next search box
+        self.track = self.want_track and self.has_predictor
+        with STARTUP.timer(self.component, "first_inference"):
+            blank = np.zeros((240, 320), dtype=np.uint8)
+            self.detector(blank, 0)
+            if self.has_predictor:
+                self.predictor(blank, dlib.rectangle(100, 60, 220, 180))
+
+    def attach_models(self, detector, predictor, make_rect, shape_to_np):
+        """Run on the given detector/predictor instead of loading dlib (benchmarks, tests); marks the stage ready.
+
+        ``make_rect(left, top, right, bottom)`` builds what both accept, with
+        dlib.rectangle's accessors; ``shape_to_np`` converts a predictor result.
+        """
+        self.detector = detector
+        self.predictor = predictor
+        self.has_predictor = predictor is not None
+        self.track = self.want_track and self.has_predictor
+        self._make_rect, self._shape_to_np = make_rect, shape_to_np
+        self._loaded.set()
+        return self
+
+    @instrumented("landmarks.detect")
+    def detect(self, frame, ctx=None):
+        gray = ctx.gray if ctx is not None else cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
+
+        if self.track and self._prev_shape is not None and self._since_detect < self.redetect_every:
+            rect = self._track(gray)
+            if rect is not None:
+                shape_np = self._shape_to_np(self.predictor(gray, rect))
+                self._prev_shape = shape_np
+                self._since_detect += 1
+                return [self._dlib_to_cv(rect)], [shape_np]
+
+        rects = self._full_detect(gray, ctx)
+        # Driver first: every downstream stage reads face 0
+        idx = select_driver([self._dlib_to_cv(r) for r in rects], gray.shape, self.driver_target)
+        if idx:
+            rects.insert(0, rects.pop(idx))
         rects_cv = [self._dlib_to_cv(r) for r in rects]
         landmarks = []
-        if self.ready:
+        if self.has_predictor:
             for r in rects:
                 shape = self.predictor(gray, r)
-                shape_np = face_utils.shape_to_np(shape)
+                shape_np = self._shape_to_np(shape)
                 landmarks.append(shape_np)
+        self._prev_shape = landmarks[0] if landmarks else None
+        self._since_detect = 0
         return rects_cv, landmarks
 
+    def reset(self):
+        self._prev_shape = None
+        self._since_detect = 0
+
+    def _track(self, gray):
+        # Re-find the face with the detector in a padded box around the last landmarks. The shape
+        # predictor cannot confirm a track: it answers inside whatever box it is given, face or not
+        box = self._rect_from_shape(self._prev_shape, gray.shape)
+        left, top = box.left(), box.top()
+        found = list(self.detector(np.ascontiguousarray(gray[top:box.bottom() + 1, left:box.right() + 1]), 0))
+        if not found:
+            return None
+        # Several faces in the box: keep the one overlapping the last landmarks most
+        (x0, y0), (x1, y1) = self._prev_shape.min(axis=0) - (left, top), self._prev_shape.max(axis=0) - (left, top)
+        prev = self._make_rect(int(x0), int(y0), int(x1), int(y1))
+        r = max(found, key=lambda f: self._iou(f, prev))
+        return self._make_rect(r.left() + left, r.top() + top, r.right() + left, r.bottom() + top)
+
+    def _full_detect(self, gray, ctx=None):
+        if self.detect_scale >= 1.0:
+            return list(self.detector(gray, 0))
+        if ctx is not None:
+            small = ctx.small_gray(self.detect_scale)
+        else:
+            small = cv2.resize(gray, None, fx=self.detect_scale, fy=self.detect_scale,
+                               interpolation=cv2.INTER_AREA)
+        s = self.detect_scale
+        return [self._make_rect(int(r.left() / s), int(r.top() / s), int(r.right() / s), int(r.bottom() / s))
+                for r in self.detector(small, 0)]
+
+    def _rect_from_shape(self, shape_np, frame_shape):
+        x0, y0 = shape_np.min(axis=0)
+        x1, y1 = shape_np.max(axis=0)
+        mx = int((x1 - x0) * self.track_margin)
+        my = int((y1 - y0) * self.track_margin)
+        h, w = frame_shape[:2]
+        return self._make_rect(int(max(0, x0 - mx)), int(max(0, y0 - my)),
+                              int(min(w - 1, x1 + mx)), int(min(h - 1, y1 + my)))
+
+    @staticmethod
+    def _iou(a, b):
+        ix = max(0, min(a.right(), b.right()) - max(a.left(), b.left()))
+        iy = max(0, min(a.bottom(), b.bottom()) - max(a.top(), b.top()))
+        inter = ix * iy
+        union = a.area() + b.area() - inter
+        return inter / union if union > 0 else 0.0
+
     @staticmethod
     def _dlib_to_cv(rect):
-        return (rect.left(), rect.top(), rect.width(), rect.height())
\ No newline at end of file
+        return (rect.left(), rect.top(), rect.width(), rect.height())
@@ -0,0 +1,312 @@
+import queue
+import threading
+import time
+from collections import deque
+from core.frame import FrameContext
+from core.telemetry import TELEMETRY
+
+_END = object()
+ERROR_REPORT_SEC = 30.0  # side-stage failures are printed at most this often per stage
+
+class _SideStage:
+    """Rate-limited stage fed through a latest-wins mailbox.
+
+    Results are kept with the timestamp of the frame they were computed on,
+    so the join can pick the newest result that is not newer than a frame.
+    """
+
+    def __init__(self, name, fn, rate_hz, history=16, shedder=None, ready=None):
+        self.name = name
+        self.fn = fn
+        self.ready = ready  # callable; a stage still warming up is not offered frames
+        self.period = 1.0 / rate_hz if rate_hz > 0 else 0.0
+        self.scale = 1.0  # set by the load shedder; 0 stops unforced offers
+        self.shedder = shedder
+        self.results = deque(maxlen=history)
+        self.errors = 0
+        self._errors_reported = 0
+        self._last_report = None
+        self._last_offer = 0.0
+        self._mailbox = None
+        self._cond = threading.Condition()
+        self._stop = False
+        self._ctx = FrameContext()
+        self._thread = threading.Thread(target=self._run, name=f"Pipeline-{name}", daemon=True)
+
+    def start(self):
+        self._thread.start()
+
+    def offer(self, packet, force=False):
+        if self.ready is not None and not self.ready():
+            return False
+        now = time.time()
+        if not force and (self.scale <= 0 or now - self._last_offer < self.period / self.scale):
+            return False
+        with self._cond:
+            self._mailbox = packet
+            self._last_offer = now
+            self._cond.notify()
+        return True
+
+    def _run(self):
+        while True:
+            with self._cond:
+                while self._mailbox is None and not self._stop:
+                    self._cond.wait()
+                if self._stop:
+                    return
+                packet, self._mailbox = self._mailbox, None
+            self._ctx.reset(packet["frame"], packet["ts"], shared=True)
+            t0 = time.perf_counter()
+            try:
+                value = self.fn(packet["frame"], packet["face_rects"], self._ctx)
+            except Exception as e:
+                self._report(e)
+                continue
+            if self.shedder is not None:
+                self.shedder.record(self.name, time.perf_counter() - t0)
+            with self._cond:
+                self.results.append((packet["ts"], value))
+
+    def _report(self, exc):
+        # A failing stage would otherwise just go stale; count every failure, print rate-limited
+        self.errors += 1
+        TELEMETRY.inc(f"{self.name}_errors")
+        now = time.time()
+        if self._last_report is None or now - self._last_report >= ERROR_REPORT_SEC:
+            since = self.errors - self._errors_reported
+            more = f" ({since - 1} more since the last report)" if since > 1 else ""
+            print(f"Warning: {self.name} stage failed: {exc!r}{more}")
+            self._last_report = now
+            self._errors_reported = self.errors
+
+    def result_at(self, ts, default, max_age=None):
+        with self._cond:
+            for r_ts, value in reversed(self.results):
+                if r_ts <= ts:
+                    if max_age is not None and ts - r_ts > max_age:
+                        break
+                    return value
+        return default
+
+    def stop(self):
+        with self._cond:
+            self._stop = True
+            self._cond.notify_all()
+        self._thread.join(timeout=2.0)
+
+class PipelineEngine:
+    """Capture -> detect/fatigue -> decide, with identity and emotion as side stages.
+
+    Each stage runs on its own thread. The main chain is connected by
+    bounded queues, so a slow stage back-pressures its producer; identity
+    and emotion run at their own (lower) rates and are joined to frames by
+    timestamp in the decide stage. ``results()`` yields one dict per frame.
+
+    With a ``shedder`` (core.scheduler.LoadShedder), each frame's service
+    time is reported to it and its level sets the emotion and identity
+    rates, the detection scale and the ``render`` flag on results;
+    consumers report their drawing time through ``report_render``.
+    """
+
+    def __init__(self, cam, lmk, fatigue, emotion, driver_id, thresholds, trends, orchestrator, cfg,
+                 identity_hz=1.0, emotion_hz=5.0, queue_size=4, recorder=None, shedder=None):
+        self.cam = cam
+        self.lmk = lmk
+        self.fatigue = fatigue
+        self.thresholds = thresholds
+        self.trends = trends
+        self.orchestrator = orchestrator
+        self.cfg = cfg
+        self.recorder = recorder
+        self.shedder = shedder
+        self.identity = _SideStage("identity", driver_id.identify, identity_hz, shedder=shedder,
+                                   ready=lambda: driver_id.ready)
+        self.emotion = _SideStage("emotion", emotion.estimate, emotion_hz, shedder=shedder,
+                                  ready=lambda: emotion.ready)
+        self.emotion_default = emotion._default()
+        self.last_intervention_ts = 0
+        self._detect_q = queue.Queue(maxsize=queue_size)
+        self._decide_q = queue.Queue(maxsize=queue_size)
+        self._out_q = queue.Queue(maxsize=queue_size)
+        self._stop = threading.Event()
+        self._threads = [
+            threading.Thread(target=self._capture_loop, name="Pipeline-capture", daemon=True),
+            threading.Thread(target=self._guard, args=(self._detect_loop, self._decide_q),
+                             name="Pipeline-detect", daemon=True),
+            threading.Thread(target=self._guard, args=(self._decide_loop, self._out_q),
+                             name="Pipeline-decide", daemon=True),
+        ]
+        self._started = False
+        self.error = None
+
+    def start(self):
+        if self._started:
+            return
+        self._started = True
+        self.identity.start()
+        self.emotion.start()
+        for t in self._threads:
+            t.start()
+
+    def _put(self, q, item):
+        # Blocking put that still honours stop()
+        while not self._stop.is_set():
+            try:
+                q.put(item, timeout=0.1)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def _get(self, q):
+        while not self._stop.is_set():
+            try:
+                return q.get(timeout=0.1)
+            except queue.Empty:
+                continue
+        return _END
+
+    def _guard(self, loop, downstream):
+        # A failing stage ends the stream; results() re-raises the error
+        try:
+            loop()
+        except Exception as e:
+            self.error = e
+            self._put(downstream, _END)
+
+    def _capture_loop(self):
+        seq = 0
+        try:
+            for ts, frame in self.cam.timed_frames():
+                if not self._put(self._detect_q, {"seq": seq, "ts": ts, "frame": frame}):
+                    return
+                seq += 1
+        except Exception as e:
+            self.error = e
+        self._put(self._detect_q, _END)
+
+    def _detect_loop(self):
+        ctx = FrameContext()
+        had_face = False
+        # Landmarks gate fatigue, so this is the one model the chain waits for
+        while not self.lmk.wait_ready(0.1):
+            if self._stop.is_set():
+                return
+        if self.lmk.load_error is not None:
+            raise self.lmk.load_error
+        base_scale = self.lmk.detect_scale
+        while True:
+            packet = self._get(self._detect_q)
+            if packet is _END:
+                self._put(self._decide_q, _END)
+                return
+            t0 = time.perf_counter()
+            if self.shedder is not None:
+                self.lmk.detect_scale = self.shedder.detect_scale(base_scale)
+                self.emotion.scale = self.shedder.emotion_scale()
+                self.identity.scale = self.shedder.identity_scale()
+            ctx.reset(packet["frame"], packet["ts"], shared=True)
+            face_rects, landmarks = self.lmk.detect(packet["frame"], ctx)
+            packet["face_rects"] = face_rects
+            packet["landmarks"] = landmarks
+            t1 = time.perf_counter()
+            # Fatigue stays at full rate and in frame order, whatever the shedding level
+            packet["metrics"] = self.fatigue.update(packet["frame"], face_rects, landmarks, ts=packet["ts"])
+            t2 = time.perf_counter()
+            if self.shedder is not None:
+                self.shedder.record("detect", t1 - t0)
+                self.shedder.record("fatigue", t2 - t1)
+            packet["work"] = t2 - t0
+            shared = False
+            if face_rects:
+                # A face that just appeared must be identified now, not at the next 1 Hz tick
+                shared |= self.identity.offer(packet, force=not had_face)
+                shared |= self.emotion.offer(packet)
+            elif had_face:
+                # Face lost: let the identifier drop its cached track
+                self.identity.offer(packet, force=True)
+            had_face = bool(face_rects)
+            packet["shared"] = shared
+            if not self._put(self._decide_q, packet):
+                return
+
+    def _decide_loop(self):
+        while True:
+            packet = self._get(self._decide_q)
+            if packet is _END:
+                self._put(self._out_q, _END)
+                return
+            t0 = time.perf_counter()
+            ts = packet["ts"]
+            if packet["face_rects"]:
+                identity = self.identity.result_at(ts, None)
+                # With emotion shed, an old result may only stand in for a while
+                max_age = self.cfg.emotion_stale_sec if self.emotion.scale <= 0 else None
+                stress = self.emotion.result_at(ts, self.emotion_default, max_age)
+            else:
+                identity, stress = None, self.emotion_default
+            if self.recorder is not None:
+                self.recorder.write(ts, packet["face_rects"], packet["landmarks"], stress)
+            per_driver = self.thresholds.get_for_driver(identity)
+            metrics = packet["metrics"]
+            self.trends.update(identity, metrics, stress, ts=ts)
+            status = self.orchestrator.evaluate(identity, metrics, stress, per_driver)
+
+            if status.get("needs_intervention"):
+                now = time.time()
+                if now - self.last_intervention_ts > self.cfg.intervention_min_interval_sec:
+                    self.orchestrator.nudge(identity, status, metrics, stress)
+                    self.last_intervention_ts = now
+
+            render = True
+            if self.shedder is not None:
+                render = self.shedder.render(packet["seq"])
+                decide = time.perf_counter() - t0
+                self.shedder.record("decide", decide)
+                render_cost = self.shedder.costs.get("render", 0.0) * self.shedder.render_share()
+                self.shedder.frame(ts, packet["work"] + decide + render_cost)
+                TELEMETRY.set_gauge("degradation_level", self.shedder.level)
+
+            decided_ts = time.time()
+            TELEMETRY.observe("capture_to_decision", decided_ts - ts)
+            if status.get("needs_intervention"):
+                TELEMETRY.observe("capture_to_alert", decided_ts - ts)
+                TELEMETRY.inc("alerts")
+            if TELEMETRY.enabled:
+                TELEMETRY.inc("frames")
+                TELEMETRY.set_gauge("camera_frames_dropped", self.cam.stats["dropped"])
+                TELEMETRY.set_gauge("queue_depth_detect", self._detect_q.qsize())
+                TELEMETRY.set_gauge("queue_depth_decide", self._decide_q.qsize())
+                TELEMETRY.set_gauge("queue_depth_out", self._out_q.qsize())
+            packet.update({
+                "identity": identity,
+                "stress": stress,
+                "status": status,
+                "summary": self.trends.summary(identity),
+                "decided_ts": decided_ts,
+                "render": render,
+            })
+            if not self._put(self._out_q, packet):
+                return
+
+    def report_render(self, seconds):
+        if self.shedder is not None:
+            self.shedder.record("render", seconds)
+
+    def results(self):
+        self.start()
+        while True:
+            item = self._get(self._out_q)
+            if item is _END:
+                if self.error is not None:
+                    raise self.error
+                return
+            yield item
+
+    def stop(self):
+        self._stop.set()
+        for t in self._threads:
+            t.join(timeout=2.0)
+        self.identity.stop()
+        self.emotion.stop()
@@ -1,41 +1,150 @@
 import json
 import os
+import tempfile
+import threading
+
+try:
+    import fcntl
+except ImportError:  # Windows: merges still happen, without cross-process locking
+    fcntl = None
 
 class ThresholdManager:
-    def __init__(self, path: str):
+    def __init__(self, path: str, write_behind=False, flush_interval_sec=5.0, read_only=False):
         self.path = path
         self.data = {}
+        # read_only: adaptations stay in memory and nothing is ever written (replays, what-if runs)
+        self.read_only = read_only
+        self.write_behind = write_behind and not read_only
+        self.flush_interval_sec = flush_interval_sec
+        # identity -> keys changed in memory since the last flush
+        self._dirty = {}
+        self._lock = threading.RLock()
+        self._stop = threading.Event()
+        self._flusher = None
         self._load()
+        if self.write_behind:
+            self._flusher = threading.Thread(target=self._flush_loop, name="ThresholdManager", daemon=True)
+            self._flusher.start()
 
     def _load(self):
-        if os.path.exists(self.path):
-            try:
-                with open(self.path, "r") as f:
-                    self.data = json.load(f)
-            except Exception:
-                self.data = {}
+        if os.path.exists(self.path) or self.read_only:
+            self.data = self._read_disk()
         else:
             os.makedirs(os.path.dirname(self.path), exist_ok=True)
             with open(self.path, "w") as f:
                 json.dump({}, f)
             self.data = {}
 
+    def _read_disk(self):
+        try:
+            with open(self.path, "r") as f:
+                return json.load(f)
+        except Exception:
+            return {}
+
     def get_for_driver(self, identity: str | None):
         if not identity or identity not in self.data:
             return {}
         return self.data.get(identity, {})
 
+    def set_for_driver(self, identity: str, values: dict):
+        with self._lock:
+            entry = self.data.get(identity, {})
+            entry.update(values)
+            self.data[identity] = entry
+            self._dirty.setdefault(identity, set()).update(values)
+        if not self.write_behind:
+            # Synchronous: the same locked merge and atomic write as the batched flushes
+            self.flush()
+
     def adapt(self, identity: str | None, metrics: dict):
         if not identity:
             return
-        entry = self.data.get(identity, {})
-        # Simple adaptive logic: track typical EAR
-        ear = metrics.get("ear_avg")
-        if ear:
-            entry["ear_baseline"] = 0.9 * entry.get("ear_baseline", ear) + 0.1 * ear
-        self.data[identity] = entry
+        with self._lock:
+            entry = self.data.get(identity, {})
+            # Simple adaptive logic: track typical EAR
+            ear = metrics.get("ear_avg")
+            if ear:
+                entry["ear_baseline"] = 0.9 * entry.get("ear_baseline", ear) + 0.1 * ear
+                self._dirty.setdefault(identity, set()).add("ear_baseline")
+            self.data[identity] = entry
+        if not self.write_behind:
+            # Synchronous: the same locked merge and atomic write as the batched flushes
+            self.flush()
+
+    def flush(self):
+        if self.read_only:
+            return
+        with self._lock:
+            if not self._dirty:
+                return
+            dirty, self._dirty = self._dirty, {}
+            snapshot = {k: dict(self.data.get(k, {})) for k in dirty}
         try:
-            with open(self.path, "w") as f:
-                json.dump(self.data, f, indent=2)
+            with self._file_lock():
+                # Merge: keys we changed win, everything else comes from disk
+                merged = self._read_disk()
+                for identity, keys in dirty.items():
+                    entry = merged.get(identity, {})
+                    for k in keys:
+                        if k in snapshot[identity]:
+                            entry[k] = snapshot[identity][k]
+                    merged[identity] = entry
+                self._atomic_write(merged)
+            with self._lock:
+                for identity, entry in merged.items():
+                    local = self.data.setdefault(identity, {})
+                    pending = self._dirty.get(identity, set())
+                    for k, v in entry.items():
+                        if k not in pending:
+                            local[k] = v
         except Exception:
-            pass
\ No newline at end of file
+            # Keep changes dirty so the next flush retries them
+            with self._lock:
+                for identity, keys in dirty.items():
+                    self._dirty.setdefault(identity, set()).update(keys)
+
+    def _atomic_write(self, data):
+        dir_name = os.path.dirname(self.path) or "."
+        fd, tmp = tempfile.mkstemp(prefix=".thresholds.", dir=dir_name)
+        try:
+            with os.fdopen(fd, "w") as f:
+                json.dump(data, f, indent=2)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp, self.path)
+        except Exception:
+            if os.path.exists(tmp):
+                os.remove(tmp)
+            raise
+
+    def _file_lock(self):
+        return _FileLock(self.path + ".lock")
+
+    def _flush_loop(self):
+        while not self._stop.wait(self.flush_interval_sec):
+            self.flush()
+
+    def close(self):
+        self._stop.set()
+        if self._flusher is not None:
+            self._flusher.join(timeout=self.flush_interval_sec + 1.0)
+            self._flusher = None
+        self.flush()
+
+class _FileLock:
+    def __init__(self, path):
+        self.path = path
+        self._f = None
+
+    def __enter__(self):
+        if fcntl is not None:
+            self._f = open(self.path, "a")
+            fcntl.flock(self._f, fcntl.LOCK_EX)
+        return self
+
+    def __exit__(self, *exc):
+        if self._f is not None:
+            fcntl.flock(self._f, fcntl.LOCK_UN)
+            self._f.close()
+            self._f = None
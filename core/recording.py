@@ -0,0 +1,139 @@
+import os
+import struct
+import numpy as np
+from core.emotion import STRESS_MAP
+from core.geometry import face_geometry
+
+MAGIC = b"DMLMREC1"
+VERSION = 1
+HEADER = struct.Struct("<8sII")  # magic, version, record size
+EMOTIONS = list(STRESS_MAP)
+NO_EMOTION = 255
+
+# One fixed-size record per frame; only the primary (first) face is kept
+RECORD = np.dtype([
+    ("ts", "<f8"),
+    ("n_faces", "u1"),
+    ("emotion", "u1"),
+    ("rect", "<i2", (4,)),
+    ("landmarks", "<i2", (68, 2)),
+    ("stress", "<f4"),
+])
+
+class LandmarkRecorder:
+    def __init__(self, path, chunk=1024):
+        self.path = path
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        new = not os.path.exists(path) or os.path.getsize(path) == 0
+        if not new:
+            _check_header(path)
+            # Drop a torn last record (interrupted write) so appended records stay aligned
+            size = os.path.getsize(path)
+            whole = HEADER.size + (size - HEADER.size) // RECORD.itemsize * RECORD.itemsize
+            if whole != size:
+                print(f"Warning: dropping {size - whole} bytes of a partial record at the end of {path}")
+                os.truncate(path, whole)
+        self._f = open(path, "ab")
+        if new:
+            self._f.write(HEADER.pack(MAGIC, VERSION, RECORD.itemsize))
+        self._buf = np.zeros(chunk, dtype=RECORD)
+        self._n = 0
+        self.count = 0
+
+    def write(self, ts, face_rects, landmarks, stress=None):
+        rec = self._buf[self._n]
+        rec["ts"] = ts
+        rec["n_faces"] = min(len(face_rects), 255)
+        if face_rects:
+            rec["rect"] = face_rects[0]
+        else:
+            rec["rect"] = -1
+        if landmarks:
+            rec["landmarks"] = landmarks[0]
+        else:
+            rec["landmarks"] = -1
+        emo = (stress or {}).get("dominant_emotion")
+        rec["emotion"] = EMOTIONS.index(emo) if emo in EMOTIONS else NO_EMOTION
+        rec["stress"] = (stress or {}).get("stress_score", np.nan)
+        self._n += 1
+        self.count += 1
+        if self._n == len(self._buf):
+            self.flush()
+
+    def flush(self):
+        if self._n:
+            self._f.write(self._buf[:self._n].tobytes())
+            self._f.flush()
+            self._n = 0
+
+    def close(self):
+        self.flush()
+        self._f.close()
+
+def _check_header(path):
+    with open(path, "rb") as f:
+        magic, version, size = HEADER.unpack(f.read(HEADER.size))
+    if magic != MAGIC or version != VERSION or size != RECORD.itemsize:
+        raise ValueError(f"Not a landmark recording (or incompatible version): {path}")
+
+class LandmarkReplay:
+    """Memory-mapped view of a recording; iterating pages records in chunk by chunk."""
+
+    def __init__(self, path):
+        _check_header(path)
+        n = (os.path.getsize(path) - HEADER.size) // RECORD.itemsize
+        self.records = np.memmap(path, dtype=RECORD, mode="r", offset=HEADER.size, shape=(n,))
+
+    def __len__(self):
+        return len(self.records)
+
+    def chunks(self, chunk=4096):
+        for start in range(0, len(self.records), chunk):
+            yield np.array(self.records[start:start + chunk])
+
+    def frames(self, chunk=4096):
+        """Yield (ts, face_rects, landmarks, stress) in the shapes the live stages use."""
+        for block in self.chunks(chunk):
+            valid = _has_landmarks(block)
+            for rec, ok in zip(block, valid):
+                face_rects = [tuple(int(v) for v in rec["rect"])] if rec["n_faces"] else []
+                landmarks = [rec["landmarks"].astype(np.int32)] if ok else []
+                yield float(rec["ts"]), face_rects, landmarks, _stress_of(rec)
+
+def _has_landmarks(block):
+    # A face rect without landmarks (predictor still loading) is recorded with landmarks = -1
+    return (block["n_faces"] > 0) & (block["landmarks"] >= 0).all(axis=(1, 2))
+
+def _stress_of(rec):
+    code = int(rec["emotion"])
+    if code == NO_EMOTION or np.isnan(rec["stress"]):
+        return {"dominant_emotion": "neutral", "stress_score": 0.2}
+    return {"dominant_emotion": EMOTIONS[code], "stress_score": float(rec["stress"])}
+
+def replay_metrics(path, fatigue, chunk=4096):
+    """Yield (ts, metrics, stress); face geometry is computed per chunk with one vectorized call."""
+    for block in LandmarkReplay(path).chunks(chunk):
+        has_face = _has_landmarks(block)
+        geom = face_geometry(block["landmarks"][has_face])
+        rows = np.cumsum(has_face) - 1
+        for i, rec in enumerate(block):
+            if has_face[i]:
+                r = rows[i]
+                metrics = fatigue.update_measures(float(rec["ts"]), geom["ear"][r], geom["mar"][r],
+                                                  geom["nose_offset"][r])
+            else:
+                metrics = {"ear_avg": 0.0, "perclos": 0.0, "yawn": 0.0}
+            yield float(rec["ts"]), metrics, _stress_of(rec)
+
+def replay(path, fatigue, trends, orchestrator, identity=None, per_driver=None, on_frame=None):
+    """Feed a recording through fatigue -> trend -> evaluate as fast as possible."""
+    per_driver = per_driver or {}
+    counts = {"frames": 0, "none": 0, "medium": 0, "high": 0}
+    for ts, metrics, stress in replay_metrics(path, fatigue):
+        trends.update(identity, metrics, stress, ts=ts)
+        status = orchestrator.evaluate(identity, metrics, stress, per_driver)
+        counts["frames"] += 1
+        counts[status["alert_level"]] += 1
+        if on_frame:
+            on_frame(ts, metrics, stress, status)
+    return counts
@@ -0,0 +1,136 @@
+import threading
+import time
+
+# Shedding order; level n applies every step up to and including n.
+# Fatigue (detection + EAR/PERCLOS) runs on every frame at every level.
+LEVELS = ("full", "emotion_reduced", "emotion_off", "identity_reduced", "display_reduced", "detect_reduced")
+
+class LoadShedder:
+    """Holds a per-frame latency budget by degrading optional stages.
+
+    The pipeline reports the cost of every stage (``record``) and, once per
+    frame, the frame's service time: the time spent working on it across
+    the main chain, without queue waits, so file sources that read ahead
+    are not mistaken for overload. With ``count_side_stages`` (for machines
+    where the side threads compete with the main chain for the same cores)
+    each frame's share of the emotion and identity work, at their current
+    rates, is added on top; without it those stages are assumed to run on
+    spare cores and are excluded. Above the budget the level goes up one
+    step at a time; it comes back down only when the predicted cost of the
+    restored stage still fits under ``restore_ratio * budget``. The
+    prediction is the latency drop measured when that level was entered,
+    or, before one was measured, the stage cost model.
+    """
+
+    def __init__(self, budget_ms=100.0, restore_ratio=0.7, hold_sec=3.0, emotion_hz=5.0, identity_hz=1.0,
+                 display_every=3, detect_scale=0.5, alpha=0.1, enabled=True, count_side_stages=True):
+        self.budget = budget_ms / 1000.0
+        self.restore_ratio = restore_ratio
+        self.hold_sec = hold_sec
+        self.emotion_hz = emotion_hz
+        self.identity_hz = identity_hz
+        self.display_every = max(1, int(display_every))
+        self.reduced_detect_scale = detect_scale
+        self.alpha = alpha
+        self.enabled = enabled
+        self.count_side_stages = count_side_stages
+        self.level = 0
+        self.latency = None
+        self.fps = 0.0
+        self.costs = {}
+        self._relief = {}
+        self._pending = None  # (level entered, latency before) awaiting its relief measurement
+        self._last_change = 0.0
+        self._last_ts = None
+        self._lock = threading.Lock()
+
+    @property
+    def name(self):
+        return LEVELS[self.level]
+
+    def record(self, stage, seconds):
+        with self._lock:
+            prev = self.costs.get(stage)
+            self.costs[stage] = seconds if prev is None else prev + self.alpha * (seconds - prev)
+
+    # Knobs read by the pipeline
+    def emotion_scale(self):
+        return 1.0 if self.level < 1 else 0.5 if self.level < 2 else 0.0
+
+    def identity_scale(self):
+        return 1.0 if self.level < 3 else 0.25
+
+    def render(self, seq):
+        return self.level < 4 or seq % self.display_every == 0
+
+    def render_share(self):
+        return 1.0 if self.level < 4 else 1.0 / self.display_every
+
+    def detect_scale(self, base):
+        return base if self.level < 5 else min(base, self.reduced_detect_scale)
+
+    def frame(self, ts, service_sec, now=None):
+        """Report one frame's service time; returns the (possibly changed) level."""
+        if not self.enabled:
+            return self.level
+        now = time.time() if now is None else now
+        if self._last_ts is not None and ts > self._last_ts:
+            dt = ts - self._last_ts
+            self.fps = 1.0 / dt if not self.fps else self.fps + self.alpha * (1.0 / dt - self.fps)
+        self._last_ts = ts
+        if self.count_side_stages:
+            service_sec += self._side_cost()
+        self.latency = service_sec if self.latency is None else \
+            self.latency + self.alpha * (service_sec - self.latency)
+
+        if now - self._last_change < self.hold_sec:
+            return self.level
+        if self._pending is not None:
+            level, before = self._pending
+            self._relief[level] = max(0.0, before - self.latency)
+            self._pending = None
+        if self.latency > self.budget and self.level < len(LEVELS) - 1:
+            self._pending = (self.level + 1, self.latency)
+            self._set(self.level + 1, now)
+        elif self.level > 0 and self.latency + self._restore_cost(self.level) < self.budget * self.restore_ratio:
+            self._set(self.level - 1, now)
+        return self.level
+
+    def _restore_cost(self, level):
+        if level in self._relief:
+            return self._relief[level]
+        return self._model_cost(level)
+
+    def _side_cost(self):
+        # Per-frame share of the side stages at the rates the current level allows
+        with self._lock:
+            c = dict(self.costs)
+        fps = max(self.fps, 1.0)
+        return (c.get("emotion", 0.0) * min(1.0, self.emotion_hz * self.emotion_scale() / fps) +
+                c.get("identity", 0.0) * min(1.0, self.identity_hz * self.identity_scale() / fps))
+
+    def _model_cost(self, level):
+        # Extra per-frame work if ``level`` is undone, as if all stages shared one core
+        with self._lock:
+            c = dict(self.costs)
+        fps = max(self.fps, 1.0)
+        if level in (1, 2):
+            return c.get("emotion", 0.0) * min(1.0, 0.5 * self.emotion_hz / fps)
+        if level == 3:
+            return c.get("identity", 0.0) * min(1.0, 0.75 * self.identity_hz / fps)
+        if level == 4:
+            return c.get("render", 0.0) * (1.0 - 1.0 / self.display_every)
+        if level == 5:
+            return max(0.0, c.get("detect_full", 0.0) - c.get("detect", 0.0))
+        return 0.0
+
+    def _set(self, level, now):
+        with self._lock:
+            if level == 5 and self.level < 5:
+                # Remember the full-resolution cost so restoring it can be priced
+                self.costs["detect_full"] = self.costs.get("detect", 0.0)
+            self.level = level
+        self._last_change = now
+
+    def status(self):
+        return {"degradation": self.level, "degradation_stage": self.name}
@@ -0,0 +1,187 @@
+import bisect
+import functools
+import json
+import os
+import tempfile
+import threading
+import time
+
+# Log-spaced latency buckets: 0.1 ms .. ~13 s
+_BUCKETS = [1e-4 * (1.25 ** k) for k in range(54)]
+
+class _Histogram:
+    def __init__(self):
+        self.counts = [0] * (len(_BUCKETS) + 1)
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def observe(self, value):
+        self.counts[bisect.bisect_left(_BUCKETS, value)] += 1
+        self.count += 1
+        self.total += value
+        if value > self.max:
+            self.max = value
+
+    def quantile(self, q):
+        if not self.count:
+            return 0.0
+        rank = q * self.count
+        seen = 0
+        for i, c in enumerate(self.counts):
+            if seen + c >= rank and c:
+                lo = _BUCKETS[i - 1] if i > 0 else 0.0
+                hi = _BUCKETS[i] if i < len(_BUCKETS) else self.max
+                # Linear interpolation inside the bucket
+                return min(lo + (hi - lo) * (rank - seen) / c, self.max)
+            seen += c
+        return self.max
+
+class _NullTimer:
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+_NULL_TIMER = _NullTimer()
+
+class _Timer:
+    def __init__(self, tel, name):
+        self.tel = tel
+        self.name = name
+
+    def __enter__(self):
+        self.t0 = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.tel.observe(self.name, time.perf_counter() - self.t0)
+        return False
+
+class Telemetry:
+    """Stage latency histograms, counters and gauges with periodic file export.
+
+    Disabled by default; while disabled, ``timer`` returns a shared no-op
+    and ``observe``/``inc``/``set_gauge`` return immediately.
+    """
+
+    def __init__(self, enabled=False):
+        self.enabled = enabled
+        self._hist = {}
+        self._counters = {}
+        self._gauges = {}
+        self._lock = threading.Lock()
+        self._exporter = None
+        self._stop = threading.Event()
+        self.started_ts = time.time()
+
+    def configure(self, enabled, export_path=None, interval_sec=5.0):
+        self.enabled = enabled
+        if enabled and export_path and self._exporter is None:
+            self._stop.clear()
+            self._exporter = threading.Thread(target=self._export_loop, args=(export_path, interval_sec),
+                                              name="Telemetry", daemon=True)
+            self._exporter.start()
+
+    def timer(self, name):
+        if not self.enabled:
+            return _NULL_TIMER
+        return _Timer(self, name)
+
+    def observe(self, name, seconds):
+        if not self.enabled:
+            return
+        with self._lock:
+            h = self._hist.get(name)
+            if h is None:
+                h = self._hist[name] = _Histogram()
+            h.observe(seconds)
+
+    def inc(self, name, n=1):
+        if not self.enabled:
+            return
+        with self._lock:
+            self._counters[name] = self._counters.get(name, 0) + n
+
+    def set_gauge(self, name, value):
+        if not self.enabled:
+            return
+        self._gauges[name] = value
+
+    def snapshot(self):
+        with self._lock:
+            stages = {
+                name: {
+                    "count": h.count,
+                    "mean_ms": 1000 * h.total / h.count if h.count else 0.0,
+                    "p50_ms": 1000 * h.quantile(0.50),
+                    "p95_ms": 1000 * h.quantile(0.95),
+                    "p99_ms": 1000 * h.quantile(0.99),
+                    "max_ms": 1000 * h.max,
+                }
+                for name, h in self._hist.items()
+            }
+            return {"ts": time.time(), "uptime_sec": time.time() - self.started_ts, "latency": stages,
+                    "counters": dict(self._counters), "gauges": dict(self._gauges)}
+
+    def to_prometheus(self, snap=None):
+        snap = snap or self.snapshot()
+        lines = ["# TYPE drivemind_stage_latency_seconds summary"]
+        for name, s in sorted(snap["latency"].items()):
+            for q, key in (("0.5", "p50_ms"), ("0.95", "p95_ms"), ("0.99", "p99_ms")):
+                lines.append(f'drivemind_stage_latency_seconds{{stage="{name}",quantile="{q}"}} {s[key] / 1000:.6f}')
+            lines.append(f'drivemind_stage_latency_seconds_sum{{stage="{name}"}} {s["mean_ms"] * s["count"] / 1000:.6f}')
+            lines.append(f'drivemind_stage_latency_seconds_count{{stage="{name}"}} {s["count"]}')
+        for name, v in sorted(snap["counters"].items()):
+            lines.append(f"# TYPE drivemind_{name}_total counter")
+            lines.append(f"drivemind_{name}_total {v}")
+        for name, v in sorted(snap["gauges"].items()):
+            lines.append(f"# TYPE drivemind_{name} gauge")
+            lines.append(f"drivemind_{name} {v}")
+        return "\n".join(lines) + "\n"
+
+    def export(self, path):
+        snap = self.snapshot()
+        body = json.dumps(snap, indent=2) if path.endswith(".json") else self.to_prometheus(snap)
+        dir_name = os.path.dirname(path) or "."
+        os.makedirs(dir_name, exist_ok=True)
+        fd, tmp = tempfile.mkstemp(prefix=".metrics.", dir=dir_name)
+        with os.fdopen(fd, "w") as f:
+            f.write(body)
+        os.replace(tmp, path)
+
+    def _export_loop(self, path, interval_sec):
+        while not self._stop.wait(interval_sec):
+            try:
+                self.export(path)
+            except Exception:
+                pass
+
+    def close(self, export_path=None):
+        self._stop.set()
+        if self._exporter is not None:
+            self._exporter.join(timeout=1.0)
+            self._exporter = None
+        if self.enabled and export_path:
+            try:
+                self.export(export_path)
+            except Exception:
+                pass
+
+TELEMETRY = Telemetry()
+
+def instrumented(name):
+    # Method decorator; a single attribute check when telemetry is off
+    def deco(fn):
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            if not TELEMETRY.enabled:
+                return fn(*args, **kwargs)
+            t0 = time.perf_counter()
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                TELEMETRY.observe(name, time.perf_counter() - t0)
+        return wrapper
+    return deco
@@ -1,37 +1,153 @@
-from collections import deque
 import time
 import numpy as np
 
+COLUMNS = ("ear", "perclos", "yawn", "stress")
+ROLLUP_STATS = ("mean", "min", "max", "p95")
+
+class _Ring:
+    # Fixed-capacity, time-ordered columnar ring
+    def __init__(self, capacity, width):
+        self.capacity = max(1, int(capacity))
+        self.ts = np.zeros(self.capacity, dtype=np.float64)
+        self.values = np.zeros((self.capacity, width), dtype=np.float64)
+        self.head = 0
+        self.size = 0
+
+    def push(self, ts, row):
+        evicted = None
+        if self.size == self.capacity:
+            evicted = self.pop()
+        idx = (self.head + self.size) % self.capacity
+        self.ts[idx] = ts
+        self.values[idx] = row
+        self.size += 1
+        return evicted
+
+    def pop(self):
+        row = self.values[self.head].copy()
+        self.head = (self.head + 1) % self.capacity
+        self.size -= 1
+        return row
+
+    def grow(self, capacity):
+        # Re-lay the contents out in order at the start of larger arrays
+        idx = (self.head + np.arange(self.size)) % self.capacity
+        ts, values = np.zeros(capacity, dtype=np.float64), np.zeros((capacity, self.values.shape[1]))
+        ts[:self.size], values[:self.size] = self.ts[idx], self.values[idx]
+        self.ts, self.values, self.capacity, self.head = ts, values, capacity, 0
+
+    def oldest_ts(self):
+        return self.ts[self.head] if self.size else None
+
+    def ordered(self, start=None, end=None):
+        idx = (self.head + np.arange(self.size)) % self.capacity
+        ts = self.ts[idx]
+        lo = 0 if start is None else int(np.searchsorted(ts, start, side="left"))
+        hi = len(ts) if end is None else int(np.searchsorted(ts, end, side="right"))
+        return ts[lo:hi], self.values[idx[lo:hi]]
+
+class _Rollup:
+    # Downsampled buckets with mean/min/max/p95 per column
+    def __init__(self, bucket_sec, capacity, width):
+        self.bucket_sec = bucket_sec
+        self.width = width
+        self.ring = _Ring(capacity, width * len(ROLLUP_STATS))
+        self._bucket = None
+        self._rows = []
+
+    def add(self, ts, row):
+        b = int(ts // self.bucket_sec)
+        if self._bucket is not None and b != self._bucket:
+            self.flush()
+        self._bucket = b
+        self._rows.append(row)
+
+    def flush(self):
+        if not self._rows:
+            return
+        arr = np.asarray(self._rows)
+        stats = np.concatenate([arr.mean(axis=0), arr.min(axis=0), arr.max(axis=0),
+                                np.percentile(arr, 95, axis=0)])
+        self.ring.push(self._bucket * self.bucket_sec, stats)
+        self._rows = []
+
+    def ordered(self, start=None, end=None):
+        ts, vals = self.ring.ordered(start, end)
+        out = {"ts": ts}
+        for si, stat in enumerate(ROLLUP_STATS):
+            for ci, col in enumerate(COLUMNS):
+                out[f"{col}_{stat}"] = vals[:, si * self.width + ci]
+        return out
+
+class _DriverSeries:
+    def __init__(self, window_sec, max_fps, rollup_hours):
+        width = len(COLUMNS)
+        self.window_sec = window_sec
+        self.raw = _Ring(window_sec * max_fps, width)
+        self.sums = np.zeros(width, dtype=np.float64)
+        self.rollups = {
+            "1s": _Rollup(1, rollup_hours * 3600, width),
+            "1m": _Rollup(60, rollup_hours * 60, width),
+        }
+
+    def append(self, ts, row):
+        cutoff = ts - self.window_sec
+        while self.raw.size and self.raw.oldest_ts() < cutoff:
+            self.sums -= self.raw.pop()
+        if self.raw.size == self.raw.capacity:
+            # Frames arrive faster than max_fps: grow rather than shrink the window
+            self.raw.grow(2 * self.raw.capacity)
+        evicted = self.raw.push(ts, row)
+        if evicted is not None:
+            self.sums -= evicted
+        self.sums += row
+        for r in self.rollups.values():
+            r.add(ts, row)
+
 class TrendBuffer:
-    def __init__(self, window_minutes=30):
+    def __init__(self, window_minutes=30, max_fps=30, rollup_hours=12):
         self.window_sec = window_minutes * 60
+        self.max_fps = max_fps
+        self.rollup_hours = rollup_hours
         self.store = {}
 
-    def update(self, identity, metrics, stress):
+    def update(self, identity, metrics, stress, ts=None):
         key = identity or "unknown"
-        now = time.time()
+        now = time.time() if ts is None else ts
         buf = self.store.get(key)
         if buf is None:
-            buf = deque()
+            buf = _DriverSeries(self.window_sec, self.max_fps, self.rollup_hours)
             self.store[key] = buf
-        buf.append((now, metrics, stress))
-        # prune
-        while buf and now - buf[0][0] > self.window_sec:
-            buf.popleft()
+        row = np.array([metrics.get("ear_avg", 0.0), metrics.get("perclos", 0.0),
+                        metrics.get("yawn", 0.0), stress.get("stress_score", 0.0)], dtype=np.float64)
+        buf.append(now, row)
 
     def summary(self, identity):
         key = identity or "unknown"
-        buf = self.store.get(key, [])
-        if not buf:
+        buf = self.store.get(key)
+        if buf is None or not buf.raw.size:
             return {}
-        ears = [b[1].get("ear_avg", 0.0) for b in buf]
-        percloses = [b[1].get("perclos", 0.0) for b in buf]
-        yawns = [b[1].get("yawn", 0.0) for b in buf]
-        stresses = [b[2].get("stress_score", 0.0) for b in buf]
+        means = buf.sums / buf.raw.size
         return {
-            "ear_mean": float(np.mean(ears)),
-            "perclos_mean": float(np.mean(percloses)),
-            "yawn_mean": float(np.mean(yawns)),
-            "stress_mean": float(np.mean(stresses)),
-            "samples": len(buf)
-        }
\ No newline at end of file
+            "ear_mean": float(means[0]),
+            "perclos_mean": float(means[1]),
+            "yawn_mean": float(means[2]),
+            "stress_mean": float(means[3]),
+            "samples": buf.raw.size
+        }
+
+    def series(self, identity, start=None, end=None, resolution="raw"):
+        """Time-range slice for plotting; resolution is "raw", "1s" or "1m"."""
+        key = identity or "unknown"
+        buf = self.store.get(key)
+        if buf is None:
+            return {}
+        if resolution == "raw":
+            ts, vals = buf.raw.ordered(start, end)
+            out = {"ts": ts}
+            for ci, col in enumerate(COLUMNS):
+                out[col] = vals[:, ci]
+            return out
+        if resolution not in buf.rollups:
+            raise ValueError(f"Unknown resolution: {resolution}")
+        return buf.rollups[resolution].ordered(start, end)
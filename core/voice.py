@@ -0,0 +1,112 @@
+import heapq
+import itertools
+import threading
+import time
+
+PRIORITY = {"none": 0, "medium": 1, "high": 2}
+
+class NullBackend:
+    # Headless: remembers what would have been said
+    def __init__(self):
+        self.spoken = []
+
+    def speak(self, msg):
+        self.spoken.append(msg)
+
+class FileBackend:
+    def __init__(self, path):
+        self.path = path
+
+    def speak(self, msg):
+        with open(self.path, "a") as f:
+            f.write(f"{time.time():.3f}\t{msg}\n")
+
+class Pyttsx3Backend:
+    # pyttsx3 engines are not thread-safe; the engine is created lazily on the speaking thread
+    def __init__(self, rate=170, volume=0.85):
+        self.rate = rate
+        self.volume = volume
+        self.engine = None
+
+    def speak(self, msg):
+        if self.engine is None:
+            import pyttsx3
+            self.engine = pyttsx3.init()
+            self.engine.setProperty('rate', self.rate)
+            self.engine.setProperty('volume', self.volume)
+        self.engine.say(msg)
+        self.engine.runAndWait()
+
+def make_backend(name, path=None):
+    if name == "null":
+        return NullBackend()
+    if name == "file":
+        return FileBackend(path)
+    if name == "pyttsx3":
+        return Pyttsx3Backend()
+    raise ValueError(f"Unknown voice backend: {name}")
+
+class VoiceQueue:
+    """Speaks messages on a dedicated thread, highest priority first.
+
+    Submitting a message that is already queued only refreshes its TTL; a
+    higher-priority message discards queued lower-priority ones; messages
+    whose TTL expires before their turn are dropped. Dedup and pre-emption
+    only apply within one ``channel`` (a cabin, when several streams share
+    the speaker); channels are spoken in submission order at equal priority.
+    """
+
+    def __init__(self, backend, default_ttl_sec=10.0):
+        self.backend = backend
+        self.default_ttl_sec = default_ttl_sec
+        self.stats = {"submitted": 0, "spoken": 0, "deduped": 0, "preempted": 0, "expired": 0}
+        self._heap = []
+        self._seq = itertools.count()
+        self._cond = threading.Condition()
+        self._stop = False
+        self._worker = threading.Thread(target=self._run, name="VoiceQueue", daemon=True)
+        self._worker.start()
+
+    def submit(self, msg, priority=1, ttl_sec=None, channel=None):
+        expires = time.time() + (self.default_ttl_sec if ttl_sec is None else ttl_sec)
+        with self._cond:
+            self.stats["submitted"] += 1
+            for i, (neg_prio, seq, queued_msg, _, ch) in enumerate(self._heap):
+                if queued_msg == msg and ch == channel:
+                    self._heap[i] = (min(neg_prio, -priority), seq, msg, expires, ch)
+                    heapq.heapify(self._heap)
+                    self.stats["deduped"] += 1
+                    return
+            kept = [item for item in self._heap if item[4] != channel or -item[0] >= priority]
+            self.stats["preempted"] += len(self._heap) - len(kept)
+            self._heap = kept
+            heapq.heapify(self._heap)
+            heapq.heappush(self._heap, (-priority, next(self._seq), msg, expires, channel))
+            self._cond.notify()
+
+    def pending(self):
+        with self._cond:
+            return len(self._heap)
+
+    def _run(self):
+        while True:
+            with self._cond:
+                while not self._heap and not self._stop:
+                    self._cond.wait()
+                if self._stop and not self._heap:
+                    return
+                _, _, msg, expires, _ = heapq.heappop(self._heap)
+            if time.time() > expires:
+                self.stats["expired"] += 1
+                continue
+            try:
+                self.backend.speak(msg)
+                self.stats["spoken"] += 1
+            except Exception:
+                pass
+
+    def close(self, timeout=5.0):
+        with self._cond:
+            self._stop = True
+            self._cond.notify_all()
+        self._worker.join(timeout=timeout)
@@ -0,0 +1,85 @@
+import threading
+import time
+from contextlib import contextmanager
+
+PHASES = ("import", "load", "first_inference")
+
+class StartupTimer:
+    """Per-component import/load/first-inference durations, for the startup report."""
+
+    def __init__(self):
+        self.t0 = time.perf_counter()
+        self.timings = {}
+        self.marks = {}
+        self._lock = threading.Lock()
+
+    def record(self, component, phase, seconds):
+        with self._lock:
+            self.timings.setdefault(component, {})[phase] = seconds
+
+    @contextmanager
+    def timer(self, component, phase):
+        t0 = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(component, phase, time.perf_counter() - t0)
+
+    def mark(self, name):
+        # Seconds since process start (module import), first call wins
+        with self._lock:
+            self.marks.setdefault(name, time.perf_counter() - self.t0)
+
+    def report(self):
+        with self._lock:
+            timings = {c: dict(p) for c, p in self.timings.items()}
+            marks = dict(self.marks)
+        lines = [f"{'startup (ms)':18s}" + "".join(f"{p:>17s}" for p in PHASES)]
+        for component, phases in timings.items():
+            cells = "".join(f"{1000 * phases[p]:17.1f}" if p in phases else f"{'-':>17s}" for p in PHASES)
+            lines.append(f"{component:18s}{cells}")
+        for name, sec in sorted(marks.items(), key=lambda kv: kv[1]):
+            lines.append(f"{name} at {1000 * sec:.0f} ms after launch")
+        return "\n".join(lines)
+
+STARTUP = StartupTimer()
+
+class ModelStage:
+    """Base for stages backed by a heavy model that can load in the background.
+
+    Subclasses implement ``_load`` (import, build, one throwaway inference,
+    timed under ``STARTUP``). ``ready`` turns true once loading has finished,
+    successfully or not; until then callers skip the stage or use its
+    fallback.
+    """
+
+    component = "model"
+
+    def _init_loading(self):
+        self._loaded = threading.Event()
+        self._load_thread = None
+        self.load_error = None
+
+    @property
+    def ready(self):
+        return self._loaded.is_set()
+
+    def load(self):
+        if self._loaded.is_set():
+            return
+        try:
+            self._load()
+        except Exception as e:
+            self.load_error = e
+        finally:
+            self._loaded.set()
+
+    def warm_up(self):
+        """Load on a background thread; returns immediately."""
+        if self._load_thread is None and not self._loaded.is_set():
+            self._load_thread = threading.Thread(target=self.load, name=f"Warmup-{self.component}", daemon=True)
+            self._load_thread.start()
+        return self
+
+    def wait_ready(self, timeout=None):
+        return self._loaded.wait(timeout)
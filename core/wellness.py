@@ -1,27 +1,47 @@
 import time
-import csv
-import os
-import pyttsx3
+from core.events import EventSink
+from core.telemetry import instrumented
+from core.voice import PRIORITY, VoiceQueue, make_backend
+
+def make_event_sink(cfg):
+    return EventSink(
+        cfg.events_log_path,
+        async_mode=cfg.events_async,
+        max_bytes=cfg.events_max_bytes,
+        rotate_interval_sec=cfg.events_rotate_sec,
+        backup_count=cfg.events_backup_count,
+        collapse=cfg.events_collapse,
+        columnar=cfg.events_columnar,
+    )
+
+def make_voice_queue(cfg):
+    # None when voice is off or the backend cannot start
+    if not cfg.enable_voice:
+        return None
+    try:
+        return VoiceQueue(make_backend(cfg.voice_backend, cfg.voice_log_path), default_ttl_sec=cfg.voice_ttl_sec)
+    except Exception:
+        return None
 
 class WellnessOrchestrator:
-    def __init__(self, config, thresholds_manager):
+    def __init__(self, config, thresholds_manager, log_events=True, load_shedder=None, stream=None,
+                 events=None, voice=None):
+        # stream: camera/cabin id for the event log and voice channel; events/voice: a sink and queue
+        # shared by several orchestrators (fleet), used as given and left open by close()
         self.cfg = config
         self.tman = thresholds_manager
-        self.voice = None
-        if self.cfg.enable_voice:
-            try:
-                self.voice = pyttsx3.init()
-                self.voice.setProperty('rate', 170)
-                self.voice.setProperty('volume', 0.85)
-            except Exception:
-                self.voice = None
-        os.makedirs(os.path.dirname(self.cfg.events_log_path), exist_ok=True)
-        if not os.path.exists(self.cfg.events_log_path):
-            with open(self.cfg.events_log_path, "w", newline="") as f:
-                writer = csv.writer(f)
-                writer.writerow(["ts", "driver", "alert_level", "reason", "ear", "perclos", "yawn", "stress"])
+        self.load_shedder = load_shedder
+        self.stream = stream
+        self._owns_voice = voice is None
+        self._owns_events = events is None
+        self.voice = make_voice_queue(config) if voice is None else voice
+        self.events = None
+        if log_events:
+            self.events = make_event_sink(config) if events is None else events
 
-    def evaluate(self, identity, metrics, stress, per_driver):
+    @instrumented("wellness.evaluate")
+    def evaluate(self, identity, metrics, stress, per_driver, ts=None):
+        # ts: event time for the log (default now); sources processed faster than real time pass theirs
         ear = metrics.get("ear_avg", 0.0)
         perclos = metrics.get("perclos", 0.0)
         yawn = metrics.get("yawn", 0.0)
@@ -38,26 +58,38 @@ class WellnessOrchestrator:
             reasons.append("Low EAR")
         if yawn > yawn_thr:
             reasons.append("Yawn")
+        if metrics.get("microsleep"):
+            reasons.append("Microsleep")
         if stress_score > 0.7:
             reasons.append("High stress")
 
         alert_level = "none"
-        if len(reasons) >= 2 or perclos > perclos_thr + 0.1:
+        if len(reasons) >= 2 or perclos > perclos_thr + 0.1 or "Microsleep" in reasons:
             alert_level = "high"
         elif reasons:
             alert_level = "medium"
 
         needs_intervention = alert_level in ("medium", "high")
         if needs_intervention:
-            self._log(identity, alert_level, ",".join(reasons), ear, perclos, yawn, stress_score)
+            self._log(identity, alert_level, ",".join(reasons), ear, perclos, yawn, stress_score, ts)
             self.tman.adapt(identity, metrics)
-        return {"alert_level": alert_level, "needs_intervention": needs_intervention, "reasons": reasons}
+        if self.events:
+            # Advances this stream's clock; a burst that just ended is closed without waiting for the next alert
+            self.events.tick(ts, self.stream)
+        status = {"alert_level": alert_level, "needs_intervention": needs_intervention, "reasons": reasons,
+                  "degradation": 0, "degradation_stage": "full"}
+        if self.load_shedder is not None:
+            status.update(self.load_shedder.status())
+        return status
 
+    @instrumented("wellness.nudge")
     def nudge(self, identity, status, metrics, stress):
         # Consistent, brief suggestions
         msg = None
         reasons = status.get("reasons", [])
-        if "High PERCLOS" in reasons or "Low EAR" in reasons:
+        if "Microsleep" in reasons:
+            msg = "Your eyes closed for too long. Pull over safely and rest."
+        elif "High PERCLOS" in reasons or "Low EAR" in reasons:
             msg = "You seem drowsy. If safe, take a short break or drink water."
         elif "Yawn" in reasons:
             msg = "Yawning detected. Consider a quick pause when safe."
@@ -66,20 +98,18 @@ class WellnessOrchestrator:
         else:
             msg = "Maintain safe driving. You're doing fine."
 
-        # Voice (brief, single sentence), no repeated nags
+        # Voice (brief, single sentence), no repeated nags; spoken off the detection thread
         if self.voice:
-            try:
-                self.voice.say(msg)
-                self.voice.runAndWait()
-            except Exception:
-                pass
+            self.voice.submit(msg, priority=PRIORITY.get(status.get("alert_level"), 1), channel=self.stream)
 
-    def _log(self, identity, alert_level, reason, ear, perclos, yawn, stress):
-        ts = int(time.time())
+    def _log(self, identity, alert_level, reason, ear, perclos, yawn, stress, ts=None):
+        ts = time.time() if ts is None else ts
         driver_label = identity if not self.cfg.privacy_anonymize_logs else "driver"
-        try:
-            with open(self.cfg.events_log_path, "a", newline="") as f:
-                writer = csv.writer(f)
-                writer.writerow([ts, driver_label, alert_level, reason, f"{ear:.3f}", f"{perclos:.3f}", f"{yawn:.1f}", f"{stress:.2f}"])
-        except Exception:
-            pass
\ No newline at end of file
+        if self.events:
+            self.events.emit(ts, driver_label, alert_level, reason, ear, perclos, yawn, stress, stream=self.stream)
+
+    def close(self):
+        if self.voice and self._owns_voice:
+            self.voice.close()
+        if self.events and self._owns_events:
+            self.events.close()
\ No newline at end of file
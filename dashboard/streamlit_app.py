@@ -1,5 +1,4 @@
 import time
-import cv2
 import streamlit as st
 
 import os, sys
@@ -7,15 +6,11 @@ import os, sys
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 from config import CONFIG
-from core.camera import VideoSource
-from core.landmarks import LandmarkDetector
-from core.fatigue import FatigueAnalyzer
-from core.emotion import EmotionAnalyzer
-from core.driver_id import DriverIdentifier
-from core.profiling import ThresholdManager
-from core.privacy import apply_privacy
-from core.trend import TrendBuffer
-from core.wellness import WellnessOrchestrator
+from core.analytics import EventIndex
+from core.feed import FeedReader
+
+# Read-only viewer: the analysis runs in `python app.py --publish [--headless]`.
+# Reruns (any widget change) only re-attach to the shared-memory feed.
 
 st.set_page_config(page_title="DriveMind Dashboard", layout="wide")
 
@@ -23,80 +18,103 @@ st.title("🚗 DriveMind — Driver Wellness Monitoring")
 
 col_left, col_right = st.columns([2, 1])
 
-source = st.sidebar.text_input("Camera index or video path", str(CONFIG.camera_source))
-enable_blur = st.sidebar.checkbox("Privacy blur", value=CONFIG.enable_privacy_blur)
-run = st.sidebar.checkbox("Run")
+feed_name = st.sidebar.text_input("Feed name", CONFIG.feed_name)
+refresh_fps = st.sidebar.slider("Refresh rate (fps)", 1, 30, int(CONFIG.feed_display_fps))
+show_telemetry = st.sidebar.checkbox("Stage latency", value=CONFIG.telemetry_enabled)
+run = st.sidebar.checkbox("Live view", value=True)
 
 video_placeholder = col_left.empty()
 metrics_placeholder = col_right.empty()
 trend_placeholder = col_right.empty()
+chart_placeholder = col_right.empty()
+telemetry_placeholder = col_right.empty()
 alert_placeholder = st.empty()
 
+@st.cache_resource
+def get_reader(name):
+    return FeedReader(name, stale_sec=CONFIG.feed_stale_sec)
+
+@st.cache_resource
+def get_event_index(log_path, index_path):
+    return EventIndex(log_path, index_path)
+
+# History: alert events from the log, via the incremental index (only new rows are read on each rerun)
+with st.expander("📈 History", expanded=False):
+    index = get_event_index(CONFIG.events_log_path, CONFIG.analytics_index_path)
+    index.update()
+    h_left, h_mid, h_right = st.columns(3)
+    days = h_left.selectbox("Range", [1, 7, 30, 90], index=1, format_func=lambda d: f"Last {d} day(s)")
+    driver = h_mid.selectbox("Driver", ["All"] + index.drivers())
+    resolution = h_right.selectbox("Buckets", ["hour", "day"], index=0 if days <= 7 else 1)
+    end = time.time()
+    start = end - days * 86400
+    who = None if driver == "All" else driver
+    totals = index.totals(start, end, who)
+    st.markdown(f"**Alerts:** {totals['medium']} medium, {totals['high']} high  \n"
+                f"**Time in alert:** {totals['duration_sec'] / 60:.1f} min")
+    st.caption(f"Buckets are UTC; {index.rows} logged alerts indexed.")
+    buckets = index.counts(start, end, who, resolution)
+    if buckets:
+        labels = [time.strftime("%Y-%m-%d %H:00" if resolution == "hour" else "%Y-%m-%d", time.gmtime(b))
+                  for b in buckets]
+        st.bar_chart({"medium": dict(zip(labels, [r["medium"] for r in buckets.values()])),
+                      "high": dict(zip(labels, [r["high"] for r in buckets.values()]))})
+        r_col, p_col = st.columns(2)
+        r_col.table({reason: {"alerts": n} for reason, n in index.reason_frequencies(start, end, who, top=10)})
+        pct = index.percentiles(start, end, who)
+        p_col.table({m: {f"p{int(q * 100)}": (round(v, 3) if v is not None else None) for q, v in qs.items()}
+                     for m, qs in pct.items()})
+    else:
+        st.info("No alert events in this range.")
+
 if run:
-    cam = VideoSource(int(source) if source.isdigit() else source)
-    lmk = LandmarkDetector(CONFIG.dlib_landmarks_path)
-    fatigue = FatigueAnalyzer(
-        ear_thresh=CONFIG.ear_drowsy_thresh,
-        perclos_thresh=CONFIG.perclos_drowsy_thresh,
-        yawn_thresh=CONFIG.yawn_thresh,
-        window_sec=CONFIG.fatigue_window_sec
-    )
-    emotion = EmotionAnalyzer()
-    driver_id = DriverIdentifier(CONFIG.drivers_dir)
-    thresholds = ThresholdManager(CONFIG.thresholds_path)
-    trends = TrendBuffer(window_minutes=CONFIG.trend_window_minutes)
-    orchestrator = WellnessOrchestrator(CONFIG, thresholds)
-
-    last_intervention_ts = 0
-    for frame in cam.frames():
-        face_rects, landmarks = lmk.detect(frame)
-        identity = driver_id.identify(frame, face_rects)
-        per_driver = thresholds.get_for_driver(identity)
-
-        metrics = fatigue.update(frame, face_rects, landmarks)
-        stress = emotion.estimate(frame, face_rects)
-        trends.update(identity, metrics, stress)
-
-        status = orchestrator.evaluate(identity, metrics, stress, per_driver)
-
-        display_frame = apply_privacy(frame.copy(), face_rects, enable_blur)
-        for (x, y, w, h) in face_rects:
-            cv2.rectangle(display_frame, (x, y), (x + w, y + h), (0, 255, 0), 2)
-
-        hud = f"{identity or 'Unknown'} | EAR:{metrics.get('ear_avg',0):.2f} PERCLOS:{metrics.get('perclos',0):.2f} Yawn:{metrics.get('yawn',0):.1f} Stress:{stress.get('stress_score',0):.2f}"
-        cv2.putText(display_frame, hud, (10, 30), cv2.FONT_HERSHEY_SIMPLEX, 0.6, (255, 255, 255), 2)
+    reader = get_reader(feed_name)
+    last_seq = None
+    while True:
+        item = reader.latest()
+        if item is None:
+            alert_placeholder.info(f"Waiting for the DriveMind runtime (python app.py --publish) on feed '{feed_name}'...")
+            time.sleep(1.0)
+            continue
+        seq, ts, jpeg, meta = item
+        if seq == last_seq:
+            time.sleep(1.0 / refresh_fps)
+            continue
+        last_seq = seq
+
+        identity, metrics, stress, status = meta["identity"], meta["metrics"], meta["stress"], meta["status"]
+        # Already annotated and JPEG-encoded by the runtime
+        video_placeholder.image(jpeg, use_container_width=True)
 
         if status.get("needs_intervention"):
-            cv2.putText(display_frame, "⚠️ ALERT: " + status["alert_level"].upper(), (10, 60),
-                        cv2.FONT_HERSHEY_SIMPLEX, 0.8, (0, 0, 255), 3)
-
-            now = time.time()
-            if now - last_intervention_ts > CONFIG.intervention_min_interval_sec:
-                orchestrator.nudge(identity, status, metrics, stress)
-                last_intervention_ts = now
-
             alert_placeholder.error(f"⚠️ {identity or 'Driver'}: {status['alert_level'].upper()} alert — {', '.join(status['reasons'])}")
         else:
             alert_placeholder.success("🟢 Status: Normal")
 
-        video_placeholder.image(cv2.cvtColor(display_frame, cv2.COLOR_BGR2RGB), channels="RGB", use_container_width=True)
-
         metrics_placeholder.markdown(f"""
 **Driver:** {identity or 'Unknown'}  
 **EAR avg:** {metrics.get('ear_avg',0):.2f}  
 **PERCLOS:** {metrics.get('perclos',0):.2f}  
-**Yawn:** {metrics.get('yawn',0):.1f}  
+**Yawn:** {metrics.get('yawn',0):.2f}  
 **Stress score:** {stress.get('stress_score',0):.2f}  
+**Load shedding:** {status.get('degradation_stage','full')} (level {status.get('degradation',0)})  
+**Feed age:** {(time.time() - ts) * 1000:.0f} ms  
 """)
 
-        summ = trends.summary(identity)
+        summ = meta["summary"]
         trend_placeholder.markdown(f"""
 **Trend samples:** {summ.get('samples',0)}  
 **EAR mean:** {summ.get('ear_mean',0):.2f}  
 **PERCLOS mean:** {summ.get('perclos_mean',0):.2f}  
-**Yawn mean:** {summ.get('yawn_mean',0):.1f}  
+**Yawn mean:** {summ.get('yawn_mean',0):.2f}  
 **Stress mean:** {summ.get('stress_mean',0):.2f}  
 """)
 
-        time.sleep(0.01)
-    cam.release()
\ No newline at end of file
+        # The runtime attaches the 1 s rollups for the last 5 minutes once per second
+        ser = meta.get("series")
+        if ser and len(ser.get("ts", [])):
+            chart_placeholder.line_chart({"EAR": ser["ear_mean"], "PERCLOS": ser["perclos_mean"]})
+        if show_telemetry and meta.get("telemetry"):
+            telemetry_placeholder.table(meta["telemetry"])
+
+        time.sleep(1.0 / refresh_fps)
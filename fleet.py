@@ -0,0 +1,71 @@
+import argparse
+import csv
+import os
+import time
+from config import CONFIG
+from core.fleet import FleetRuntime
+
+COLUMNS = ["seq", "ts", "faces", "ear_avg", "perclos", "yawn", "identity", "dominant_emotion", "stress_score",
+           "alert_level", "reasons"]
+
+def main():
+    parser = argparse.ArgumentParser(description="DriveMind fleet runtime: several cameras, one set of models")
+    parser.add_argument("sources", nargs="+", help="Camera indexes or video paths, one per cabin")
+    parser.add_argument("--no-voice", action="store_true", help="Disable voice suggestions")
+    parser.add_argument("--out", help="Write one CSV of per-frame results per stream to this directory")
+    parser.add_argument("--max-batch", type=int, default=CONFIG.fleet_max_batch)
+    parser.add_argument("--batch-wait-ms", type=float, default=CONFIG.fleet_batch_wait_ms)
+    parser.add_argument("--telemetry", action="store_true", help="Record stage latencies and export them")
+    args = parser.parse_args()
+
+    CONFIG.enable_voice = not args.no_voice
+    CONFIG.telemetry_enabled = CONFIG.telemetry_enabled or args.telemetry
+    sources = [int(s) if s.isdigit() else s for s in args.sources]
+    fleet = FleetRuntime(sources, CONFIG, max_batch=args.max_batch, batch_wait_ms=args.batch_wait_ms,
+                         queue_size=CONFIG.fleet_queue_size)
+
+    writers, files = {}, []
+    if args.out:
+        os.makedirs(args.out, exist_ok=True)
+        for i in range(len(sources)):
+            f = open(os.path.join(args.out, f"stream{i}.csv"), "w", newline="")
+            files.append(f)
+            writers[i] = csv.writer(f)
+            writers[i].writerow(COLUMNS)
+
+    print(f"DriveMind fleet started with {len(sources)} stream(s). Ctrl+C to quit.")
+    t0 = last_report = time.perf_counter()
+    total = 0
+    try:
+        for res in fleet.results():
+            total += 1
+            if args.out:
+                m, st, status = res["metrics"], res["stress"], res["status"]
+                writers[res["stream"]].writerow([
+                    res["seq"], f"{res['ts']:.6f}", len(res["face_rects"]), f"{m.get('ear_avg', 0):.6f}",
+                    f"{m.get('perclos', 0):.6f}", f"{m.get('yawn', 0):.3f}", res["identity"] or "",
+                    st["dominant_emotion"], f"{st['stress_score']:.3f}", status["alert_level"],
+                    ",".join(status["reasons"])])
+            now = time.perf_counter()
+            if now - last_report >= 5.0:
+                per = ", ".join(f"#{s['stream']}:{s['frames']}" for s in fleet.stats()["streams"])
+                print(f"{total / (now - t0):.1f} FPS total ({per})")
+                last_report = now
+    except KeyboardInterrupt:
+        print("Exiting DriveMind fleet...")
+    finally:
+        fleet.stop()
+        for f in files:
+            f.close()
+        elapsed = time.perf_counter() - t0
+        stats = fleet.stats()
+        for s in stats["streams"]:
+            err = f" error: {s['error']}" if s["error"] else ""
+            print(f"stream {s['stream']} ({s['source']}): {s['frames']} frames, {s['alerts']} alerts{err}")
+        for name in ("identity", "emotion"):
+            b, n = stats[f"{name}_batches"], stats[f"{name}_items"]
+            print(f"{name}: {n} crops in {b} batches ({n / b if b else 0:.1f} per batch)")
+        print(f"{total} frames in {elapsed:.1f}s ({total / elapsed if elapsed else 0:.1f} FPS)")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,48 @@
+import argparse
+import dataclasses
+import time
+from config import CONFIG
+from core.fatigue import FatigueAnalyzer
+from core.profiling import ThresholdManager
+from core.recording import replay
+from core.trend import TrendBuffer
+from core.wellness import WellnessOrchestrator
+
+def main():
+    parser = argparse.ArgumentParser(description="Replay a landmark recording through the fatigue/alert rules")
+    parser.add_argument("recording", help="File written by app.py --record")
+    parser.add_argument("--driver", default=None, help="Identity to attribute the recording to")
+    parser.add_argument("--ear-thresh", type=float, default=CONFIG.ear_drowsy_thresh)
+    parser.add_argument("--perclos-thresh", type=float, default=CONFIG.perclos_drowsy_thresh)
+    parser.add_argument("--yawn-thresh", type=float, default=CONFIG.yawn_thresh)
+    parser.add_argument("--window-sec", type=int, default=CONFIG.fatigue_window_sec)
+    args = parser.parse_args()
+
+    cfg = dataclasses.replace(CONFIG, enable_voice=False, ear_drowsy_thresh=args.ear_thresh,
+                              perclos_drowsy_thresh=args.perclos_thresh, yawn_thresh=args.yawn_thresh)
+    fatigue = FatigueAnalyzer(
+        ear_thresh=cfg.ear_drowsy_thresh,
+        perclos_thresh=cfg.perclos_drowsy_thresh,
+        yawn_thresh=cfg.yawn_thresh,
+        window_sec=args.window_sec
+    )
+    # Read-only thresholds: replays must not adapt the live per-driver profile
+    thresholds = ThresholdManager(cfg.thresholds_path, read_only=True)
+    orchestrator = WellnessOrchestrator(cfg, thresholds, log_events=False)
+    trends = TrendBuffer(window_minutes=cfg.trend_window_minutes)
+
+    t0 = time.perf_counter()
+    counts = replay(args.recording, fatigue, trends, orchestrator, identity=args.driver,
+                    per_driver=thresholds.get_for_driver(args.driver))
+    elapsed = time.perf_counter() - t0
+    orchestrator.close()
+
+    n = counts["frames"]
+    print(f"Replayed {n} frames in {elapsed:.2f}s ({n / elapsed if elapsed else 0:.0f} FPS)")
+    for level in ("none", "medium", "high"):
+        print(f"  {level:6s} {counts[level]:8d} ({100 * counts[level] / max(1, n):.1f}%)")
+    print(f"  blinks {fatigue.blink_count}, microsleeps {fatigue.microsleep_count}")
+    print("Trend summary:", trends.summary(args.driver))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,43 @@
+import os, sys
+# Run from anywhere: the modules live at the repository root
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import cv2
+import numpy as np
+import pytest
+
+from bench.synthetic import face_landmarks, face_rect
+
+FPS = 30
+
+class FrameLandmarks:
+    """Stands in for dlib: eye and mouth opening are read back from the frame's brightness."""
+
+    def detect(self, frame, ctx=None):
+        left, right = frame[:, :32].mean() / 255.0, frame[:, 32:].mean() / 255.0
+        shape = face_landmarks(eye_open=left, mouth_open=right)
+        return [face_rect(shape)], [shape]
+
+    def reset(self):
+        pass
+
+def write_clip(path, eye, mouth):
+    writer = cv2.VideoWriter(path, cv2.VideoWriter_fourcc(*"MJPG"), FPS, (64, 48))
+    for e, m in zip(eye, mouth):
+        frame = np.zeros((48, 64, 3), dtype=np.uint8)
+        frame[:, :32] = int(255 * e)
+        frame[:, 32:] = int(255 * m)
+        writer.write(frame)
+    writer.release()
+    return path
+
+@pytest.fixture
+def clip(tmp_path):
+    # 20 s with blinks, a yawn and a long closure
+    n = 20 * FPS
+    eye, mouth = np.ones(n), np.zeros(n)
+    for s in range(1, 20, 3):
+        eye[s * FPS:s * FPS + 5] = 0.1
+    eye[12 * FPS:14 * FPS] = 0.05
+    mouth[6 * FPS:9 * FPS] = np.sin(np.linspace(0, np.pi, 3 * FPS))
+    return write_clip(str(tmp_path / "clip.avi"), eye, mouth)
@@ -0,0 +1,56 @@
+import os
+import threading
+
+from core.analytics import EventIndex
+from core.events import CSV_HEADER
+
+T0 = 1_700_000_000
+
+def _write(path, rows, start=0, header=True):
+    with open(path, "a") as f:
+        if header:
+            f.write(",".join(CSV_HEADER) + "\n")
+        for i in range(rows):
+            # One driver per hour, so new rows keep adding dictionary keys
+            f.write(f"{T0 + 3600 * (start + i)},d{start + i},high,Yawn,0.2,0.5,0.7,0.3,1.0,\n")
+
+def test_rotated_past_backups_ingests_the_rest(tmp_path, capsys):
+    log = str(tmp_path / "events.log")
+    index = EventIndex(log, str(tmp_path / "index.json"))
+    _write(log, 3)
+    assert index.update() == 3
+    # Two rotations with backup_count=1 between updates: the indexed file is gone
+    os.remove(log)
+    _write(log + ".1", 4, start=3)
+    _write(log, 2, start=7)
+    assert index.update() == 6
+    assert "Warning" in capsys.readouterr().out
+    assert sum(v["high"] for v in index.counts(T0, T0 + 9 * 3600).values()) == 9
+
+def test_queries_during_updates(tmp_path):
+    log = str(tmp_path / "events.log")
+    index = EventIndex(log, str(tmp_path / "index.json"))
+    _write(log, 1)
+    index.update()
+    errors, done = [], threading.Event()
+
+    def query():
+        try:
+            while not done.is_set():
+                index.counts(T0, T0 + 10 ** 7)
+                index.percentiles(T0, T0 + 10 ** 7)
+                index.drivers()
+        except Exception as e:
+            errors.append(e)
+
+    readers = [threading.Thread(target=query) for _ in range(2)]
+    for t in readers:
+        t.start()
+    for i in range(1, 300):
+        _write(log, 5, start=5 * i, header=False)
+        index.update()
+    done.set()
+    for t in readers:
+        t.join()
+    assert not errors
+    assert index.rows == 5 * 299 + 1
@@ -0,0 +1,48 @@
+import dataclasses
+import numpy as np
+import pytest
+
+import batch
+from config import CONFIG
+from core.emotion import EmotionAnalyzer
+from core.profiling import ThresholdManager
+from conftest import FPS, FrameLandmarks
+
+@pytest.fixture
+def worker(tmp_path):
+    cfg = dataclasses.replace(CONFIG, enable_voice=False, fatigue_window_sec=2)
+    batch._WORKER.update(cfg=cfg, lmk=FrameLandmarks(), emotion=EmotionAnalyzer(lazy=True),
+                         thresholds=ThresholdManager(str(tmp_path / "thresholds.json"), read_only=True))
+    yield cfg
+    batch._WORKER.clear()
+
+def _run(tasks):
+    rows = {}
+    for res in sorted(map(batch.process_segment, tasks), key=lambda r: r["index"]):
+        for k, v in res["rows"].items():
+            rows.setdefault(k, []).extend(v)
+    return rows
+
+def test_segments_match_sequential_run(clip, worker):
+    fps, n_frames = batch.video_info(clip)
+    warmup_sec = worker.fatigue_window_sec + 5
+    sequential = _run(batch.plan_segments(clip, fps, n_frames, 1e9, warmup_sec))
+    tasks = batch.plan_segments(clip, fps, n_frames, 4, warmup_sec)
+    assert len(tasks) == 5
+    assert sequential["frame"] == list(range(n_frames))
+    assert _run(tasks) == sequential
+    assert "high" in sequential["alert_level"]
+    assert len(sequential["pitch"]) == n_frames
+
+def test_unknown_frame_count_reads_to_eof(clip, worker):
+    fps, n_frames = batch.video_info(clip)
+    tasks = batch.plan_segments(clip, fps, 0, 4, 7)
+    assert len(tasks) == 1 and tasks[0]["end"] is None
+    assert _run(tasks) == _run(batch.plan_segments(clip, fps, n_frames, 1e9, 7))
+
+def test_read_frames_from_offset(clip):
+    frames = list(batch.read_frames(clip))
+    for start in (1, 95, len(frames) - 1):
+        tail = list(batch.read_frames(clip, start, FPS))
+        assert len(tail) == len(frames) - start
+        assert all(np.array_equal(a, b) for a, b in zip(tail, frames[start:]))
@@ -0,0 +1,83 @@
+import numpy as np
+import pytest
+
+from core.calibration import ALERT, DROWSY, UNLABELED, best_thresholds, evaluate_grid
+
+EAR_GRID = [0.3, 0.2, 0.25, 0.15, 0.25]  # unsorted, with a duplicate
+PERCLOS_GRID = [0.1, 0.3, 0.5]
+YAWN_GRID = [0.4, 0.6]
+
+def _metrics(rng, n):
+    # Values on the grid's own steps, so many frames sit exactly on a threshold
+    return {
+        "ts": np.arange(n, dtype=np.float64),
+        "ear": rng.choice([0.1, 0.15, 0.2, 0.25, 0.3, 0.35], n),
+        "perclos": rng.choice([0.0, 0.1, 0.3, 0.5, 0.7], n),
+        "yawn": rng.choice([0.2, 0.4, 0.6, 0.8], n),
+        "always": rng.random(n) < 0.05,
+    }
+
+def _naive(m, labels):
+    """The evaluate() rules applied frame by frame, one threshold combination at a time."""
+    grids = [np.sort(np.asarray(g, dtype=np.float64)) for g in (EAR_GRID, PERCLOS_GRID, YAWN_GRID)]
+    shape = tuple(len(g) for g in grids)
+    out = {k: np.zeros(shape) for k in ("precision", "recall", "f1", "alert_rate")}
+    n_pos = int((labels == DROWSY).sum())
+    for i, e in enumerate(grids[0]):
+        for j, p in enumerate(grids[1]):
+            for k, y in enumerate(grids[2]):
+                tp = fp = alerts = 0
+                for f in range(len(labels)):
+                    alert = (m["always"][f] or m["ear"][f] < e or m["perclos"][f] > p or m["yawn"][f] > y)
+                    alerts += alert
+                    tp += alert and labels[f] == DROWSY
+                    fp += alert and labels[f] == ALERT
+                precision = tp / (tp + fp) if tp + fp else 0.0
+                recall = tp / n_pos if n_pos else 0.0
+                f1 = 2 * precision * recall / (precision + recall) if precision + recall else 0.0
+                out["precision"][i, j, k] = precision
+                out["recall"][i, j, k] = recall
+                out["f1"][i, j, k] = f1
+                out["alert_rate"][i, j, k] = alerts / max(1, len(labels))
+    return out
+
+def _naive_best(naive, max_alert_rate=None):
+    best, best_f1 = None, -1.0
+    for idx in np.ndindex(naive["f1"].shape):
+        if max_alert_rate is not None and naive["alert_rate"][idx] > max_alert_rate:
+            continue
+        if naive["f1"][idx] > best_f1:
+            best, best_f1 = idx, naive["f1"][idx]
+    return best
+
+def _check(m, labels, max_alert_rate=None):
+    result = evaluate_grid(m, labels, EAR_GRID, PERCLOS_GRID, YAWN_GRID)
+    naive = _naive(m, labels)
+    for key in ("precision", "recall", "f1", "alert_rate"):
+        np.testing.assert_allclose(result[key], naive[key], rtol=0, atol=1e-12, err_msg=key)
+    best = best_thresholds(result, max_alert_rate)
+    idx = _naive_best(naive, max_alert_rate)
+    if idx is None:
+        assert best is None
+        return
+    i, j, k = idx
+    assert (best["ear_thresh"], best["perclos_thresh"], best["yawn_thresh"]) == (
+        result["ear_grid"][i], result["perclos_grid"][j], result["yawn_grid"][k])
+    assert best["f1"] == pytest.approx(naive["f1"][idx])
+
+@pytest.mark.parametrize("seed", range(5))
+def test_grid_matches_naive_loop(seed):
+    rng = np.random.default_rng(seed)
+    m = _metrics(rng, 200)
+    labels = rng.choice([DROWSY, ALERT, UNLABELED], 200).astype(np.int8)
+    _check(m, labels)
+    _check(m, labels, max_alert_rate=0.6)
+    _check(m, labels, max_alert_rate=0.0)
+
+def test_drivers_without_positives_or_frames():
+    rng = np.random.default_rng(7)
+    m = _metrics(rng, 50)
+    _check(m, np.full(50, ALERT, dtype=np.int8))
+    _check(m, np.full(50, UNLABELED, dtype=np.int8))
+    _check(_metrics(rng, 0), np.zeros(0, dtype=np.int8))
+    _check(_metrics(rng, 0), np.zeros(0, dtype=np.int8), max_alert_rate=0.1)
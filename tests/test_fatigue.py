@@ -0,0 +1,16 @@
+import numpy as np
+
+from core.fatigue import FatigueAnalyzer
+
+def test_window_is_kept_by_timestamp_above_max_fps():
+    # 120 fps into a buffer sized for 30 fps: the 2 s window must still cover 2 s
+    fatigue = FatigueAnalyzer(window_sec=2, max_fps=30)
+    rng = np.random.default_rng(0)
+    ts = np.arange(600) / 120.0
+    ear = rng.uniform(0.1, 0.35, len(ts))
+    for i, t in enumerate(ts):
+        metrics = fatigue.update_measures(t, ear[i], 0.0)
+        inside = ts[:i + 1] >= t - 2
+        assert np.isclose(metrics["ear_avg"], ear[:i + 1][inside].mean(), atol=1e-6)
+        assert metrics["perclos"] == (ear[:i + 1][inside] < fatigue.ear_thresh).mean()
+    assert fatigue.capacity >= 241
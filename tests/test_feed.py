@@ -0,0 +1,83 @@
+import multiprocessing as mp
+import os
+import time
+import cv2
+import numpy as np
+import pytest
+
+import core.feed
+from core.feed import FeedPublisher, FeedReader
+
+def _frames():
+    rng = np.random.default_rng(0)
+    return [rng.integers(0, 256, (h, 320, 3), dtype=np.uint8) for h in (120, 160, 200, 240)]
+
+def _writer(name, started, stop):
+    pub = FeedPublisher(name, slots=2, slot_bytes=1 << 19)
+    frames = _frames()
+    started.set()
+    k = 0
+    while not stop.is_set():
+        pub.publish(frames[k % len(frames)], {"v": k % len(frames)}, force=True)
+        k += 1
+    pub.close()
+
+@pytest.fixture
+def name():
+    return f"dmtest{os.getpid()}"
+
+def _slow_bytes(b):
+    # Widen the race: the writer gets to run while the reader copies a slot
+    time.sleep(0.0005)
+    return bytes(b)
+
+def test_reader_never_returns_a_torn_slot(name, monkeypatch):
+    monkeypatch.setattr(core.feed, "bytes", _slow_bytes, raising=False)
+    expected = [cv2.imencode(".jpg", f, [cv2.IMWRITE_JPEG_QUALITY, 70])[1].tobytes() for f in _frames()]
+    ctx = mp.get_context("fork" if "fork" in mp.get_all_start_methods() else "spawn")
+    started, stop = ctx.Event(), ctx.Event()
+    proc = ctx.Process(target=_writer, args=(name, started, stop), daemon=True)
+    proc.start()
+    try:
+        assert started.wait(10.0)
+        reader = FeedReader(name)
+        reads, deadline = 0, time.monotonic() + 2.0
+        while time.monotonic() < deadline:
+            item = reader.latest()
+            if item is None:
+                continue
+            _, _, jpeg, meta = item
+            assert jpeg == expected[meta["v"]]
+            reads += 1
+        reader.detach()
+        assert reads > 10
+    finally:
+        stop.set()
+        proc.join(5.0)
+
+def test_live_feed_is_not_replaced(name):
+    pub = FeedPublisher(name, slots=2, slot_bytes=1 << 16)
+    try:
+        with pytest.raises(RuntimeError):
+            FeedPublisher(name, slots=2, slot_bytes=1 << 16)
+        assert FeedReader(name).connected
+    finally:
+        pub.close()
+
+def test_reader_follows_a_replaced_feed(name):
+    frame = np.zeros((16, 16, 3), dtype=np.uint8)
+    old = FeedPublisher(name, slots=2, slot_bytes=1 << 16, stale_sec=0.2)
+    old.publish(frame, {"run": "old"}, force=True)
+    reader = FeedReader(name, stale_sec=0.2)
+    assert reader.latest()[3] == {"run": "old"}
+    # Crash: the segment stays behind, neither closed nor unlinked
+    old.shm.close()
+    time.sleep(0.3)
+    new = FeedPublisher(name, slots=2, slot_bytes=1 << 16, stale_sec=0.2)
+    try:
+        new.publish(frame, {"run": "new"}, force=True)
+        time.sleep(0.3)
+        assert reader.latest()[3] == {"run": "new"}
+    finally:
+        reader.detach()
+        new.close()
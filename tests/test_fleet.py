@@ -0,0 +1,48 @@
+import csv
+import dataclasses
+import numpy as np
+import pytest
+
+import core.fleet
+from config import CONFIG
+from core.fleet import FleetRuntime
+from conftest import FPS, FrameLandmarks, write_clip
+
+@pytest.fixture
+def cfg(tmp_path, monkeypatch):
+    monkeypatch.setattr(core.fleet, "_load_landmarks", lambda cfg: FrameLandmarks())
+    return dataclasses.replace(CONFIG, enable_voice=False, fatigue_window_sec=2, telemetry_enabled=False,
+                               thresholds_path=str(tmp_path / "thresholds.json"),
+                               drivers_dir=str(tmp_path / "drivers"),
+                               gallery_index_dir=str(tmp_path / "gallery"))
+
+@pytest.fixture
+def other(tmp_path):
+    # Eyes half shut throughout: a different alert pattern interleaved with the clip's
+    n = 15 * FPS
+    return write_clip(str(tmp_path / "other.avi"), np.full(n, 0.3), np.zeros(n))
+
+def _run(sources, cfg, log):
+    cfg = dataclasses.replace(cfg, events_log_path=log)
+    fleet = FleetRuntime(sources, cfg, max_batch=4, batch_wait_ms=2.0, queue_size=4)
+    out = {}
+    try:
+        for res in fleet.results():
+            out.setdefault(res["stream"], []).append(
+                (res["seq"], res["ts"], res["metrics"], res["identity"], res["stress"], res["status"]))
+    finally:
+        fleet.stop()
+    with open(log) as f:
+        rows = list(csv.DictReader(f))
+    events = {}
+    for r in rows:
+        events.setdefault(int(r.pop("stream")), []).append({k: v for k, v in r.items() if k != "ts"})
+    return out, events
+
+def test_streams_match_single_stream_run(clip, other, cfg, tmp_path):
+    alone, alone_events = _run([clip], cfg, str(tmp_path / "alone.log"))
+    fleet, fleet_events = _run([clip, other, clip], cfg, str(tmp_path / "fleet.log"))
+    assert len(alone[0]) == 20 * FPS
+    assert fleet[0] == alone[0] and fleet[2] == alone[0]
+    assert alone_events[0] and fleet_events[0] == alone_events[0] and fleet_events[2] == alone_events[0]
+    assert fleet_events[1] and fleet_events[1] != alone_events[0]
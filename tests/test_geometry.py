@@ -0,0 +1,50 @@
+import numpy as np
+
+from bench.synthetic import face_landmarks
+from core.fatigue import FatigueAnalyzer
+from core.geometry import NOSE_TIP, face_geometry, pitch_degrees
+
+def _nod(shape, degrees):
+    # Slide the nose tip along the eye-to-mouth axis as a nod of the given pitch would
+    eye_mid = (shape[36:42].mean(axis=0) + shape[42:48].mean(axis=0)) / 2
+    span = np.linalg.norm(shape[48:68].mean(axis=0) - eye_mid)
+    out = shape.astype(np.float64).copy()
+    out[NOSE_TIP, 1] += 0.5 * np.sin(np.radians(degrees)) * span
+    return out
+
+def test_stacked_geometry_matches_single_faces():
+    shapes = np.stack([face_landmarks(), face_landmarks(eye_open=0.1), face_landmarks(mouth_open=1.0),
+                       face_landmarks(scale=2.0, center=(200, 150))])
+    geom = face_geometry(shapes)
+    for i, shape in enumerate(shapes):
+        single = face_geometry(shape)
+        for k, v in geom.items():
+            assert np.isclose(v[i], single[k][0])
+    # EAR: eyes closing lower it, and both eyes agree on a symmetric face
+    assert geom["ear"][1] < 0.5 * geom["ear"][0]
+    assert np.allclose(geom["ear_left"], geom["ear_right"])
+    # MAR: opening the mouth raises it; scaling the face changes pixels but not the ratio
+    assert geom["mar"][2] > 3 * geom["mar"][0]
+    assert np.isclose(geom["mouth_opening"][3], 2 * geom["mouth_opening"][0], rtol=0.1)
+    assert np.isclose(geom["mar"][3], geom["mar"][0], rtol=0.1)
+    assert np.isclose(geom["size"][3], 2 * geom["size"][0])
+    # Pitch: same face at any scale or position reads the same
+    assert np.isclose(geom["pitch"][3], geom["pitch"][0], atol=1.0)
+
+def test_pitch_follows_a_nod():
+    level = face_landmarks(scale=3.0)
+    shapes = np.stack([_nod(level, d) for d in (-20, 0, 15, 30)])
+    geom = face_geometry(shapes)
+    pitch = pitch_degrees(geom["nose_offset"], geom["nose_offset"][1])
+    assert np.allclose(pitch, [-20, 0, 15, 30], atol=1.0)
+
+def test_fatigue_pitch_is_relative_to_the_drivers_level():
+    fatigue = FatigueAnalyzer(window_sec=10)
+    level = face_landmarks(scale=3.0)
+    for i in range(100):
+        metrics = fatigue.update(None, [(0, 0, 1, 1)], [level], ts=i / 10)
+    # The synthetic face's nose sits off the zero neutral; the window's level takes that out
+    assert abs(face_geometry(level)["pitch"][0]) > 3 and abs(metrics["pitch"]) < 1e-3
+    nod = _nod(level, 25)
+    metrics = fatigue.update(None, [(0, 0, 1, 1)], [nod], ts=10.0)
+    assert 20 < metrics["pitch"] < 26
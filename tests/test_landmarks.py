@@ -0,0 +1,65 @@
+import numpy as np
+
+from bench.synthetic import face_landmarks
+from core.landmarks import LandmarkDetector
+
+TEMPLATE = face_landmarks().astype(np.float64)
+
+class Rect:
+    def __init__(self, left, top, right, bottom):
+        self.l, self.t, self.r, self.b = left, top, right, bottom
+
+    def left(self): return self.l
+    def top(self): return self.t
+    def right(self): return self.r
+    def bottom(self): return self.b
+    def width(self): return self.r - self.l + 1
+    def height(self): return self.b - self.t + 1
+    def area(self): return self.width() * self.height()
+
+class Models:
+    """The face is the bright square; like dlib, the predictor always answers inside the rect it is given."""
+
+    def __init__(self):
+        self.detections = 0
+
+    def detector(self, gray, upsample):
+        self.detections += 1
+        ys, xs = np.nonzero(gray > 128)
+        if not len(xs):
+            return []
+        return [Rect(int(xs.min()), int(ys.min()), int(xs.max()), int(ys.max()))]
+
+    def predictor(self, gray, rect):
+        lo, hi = TEMPLATE.min(axis=0), TEMPLATE.max(axis=0)
+        unit = (TEMPLATE - lo) / (hi - lo)
+        return np.round(unit * (rect.width() - 1, rect.height() - 1) + (rect.left(), rect.top())).astype(np.int32)
+
+def _frame(face=True, x=120):
+    frame = np.zeros((240, 320, 3), dtype=np.uint8)
+    if face:
+        frame[60:180, x:x + 100] = 255
+    return frame
+
+def _detector(models, **kw):
+    lmk = LandmarkDetector("", track=True, redetect_every=100, lazy=True, **kw)
+    return lmk.attach_models(models.detector, models.predictor, Rect, lambda shape: shape)
+
+def test_track_follows_a_moving_face():
+    models = Models()
+    lmk = _detector(models)
+    for i in range(5):
+        rects, landmarks = lmk.detect(_frame(x=120 + 4 * i))
+        assert rects == [(120 + 4 * i, 60, 100, 120)]
+    assert lmk._since_detect == 4
+
+def test_lost_face_is_dropped_on_the_next_frame():
+    models = Models()
+    lmk = _detector(models)
+    for _ in range(3):
+        assert lmk.detect(_frame())[0]
+    assert lmk._since_detect == 2
+    rects, landmarks = lmk.detect(_frame(face=False))
+    assert rects == [] and landmarks == []
+    # Reacquired by full detection once it is back
+    assert lmk.detect(_frame())[0] == [(120, 60, 100, 120)]
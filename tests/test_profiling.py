@@ -0,0 +1,18 @@
+import json
+import os
+
+from core.profiling import ThresholdManager
+
+def test_sync_writes_merge_with_other_writers(tmp_path):
+    path = str(tmp_path / "thresholds.json")
+    calibrate = ThresholdManager(path)
+    app = ThresholdManager(path, write_behind=True, flush_interval_sec=3600)
+    app.adapt("ann", {"ear_avg": 0.25})
+    app.flush()
+    # calibrate.py's in-memory copy predates the app's flush; its write must not drop ear_baseline
+    calibrate.set_for_driver("ann", {"ear_thresh": 0.2})
+    app.close()
+    with open(path) as f:
+        assert json.load(f) == {"ann": {"ear_baseline": 0.25, "ear_thresh": 0.2}}
+    assert calibrate.get_for_driver("ann") == {"ear_baseline": 0.25, "ear_thresh": 0.2}
+    assert sorted(os.listdir(tmp_path)) == ["thresholds.json", "thresholds.json.lock"]
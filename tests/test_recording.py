@@ -0,0 +1,36 @@
+import numpy as np
+
+from bench.synthetic import face_landmarks, face_rect
+from core.fatigue import FatigueAnalyzer
+from core.recording import LandmarkRecorder, LandmarkReplay, replay_metrics
+
+def _record(path):
+    rec = LandmarkRecorder(path, chunk=4)
+    shape = face_landmarks()
+    for i in range(10):
+        ts = i / 10
+        if i == 3:
+            rec.write(ts, [face_rect(shape)], [])  # face found, landmarks not ready yet
+        elif i == 6:
+            rec.write(ts, [], [])
+        else:
+            rec.write(ts, [face_rect(shape)], [shape])
+    rec.close()
+
+def test_replay_skips_rects_without_landmarks(tmp_path):
+    path = str(tmp_path / "rec.bin")
+    _record(path)
+    live, replayed = FatigueAnalyzer(window_sec=2), FatigueAnalyzer(window_sec=2)
+    for (ts, rects, lms, _), (rts, metrics, _) in zip(LandmarkReplay(path).frames(), replay_metrics(path, replayed)):
+        assert rts == ts
+        assert live.update(None, rects, lms, ts=ts) == metrics
+        assert np.isfinite(metrics["ear_avg"])
+    frames = list(LandmarkReplay(path).frames())
+    assert frames[3][1] and not frames[3][2]
+
+def test_non_finite_measures_are_ignored():
+    fatigue = FatigueAnalyzer(window_sec=2)
+    fatigue.update_measures(0.0, 0.3, 0.1)
+    assert fatigue.update_measures(0.1, float("nan"), 0.1) == {"ear_avg": 0.0, "perclos": 0.0, "yawn": 0.0}
+    assert fatigue.update_measures(0.2, 0.3, float("inf"))["ear_avg"] == 0.0
+    assert fatigue.update_measures(0.3, 0.1, 0.1)["perclos"] == 0.5
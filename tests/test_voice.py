@@ -0,0 +1,65 @@
+import threading
+import pytest
+
+from core.voice import NullBackend, VoiceQueue
+
+class GatedBackend(NullBackend):
+    """Null backend whose first message blocks until released, so later submissions stay queued."""
+
+    def __init__(self):
+        super().__init__()
+        self.speaking = threading.Event()
+        self.release = threading.Event()
+
+    def speak(self, msg):
+        self.speaking.set()
+        self.release.wait(5.0)
+        super().speak(msg)
+
+@pytest.fixture
+def voice():
+    backend = GatedBackend()
+    q = VoiceQueue(backend)
+    q.submit("busy")
+    assert backend.speaking.wait(5.0)
+    yield q, backend
+    backend.release.set()
+    q.close()
+
+def _drain(q, backend):
+    backend.release.set()
+    q.close()
+    return backend.spoken[1:]
+
+def test_duplicates_are_spoken_once(voice):
+    q, backend = voice
+    for _ in range(3):
+        q.submit("Take a break.")
+    q.submit("Drink water.")
+    assert q.pending() == 2 and q.stats["deduped"] == 2
+    assert _drain(q, backend) == ["Take a break.", "Drink water."]
+
+def test_higher_priority_preempts_queued_advice(voice):
+    q, backend = voice
+    q.submit("Maintain safe driving.", priority=0)
+    q.submit("Consider a pause.", priority=1)
+    q.submit("Pull over safely.", priority=2)
+    q.submit("Breathe steadily.", priority=1)
+    assert q.stats["preempted"] == 2
+    assert _drain(q, backend) == ["Pull over safely.", "Breathe steadily."]
+
+def test_expired_advice_is_dropped(voice):
+    q, backend = voice
+    q.submit("Old news.", ttl_sec=0.0)
+    q.submit("Fresh.", ttl_sec=60.0, priority=0)
+    assert _drain(q, backend) == ["Fresh."]
+    assert q.stats["expired"] == 1
+
+def test_channels_dedup_and_preempt_separately(voice):
+    q, backend = voice
+    q.submit("Take a break.", channel=0)
+    q.submit("Take a break.", channel=1)
+    q.submit("Consider a pause.", priority=1, channel=1)
+    q.submit("Pull over safely.", priority=2, channel=0)
+    assert q.stats["deduped"] == 0 and q.stats["preempted"] == 1
+    assert _drain(q, backend) == ["Pull over safely.", "Take a break.", "Consider a pause."]